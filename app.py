@@ -1,10 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, date
-import sqlite3
+import streamlit.components.v1 as components
+import contextlib
+import functools
+import json
 import os
+import tempfile
+from datetime import datetime
+
+from loja import agendador, exportacao, instrumentacao, previsao, relatorios, vendas
+from loja.conexao import DB_PATH
+from loja.estoque import COBERTURA_ALVO, JANELA_CURTA, JANELA_LONGA
+from loja.servico import Loja
 
 # Configuração da página
 st.set_page_config(
@@ -14,277 +21,171 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # Menu lateral fechado por padrão no mobile
 )
 
-# CSS customizado para mobile
-st.markdown("""
-<style>
-    /* Otimizações para mobile */
-    .stApp {
-        max-width: 100%;
-    }
-    
-    /* Botões maiores para touch */
-    .stButton > button {
-        width: 100%;
-        height: 3rem;
-        font-size: 1.1rem;
-        font-weight: bold;
-        margin: 0.5rem 0;
-        border-radius: 10px;
-    }
-    
-    /* Inputs maiores */
-    .stTextInput input, .stNumberInput input, .stSelectbox select {
-        font-size: 1.1rem;
-        height: 3rem;
-        border-radius: 10px;
-    }
-    
-    /* Cards de métricas mais destacadas */
-    .metric-container {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem 0;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-    }
-    
-    /* Títulos mais destacados */
-    .main-title {
-        text-align: center;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-size: 2.5rem;
-        font-weight: bold;
-        margin-bottom: 2rem;
-    }
-    
-    /* Menu lateral otimizado */
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #667eea 0%, #764ba2 100%);
-        color: white;
-    }
-    
-    /* Formulários mais espaçados */
-    .stForm {
-        background: #f8f9ff;
-        padding: 2rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-    }
-    
-    /* Tabelas responsivas */
-    .dataframe {
-        font-size: 0.9rem;
-    }
-    
-    /* Gráficos responsivos */
-    .plotly-graph-div {
-        border-radius: 15px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-    }
-    
-    @media (max-width: 768px) {
-        .main-title {
-            font-size: 1.8rem;
-        }
-        
-        .stButton > button {
-            height: 3.5rem;
-            font-size: 1.2rem;
-        }
-        
-        .metric-container {
-            padding: 1rem;
-        }
-    }
-</style>
-
-<!-- PWA Meta Tags -->
-<meta name="apple-mobile-web-app-capable" content="yes">
-<meta name="apple-mobile-web-app-status-bar-style" content="black-translucent">
-<meta name="apple-mobile-web-app-title" content="Loja Bebidas">
-<meta name="mobile-web-app-capable" content="yes">
-<meta name="theme-color" content="#667eea">
-<link rel="manifest" href="/manifest.json">
-
-<!-- PWA JavaScript -->
-<script>
-    // Registrar Service Worker
-    if ('serviceWorker' in navigator) {
-        window.addEventListener('load', function() {
-            navigator.serviceWorker.register('/sw.js')
-            .then(function(registration) {
-                console.log('SW registrado com sucesso:', registration.scope);
-            }, function(err) {
-                console.log('Falha ao registrar SW:', err);
-            });
-        });
-    }
-    
-    // Prompt de instalação PWA
-    let deferredPrompt;
-    const installButton = document.createElement('button');
-    installButton.style.display = 'none';
-    installButton.textContent = '📱 Instalar App';
-    installButton.style.position = 'fixed';
-    installButton.style.bottom = '20px';
-    installButton.style.right = '20px';
-    installButton.style.background = 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)';
-    installButton.style.color = 'white';
-    installButton.style.border = 'none';
-    installButton.style.padding = '15px 20px';
-    installButton.style.borderRadius = '25px';
-    installButton.style.fontSize = '16px';
-    installButton.style.fontWeight = 'bold';
-    installButton.style.cursor = 'pointer';
-    installButton.style.boxShadow = '0 4px 15px rgba(0,0,0,0.3)';
-    installButton.style.zIndex = '1000';
-    
-    document.body.appendChild(installButton);
-    
-    window.addEventListener('beforeinstallprompt', (e) => {
-        e.preventDefault();
-        deferredPrompt = e;
-        installButton.style.display = 'block';
-    });
-    
-    installButton.addEventListener('click', (e) => {
-        installButton.style.display = 'none';
-        deferredPrompt.prompt();
-        deferredPrompt.userChoice.then((result) => {
-            if (result.outcome === 'accepted') {
-                console.log('PWA instalado');
-            }
-            deferredPrompt = null;
-        });
-    });
-    
-    window.addEventListener('appinstalled', (evt) => {
-        console.log('PWA instalado com sucesso');
-        installButton.style.display = 'none';
-    });
-</script>
-""", unsafe_allow_html=True)
-
-# Função para inicializar o banco de dados
-def init_database():
-    conn = sqlite3.connect('loja_bebidas.db')
-    cursor = conn.cursor()
-    
-    # Tabela de produtos
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS produtos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            categoria TEXT NOT NULL,
-            preco REAL NOT NULL,
-            estoque INTEGER NOT NULL,
-            data_cadastro TEXT
-        )
-    ''')
-    
-    # Tabela de clientes
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS clientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            telefone TEXT,
-            data_cadastro TEXT
-        )
-    ''')
-    
-    # Tabela de vendas
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS vendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            produto_id INTEGER,
-            cliente_id INTEGER,
-            nome_produto TEXT,
-            nome_cliente TEXT,
-            quantidade INTEGER,
-            valor_unitario REAL,
-            valor_total REAL,
-            data_venda TEXT,
-            hora_venda TEXT,
-            FOREIGN KEY (produto_id) REFERENCES produtos (id),
-            FOREIGN KEY (cliente_id) REFERENCES clientes (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-# Função para carregar clientes
-def carregar_clientes():
-    conn = sqlite3.connect('loja_bebidas.db')
-    df = pd.read_sql_query("SELECT * FROM clientes", conn)
-    conn.close()
-    return df
-
-# Função para adicionar cliente
-def adicionar_cliente(nome, telefone=""):
-    conn = sqlite3.connect('loja_bebidas.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO clientes (nome, telefone, data_cadastro)
-        VALUES (?, ?, ?)
-    ''', (nome, telefone, datetime.now().strftime("%Y-%m-%d")))
-    conn.commit()
-    conn.close()
-
-# Função para carregar produtos
-def carregar_produtos():
-    conn = sqlite3.connect('loja_bebidas.db')
-    df = pd.read_sql_query("SELECT * FROM produtos", conn)
-    conn.close()
-    return df
-
-# Função para carregar vendas
-def carregar_vendas():
-    conn = sqlite3.connect('loja_bebidas.db')
-    df = pd.read_sql_query("SELECT * FROM vendas", conn)
-    conn.close()
-    return df
-
-# Função para adicionar produto
-def adicionar_produto(nome, categoria, preco, estoque):
-    conn = sqlite3.connect('loja_bebidas.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO produtos (nome, categoria, preco, estoque, data_cadastro)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (nome, categoria, preco, estoque, datetime.now().strftime("%Y-%m-%d")))
-    conn.commit()
-    conn.close()
-
-# Função para registrar venda
-def registrar_venda(produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario):
-    conn = sqlite3.connect('loja_bebidas.db')
-    cursor = conn.cursor()
-    
-    valor_total = quantidade * valor_unitario
-    data_venda = datetime.now().strftime("%Y-%m-%d")
-    hora_venda = datetime.now().strftime("%H:%M:%S")
-    
-    cursor.execute('''
-        INSERT INTO vendas (produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario, valor_total, data_venda, hora_venda)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario, valor_total, data_venda, hora_venda))
-    
-    # Atualizar estoque
-    cursor.execute('''
-        UPDATE produtos SET estoque = estoque - ? WHERE id = ?
-    ''', (quantidade, produto_id))
-    
-    conn.commit()
-    conn.close()
+# Medições desta execução (loja/instrumentacao.py). Pico de memória e perfil
+# só com o painel de depuração ligado (no fim do menu lateral).
+depuracao = st.session_state.get("depuracao", False)
+execucao = instrumentacao.iniciar_execucao(
+    memoria=depuracao, perfil=depuracao and st.session_state.get("perfilar", False)
+)
+
+# Casca do PWA (estilos, manifest, service worker, fila offline e botão de
+# instalar) como componente: os arquivos de componentes/casca_pwa vêm do
+# servidor uma vez e ficam no cache do navegador, e o iframe continua montado
+# entre os reruns. Antes, ~5 KB de CSS/JS iam em todo rerun via st.markdown.
+casca_pwa = components.declare_component(
+    "casca_pwa", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "componentes", "casca_pwa")
+)
+casca_pwa(key="casca_pwa", default=None)
+
+# Serviço de dados compartilhado por todas as sessões (pool de conexões +
+# cache de consultas); as migrações rodam uma vez por processo
+@st.cache_resource
+def obter_loja():
+    loja = Loja(DB_PATH)
+    loja.inicializar()
+    # Backups, resumos, previsões e manutenção numa thread à parte
+    # (loja/agendador.py), nunca dentro da execução de uma sessão
+    loja.iniciar_agendador()
+    return loja
+
+# Opções de ordenação das listagens: rótulo -> (ordem, crescente)
+ORDENACAO_PRODUTOS = {
+    "Nome (A-Z)": ("nome", True),
+    "Nome (Z-A)": ("nome", False),
+    "Categoria": ("categoria", True),
+    "Menor preço": ("preco", True),
+    "Maior preço": ("preco", False),
+    "Menor estoque": ("estoque", True),
+    "Maior estoque": ("estoque", False),
+    "Mais recentes": ("recentes", False),
+}
+ORDENACAO_CLIENTES = {
+    "Nome (A-Z)": ("nome", True),
+    "Nome (Z-A)": ("nome", False),
+    "Mais recentes": ("recentes", False),
+}
+TAMANHOS_PAGINA = [25, 50, 100]
+# Produtos oferecidos na busca do formulário de ponto de pedido
+LIMITE_BUSCA_PONTO = 20
+
+# Pilha de cursores da paginação guardada na sessão; volta para a primeira
+# página quando os filtros mudam
+def estado_paginacao(nome, filtros):
+    estado = st.session_state.get(nome)
+    if estado is None or estado['filtros'] != filtros:
+        estado = {'filtros': filtros, 'cursores': [None]}
+        st.session_state[nome] = estado
+    return estado['cursores']
+
+# Botões de página anterior/próxima
+def navegacao_paginas(nome, cursores, proximo, total, tamanho_pagina):
+    paginas = max(1, -(-total // tamanho_pagina))
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Anterior", key=f"{nome}_anterior", disabled=len(cursores) == 1):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<div style='text-align: center;'>Página {len(cursores)} de {paginas} • {total} registros</div>",
+                    unsafe_allow_html=True)
+    with col3:
+        if st.button("Próxima ➡️", key=f"{nome}_proxima", disabled=proximo is None):
+            cursores.append(proximo)
+            st.rerun()
+
+# Vendas mostradas no histórico detalhado dos relatórios
+LIMITE_HISTORICO = 500
+
+# Aba de previsões: só lê o que o cálculo em segundo plano gravou
+# (loja/previsao.py, rodado uma vez por dia pelo agendador)
+def mostrar_previsoes():
+    situacao = loja.situacao_previsoes()
+    
+    concluida = situacao['concluida']
+    ultima = situacao['ultima']
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        if concluida:
+            st.caption(f"Atualizada em {datetime.fromisoformat(concluida['concluida_em']):%d/%m/%Y %H:%M} • "
+                       f"{concluida['produtos']} produtos em {concluida['segundos']:.1f}s • "
+                       f"próximos {previsao.HORIZONTE} dias, pelo histórico completo de vendas")
+        if ultima and ultima['status'] == previsao.ERRO:
+            st.error(f"❌ A última atualização falhou: {ultima['detalhe']}")
+    with col2:
+        if st.button("🔄 Atualizar agora", disabled=situacao['em_andamento']):
+            loja.atualizar_previsoes_em_segundo_plano()
+            st.rerun()
+    
+    if situacao['em_andamento']:
+        acompanhar_previsoes()
+    if concluida is None:
+        return
+    
+    por_categoria = loja.previsao_categorias()
+    if por_categoria.empty:
+        st.info("Sem vendas suficientes para prever a demanda.")
+        return
+    st.markdown("#### Demanda prevista por categoria (unidades/dia)")
+    st.line_chart(por_categoria.pivot(index='dia', columns='categoria', values='quantidade'))
+    
+    st.markdown("#### Produtos com maior demanda prevista")
+    st.dataframe(
+        loja.previsao_produtos(),
+        column_config={
+            "nome": "Produto",
+            "categoria": "Categoria",
+            "media_diaria": st.column_config.NumberColumn("Unidades/dia", format="%.1f"),
+            "total_horizonte": st.column_config.NumberColumn(f"Total {previsao.HORIZONTE} dias", format="%.0f"),
+            "estoque": "Estoque",
+            "dias_estoque": st.column_config.NumberColumn("Dias de Estoque", format="%.1f"),
+            "modelo": "Modelo",
+            "erro_medio": st.column_config.NumberColumn("Erro médio (un/dia)", format="%.2f"),
+            "dias_historico": "Dias de Histórico"
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+
+# Enquanto o cálculo roda, confere a cada 5 s e recarrega a página quando acaba
+@st.fragment(run_every=5)
+def acompanhar_previsoes():
+    if not loja.situacao_previsoes()['em_andamento']:
+        st.rerun()
+    st.info("⏳ Calculando as previsões em segundo plano; a página atualiza sozinha ao terminar.")
+
+def rotulo_produto(produto):
+    return f"{produto['nome']} (Estoque: {produto['estoque']}) - R$ {produto['preco']:.2f}"
+
+def rotulo_cliente(cliente):
+    return cliente['nome'] + (f" - {cliente['telefone']}" if cliente['telefone'] else "")
+
+# Arquivos exportados ficam em disco, no máximo um por sessão (o anterior é
+# apagado ao gerar outro); os de sessões encerradas somem depois de um dia
+PASTA_EXPORTACOES = os.path.join(tempfile.gettempdir(), "loja_exportacoes")
+
+def novo_arquivo_exportacao(formato):
+    os.makedirs(PASTA_EXPORTACOES, exist_ok=True)
+    limite = datetime.now().timestamp() - 24 * 3600
+    for nome in os.listdir(PASTA_EXPORTACOES):
+        caminho = os.path.join(PASTA_EXPORTACOES, nome)
+        with contextlib.suppress(OSError):
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+    return tempfile.NamedTemporaryFile(dir=PASTA_EXPORTACOES, suffix=f".{formato}", delete=False)
+
+def apagar_exportacao():
+    gerado = st.session_state.pop('exportacao', None)
+    if gerado:
+        with contextlib.suppress(OSError):
+            os.remove(gerado[2])
+
+# Lido só quando o botão de download é clicado, e não guardado na sessão
+def ler_exportacao(caminho):
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
 
 # Inicializar banco de dados
-init_database()
+loja = obter_loja()
 
 # Título principal com estilo mobile
 st.markdown('<h1 class="main-title">🍺 Loja de Bebidas</h1>', unsafe_allow_html=True)
@@ -295,8 +196,10 @@ st.sidebar.title("🔧 Menu")
 st.sidebar.markdown("*Toque para navegar*")
 opcao = st.sidebar.selectbox(
     "Escolha uma opção:",
-    ["🏠 Início", "📦 Produtos", "👥 Clientes", "🛒 Vendas", "📊 Relatórios"]
+    ["🏠 Início", "📦 Produtos", "👥 Clientes", "🛒 Vendas", "📊 Relatórios", "📥 Importar"]
 )
+execucao.pagina = opcao
+etapa_pagina = instrumentacao.iniciar_etapa(f"página {opcao}")
 
 # ========================================
 # PÁGINA INICIAL
@@ -304,16 +207,14 @@ opcao = st.sidebar.selectbox(
 if opcao == "🏠 Início":
     st.markdown("### 📊 Resumo do Negócio")
     
-    # Carregar dados para estatísticas
-    produtos_df = carregar_produtos()
-    vendas_df = carregar_vendas()
-    clientes_df = carregar_clientes()
+    # Totais calculados no banco
+    resumo_negocio = loja.resumo_negocio()
     
     # Métricas em cards estilizados para mobile
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        produtos_count = len(produtos_df) if not produtos_df.empty else 0
+        produtos_count = resumo_negocio['produtos']
         st.markdown(f"""
         <div class="metric-container">
             <h2>📦</h2>
@@ -323,7 +224,7 @@ if opcao == "🏠 Início":
         """, unsafe_allow_html=True)
     
     with col2:
-        clientes_count = len(clientes_df) if not clientes_df.empty else 0
+        clientes_count = resumo_negocio['clientes']
         st.markdown(f"""
         <div class="metric-container">
             <h2>👥</h2>
@@ -333,7 +234,7 @@ if opcao == "🏠 Início":
         """, unsafe_allow_html=True)
     
     with col3:
-        faturamento = vendas_df['valor_total'].sum() if not vendas_df.empty else 0
+        faturamento = resumo_negocio['faturamento']
         st.markdown(f"""
         <div class="metric-container">
             <h2>💰</h2>
@@ -342,6 +243,16 @@ if opcao == "🏠 Início":
         </div>
         """, unsafe_allow_html=True)
     
+    # Alertas de estoque (em cache até a próxima venda ou alteração de produto)
+    resumo_estoque = loja.resumo_alertas()
+    if resumo_estoque['em_alerta']:
+        st.warning(
+            f"⚠️ **{resumo_estoque['em_alerta']} produto(s) no ponto de pedido**: "
+            f"{resumo_estoque['sem_estoque']} sem estoque, "
+            f"{resumo_estoque['acabam_na_semana']} acabam em menos de {JANELA_CURTA} dias. "
+            "Veja em Produtos → Estoque Baixo."
+        )
+    
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Botões de acesso rápido para mobile
@@ -370,7 +281,7 @@ if opcao == "🏠 Início":
 elif opcao == "📦 Produtos":
     st.header("📦 Gerenciamento de Produtos")
     
-    tab1, tab2 = st.tabs(["➕ Cadastrar Produto", "📋 Ver Produtos"])
+    tab1, tab2, tab3 = st.tabs(["➕ Cadastrar Produto", "📋 Ver Produtos", "⚠️ Estoque Baixo"])
     
     with tab1:
         st.subheader("Cadastrar Novo Produto")
@@ -394,12 +305,14 @@ elif opcao == "📦 Produtos":
                     "Outros"
                 ])
                 estoque = st.number_input("Quantidade em Estoque *", min_value=0, step=1)
+                ponto_pedido = st.number_input("Ponto de Pedido", min_value=0, value=5, step=1,
+                                               help="Com o estoque neste nível ou abaixo, o produto entra nos alertas")
             
             submitted = st.form_submit_button("✅ Cadastrar Produto", type="primary")
             
             if submitted:
                 if nome and preco and categoria and estoque >= 0:
-                    adicionar_produto(nome, categoria, preco, estoque)
+                    loja.cadastrar_produto(nome, categoria, preco, estoque, ponto_pedido)
                     st.success(f"✅ Produto '{nome}' cadastrado com sucesso!")
                     st.rerun()
                 else:
@@ -408,29 +321,38 @@ elif opcao == "📦 Produtos":
     with tab2:
         st.subheader("Produtos Cadastrados")
         
-        produtos_df = carregar_produtos()
+        total_produtos = loja.contar_produtos()
         
-        if not produtos_df.empty:
+        if total_produtos > 0:
             # Filtros
             col1, col2 = st.columns(2)
             with col1:
-                categorias = ["Todas"] + list(produtos_df['categoria'].unique())
+                categorias = ["Todas"] + loja.categorias()
                 filtro_categoria = st.selectbox("Filtrar por Categoria:", categorias)
             
             with col2:
                 busca_nome = st.text_input("Buscar por Nome:", placeholder="Digite o nome do produto")
             
-            # Aplicar filtros
-            df_filtrado = produtos_df.copy()
-            if filtro_categoria != "Todas":
-                df_filtrado = df_filtrado[df_filtrado['categoria'] == filtro_categoria]
-            if busca_nome:
-                df_filtrado = df_filtrado[df_filtrado['nome'].str.contains(busca_nome, case=False, na=False)]
+            col1, col2 = st.columns(2)
+            with col1:
+                ordem_rotulo = st.selectbox("Ordenar por:", list(ORDENACAO_PRODUTOS))
+            with col2:
+                tamanho_pagina = st.selectbox("Itens por página:", TAMANHOS_PAGINA)
+            
+            # Filtros, ordenação e paginação são aplicados no banco
+            categoria = None if filtro_categoria == "Todas" else filtro_categoria
+            ordem, crescente = ORDENACAO_PRODUTOS[ordem_rotulo]
+            filtros = (categoria, busca_nome, ordem, crescente, tamanho_pagina)
+            cursores = estado_paginacao("pagina_produtos", filtros)
+            
+            total_filtrado = loja.contar_produtos(categoria, busca_nome)
+            df_pagina, proximo = loja.pagina_produtos(categoria, busca_nome, ordem, crescente,
+                                                      tamanho_pagina, cursores[-1])
             
             # Exibir tabela
-            if not df_filtrado.empty:
+            if not df_pagina.empty:
                 st.dataframe(
-                    df_filtrado[['nome', 'categoria', 'preco', 'estoque', 'data_cadastro']],
+                    df_pagina[['nome', 'categoria', 'preco', 'estoque', 'data_cadastro']],
                     column_config={
                         "nome": "Produto",
                         "categoria": "Categoria",
@@ -438,19 +360,69 @@ elif opcao == "📦 Produtos":
                         "estoque": "Estoque",
                         "data_cadastro": "Data Cadastro"
                     },
-                    use_container_width=True
+                    use_container_width=True,
+                    hide_index=True
                 )
-                
-                # Alertas de estoque baixo
-                estoque_baixo = df_filtrado[df_filtrado['estoque'] <= 5]
-                if not estoque_baixo.empty:
-                    st.warning("⚠️ **Produtos com estoque baixo (≤ 5 unidades):**")
-                    for _, produto in estoque_baixo.iterrows():
-                        st.write(f"• {produto['nome']}: {produto['estoque']} unidades")
+                navegacao_paginas("pagina_produtos", cursores, proximo, total_filtrado, tamanho_pagina)
             else:
                 st.info("Nenhum produto encontrado com os filtros aplicados.")
         else:
             st.info("📦 Nenhum produto cadastrado ainda. Use a aba 'Cadastrar Produto' para começar!")
+    
+    with tab3:
+        st.subheader("Produtos no Ponto de Pedido")
+        
+        # Só os produtos em alerta saem do banco (índice parcial), com a
+        # velocidade de venda recente; ver loja/estoque.py
+        alertas = loja.alertas_estoque()
+        if alertas.empty:
+            st.success("✅ Nenhum produto no ponto de pedido.")
+        else:
+            st.warning(f"⚠️ **{len(alertas)} produto(s) no ponto de pedido ou abaixo dele**")
+            st.dataframe(
+                alertas[['nome', 'categoria', 'estoque', 'ponto_pedido', 'velocidade_curta', 'velocidade_longa',
+                         'dias_cobertura', 'sugestao_compra']],
+                column_config={
+                    "nome": "Produto",
+                    "categoria": "Categoria",
+                    "estoque": "Estoque",
+                    "ponto_pedido": "Ponto de Pedido",
+                    "velocidade_curta": st.column_config.NumberColumn(
+                        f"Vendas/dia ({JANELA_CURTA}d)", format="%.1f"),
+                    "velocidade_longa": st.column_config.NumberColumn(
+                        f"Vendas/dia ({JANELA_LONGA}d)", format="%.1f"),
+                    "dias_cobertura": st.column_config.NumberColumn("Dias de Cobertura", format="%.1f"),
+                    "sugestao_compra": "Sugestão de Compra"
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(f"Sugestão de compra: {COBERTURA_ALVO} dias de venda mais o ponto de pedido. "
+                       "Sem vendas recentes, os dias de cobertura ficam em branco.")
+        
+        st.markdown("#### Alterar Ponto de Pedido")
+        busca_ponto = st.text_input("Buscar produto:", key="busca_ponto_pedido",
+                                    placeholder="Vazio: produtos em alerta")
+        if busca_ponto.strip():
+            candidatos, _ = loja.pagina_produtos(busca=busca_ponto, tamanho=LIMITE_BUSCA_PONTO)
+        else:
+            candidatos = alertas
+        
+        if candidatos.empty:
+            st.info("Nenhum produto encontrado.")
+        else:
+            nomes = candidatos.set_index('id')['nome'].to_dict()
+            with st.form("form_ponto_pedido"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    produto_id = st.selectbox("Produto", list(nomes), format_func=nomes.get)
+                with col2:
+                    novo_ponto = st.number_input("Novo ponto de pedido", min_value=0, value=5, step=1)
+                
+                if st.form_submit_button("💾 Salvar Ponto de Pedido"):
+                    loja.definir_ponto_pedido(produto_id, novo_ponto)
+                    st.success(f"✅ Ponto de pedido de '{nomes[produto_id]}' alterado para {novo_ponto}.")
+                    st.rerun()
 
 # ========================================
 # GERENCIAR CLIENTES
@@ -476,7 +448,7 @@ elif opcao == "👥 Clientes":
             
             if submitted:
                 if nome_cliente.strip():
-                    adicionar_cliente(nome_cliente.strip(), telefone_cliente.strip())
+                    loja.cadastrar_cliente(nome_cliente.strip(), telefone_cliente.strip())
                     st.success(f"✅ Cliente '{nome_cliente}' cadastrado com sucesso!")
                     st.rerun()
                 else:
@@ -485,30 +457,42 @@ elif opcao == "👥 Clientes":
     with tab2:
         st.subheader("Clientes Cadastrados")
         
-        clientes_df = carregar_clientes()
+        total_clientes = loja.contar_clientes()
         
-        if not clientes_df.empty:
+        if total_clientes > 0:
             # Filtro por nome
             busca_cliente = st.text_input("Buscar Cliente:", placeholder="Digite o nome do cliente")
             
-            # Aplicar filtro
-            df_filtrado = clientes_df.copy()
-            if busca_cliente:
-                df_filtrado = df_filtrado[df_filtrado['nome'].str.contains(busca_cliente, case=False, na=False)]
+            col1, col2 = st.columns(2)
+            with col1:
+                ordem_rotulo = st.selectbox("Ordenar por:", list(ORDENACAO_CLIENTES))
+            with col2:
+                tamanho_pagina = st.selectbox("Itens por página:", TAMANHOS_PAGINA)
+            
+            # Filtro, ordenação e paginação são aplicados no banco
+            ordem, crescente = ORDENACAO_CLIENTES[ordem_rotulo]
+            filtros = (busca_cliente, ordem, crescente, tamanho_pagina)
+            cursores = estado_paginacao("pagina_clientes", filtros)
+            
+            total_filtrado = loja.contar_clientes(busca_cliente)
+            df_pagina, proximo = loja.pagina_clientes(busca_cliente, ordem, crescente,
+                                                      tamanho_pagina, cursores[-1])
             
             # Exibir tabela
-            if not df_filtrado.empty:
+            if not df_pagina.empty:
                 st.dataframe(
-                    df_filtrado[['nome', 'telefone', 'data_cadastro']],
+                    df_pagina[['nome', 'telefone', 'data_cadastro']],
                     column_config={
                         "nome": "Nome do Cliente",
                         "telefone": "Telefone",
                         "data_cadastro": "Data Cadastro"
                     },
-                    use_container_width=True
+                    use_container_width=True,
+                    hide_index=True
                 )
+                navegacao_paginas("pagina_clientes", cursores, proximo, total_filtrado, tamanho_pagina)
                 
-                st.info(f"📊 Total de clientes: {len(df_filtrado)}")
+                st.info(f"📊 Total de clientes: {total_filtrado}")
             else:
                 st.info("Nenhum cliente encontrado com o filtro aplicado.")
         else:
@@ -520,74 +504,142 @@ elif opcao == "👥 Clientes":
 elif opcao == "🛒 Vendas":
     st.header("🛒 Registrar Vendas")
     
-    produtos_df = carregar_produtos()
-    clientes_df = carregar_clientes()
+    total_produtos = loja.contar_produtos()
+    total_clientes = loja.contar_clientes()
     
-    if produtos_df.empty:
+    if total_produtos == 0:
         st.warning("⚠️ Você precisa cadastrar produtos antes de registrar vendas!")
         st.info("Vá para 'Gerenciar Produtos' → 'Cadastrar Produto'")
-    elif clientes_df.empty:
+    elif total_clientes == 0:
         st.warning("⚠️ Você precisa cadastrar clientes antes de registrar vendas!")
         st.info("Vá para 'Gerenciar Clientes' → 'Cadastrar Cliente'")
     else:
-        # Filtrar apenas produtos com estoque > 0
-        produtos_disponiveis = produtos_df[produtos_df['estoque'] > 0]
+        # Contar apenas produtos com estoque > 0
+        total_disponiveis = loja.contar_produtos(disponiveis=True)
         
-        if produtos_disponiveis.empty:
+        if total_disponiveis == 0:
             st.error("❌ Não há produtos com estoque disponível!")
         else:
+            # Carrinho da sessão: itens acumulados até a finalização da venda
+            if 'carrinho' not in st.session_state:
+                st.session_state.carrinho = []
+            carrinho = st.session_state.carrinho
+            
+            # Quantidade de cada produto já reservada no carrinho
+            no_carrinho = {}
+            for item in carrinho:
+                no_carrinho[item['produto_id']] = no_carrinho.get(item['produto_id'], 0) + item['quantidade']
+            
+            st.subheader("Adicionar ao Carrinho")
+            
+            # Busca por prefixo (sem acentos); em catálogos grandes ela é obrigatória
+            busca_produto = st.text_input("🔎 Buscar produto", placeholder="Ex: agua, cerv lata")
+            produtos_opcoes = loja.opcoes_produtos(busca_produto)
+            
+            if not produtos_opcoes:
+                if busca_produto.strip():
+                    st.info("Nenhum produto disponível encontrado para a busca.")
+                else:
+                    st.info(f"🔎 {total_disponiveis} produtos disponíveis: digite parte do nome para escolher.")
+            
             with st.form("form_venda"):
-                st.subheader("Nova Venda")
-                
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    # Selectbox com clientes
-                    opcoes_clientes = [f"{row['nome']}" + (f" - {row['telefone']}" if row['telefone'] else "") 
-                                     for _, row in clientes_df.iterrows()]
-                    cliente_selecionado = st.selectbox("Selecionar Cliente *", opcoes_clientes)
-                    
-                    # Encontrar o cliente selecionado
-                    nome_cliente = cliente_selecionado.split(" - ")[0]
-                    cliente = clientes_df[clientes_df['nome'] == nome_cliente].iloc[0]
+                    # Selectbox com os ids dos produtos; o rótulo vem do índice id -> registro
+                    produto_id = st.selectbox(
+                        "Selecionar Produto *",
+                        list(produtos_opcoes),
+                        format_func=lambda id_: rotulo_produto(produtos_opcoes[id_]),
+                    )
+                    produto = produtos_opcoes.get(produto_id)
                 
                 with col2:
-                    # Selectbox com produtos disponíveis
-                    opcoes_produtos = [f"{row['nome']} (Estoque: {row['estoque']}) - R$ {row['preco']:.2f}" 
-                                     for _, row in produtos_disponiveis.iterrows()]
-                    produto_selecionado = st.selectbox("Selecionar Produto *", opcoes_produtos)
-                    
-                    # Encontrar o produto selecionado
-                    nome_produto = produto_selecionado.split(" (Estoque:")[0]
-                    produto = produtos_disponiveis[produtos_disponiveis['nome'] == nome_produto].iloc[0]
+                    quantidade = st.number_input("Quantidade *", min_value=1, step=1)
                 
-                # Quantidade
-                max_quantidade = int(produto['estoque'])
-                quantidade = st.number_input(
-                    f"Quantidade * (Máximo: {max_quantidade})", 
-                    min_value=1, 
-                    max_value=max_quantidade, 
-                    step=1
+                adicionar = st.form_submit_button("➕ Adicionar ao Carrinho")
+                
+                if adicionar and produto is not None:
+                    disponivel = int(produto['estoque']) - no_carrinho.get(produto_id, 0)
+                    if quantidade > disponivel:
+                        st.error(f"❌ Estoque insuficiente! Disponível para '{produto['nome']}': {disponivel} unidades.")
+                    else:
+                        carrinho.append({
+                            'produto_id': produto_id,
+                            'nome_produto': produto['nome'],
+                            'quantidade': int(quantidade),
+                            'valor_unitario': float(produto['preco']),
+                        })
+            
+            st.subheader("🛒 Carrinho")
+            
+            if not carrinho:
+                st.info("O carrinho está vazio. Adicione produtos acima.")
+            else:
+                carrinho_df = pd.DataFrame(carrinho)
+                carrinho_df['valor_total'] = carrinho_df['quantidade'] * carrinho_df['valor_unitario']
+                st.dataframe(
+                    carrinho_df[['nome_produto', 'quantidade', 'valor_unitario', 'valor_total']],
+                    column_config={
+                        "nome_produto": "Produto",
+                        "quantidade": "Qtd",
+                        "valor_unitario": st.column_config.NumberColumn("Valor Unit.", format="R$ %.2f"),
+                        "valor_total": st.column_config.NumberColumn("Valor Total", format="R$ %.2f")
+                    },
+                    use_container_width=True
+                )
+                valor_total = carrinho_df['valor_total'].sum()
+                
+                # Busca de cliente por nome ou telefone
+                busca_cliente = st.text_input("🔎 Buscar cliente", placeholder="Nome ou telefone")
+                clientes_opcoes = loja.opcoes_clientes(busca_cliente)
+                
+                if not clientes_opcoes:
+                    if busca_cliente.strip():
+                        st.info("Nenhum cliente encontrado para a busca.")
+                    else:
+                        st.info(f"🔎 {total_clientes} clientes cadastrados: digite nome ou telefone para escolher.")
+                
+                # Selectbox com os ids dos clientes (nomes repetidos não se confundem)
+                cliente_id = st.selectbox(
+                    "Selecionar Cliente *",
+                    list(clientes_opcoes),
+                    format_func=lambda id_: rotulo_cliente(clientes_opcoes[id_]),
                 )
+                cliente = clientes_opcoes.get(cliente_id)
                 
                 # Mostrar resumo da venda
-                valor_total = quantidade * produto['preco']
                 st.info(f"💰 **Resumo da Venda:**\n"
-                       f"Cliente: {cliente['nome']}\n"
-                       f"Produto: {produto['nome']}\n"
-                       f"Quantidade: {quantidade}\n"
-                       f"Valor Unitário: R$ {produto['preco']:.2f}\n"
+                       f"Cliente: {cliente['nome'] if cliente else '—'}\n"
+                       f"Itens: {int(carrinho_df['quantidade'].sum())}\n"
                        f"**Valor Total: R$ {valor_total:.2f}**")
                 
-                submitted = st.form_submit_button("✅ Confirmar Venda", type="primary")
+                col1, col2 = st.columns(2)
+                with col1:
+                    finalizar = st.button("✅ Finalizar Venda", type="primary", disabled=cliente is None)
+                with col2:
+                    limpar = st.button("🗑️ Limpar Carrinho")
                 
-                if submitted:
-                    registrar_venda(produto['id'], cliente['id'], produto['nome'], cliente['nome'], quantidade, produto['preco'])
-                    st.success(f"✅ Venda registrada com sucesso!\n"
-                             f"Cliente: {cliente['nome']}\n"
-                             f"Total: R$ {valor_total:.2f}")
-                    st.balloons()
+                if limpar:
+                    st.session_state.carrinho = []
                     st.rerun()
+                
+                if finalizar:
+                    itens = [(item['produto_id'], item['nome_produto'], item['quantidade'], item['valor_unitario'])
+                             for item in carrinho]
+                    try:
+                        loja.registrar_pedido(cliente_id, cliente['nome'], itens)
+                    except vendas.EstoqueInsuficiente as erro:
+                        nome_falta = next(item['nome_produto'] for item in carrinho if item['produto_id'] == erro.produto_id)
+                        st.error(f"❌ Estoque insuficiente para '{nome_falta}': "
+                                 f"restam apenas {erro.disponivel} unidades. A venda não foi registrada.")
+                    else:
+                        st.session_state.carrinho = []
+                        st.success(f"✅ Venda registrada com sucesso!\n"
+                                 f"Cliente: {cliente['nome']}\n"
+                                 f"Total: R$ {valor_total:.2f}")
+                        st.balloons()
+                        st.rerun()
 
 # ========================================
 # DASHBOARD & RELATÓRIOS
@@ -595,134 +647,109 @@ elif opcao == "🛒 Vendas":
 elif opcao == "📊 Relatórios":
     st.header("📊 Dashboard & Relatórios")
     
-    vendas_df = carregar_vendas()
-    produtos_df = carregar_produtos()
+    periodo = loja.intervalo_datas()
     
-    if vendas_df.empty:
+    if periodo is None:
         st.warning("⚠️ Nenhuma venda registrada ainda!")
         st.info("Registre algumas vendas para ver os relatórios aqui.")
     else:
         # Filtros por período
         st.sidebar.markdown("### 📅 Filtros de Período")
-        vendas_df['data_venda'] = pd.to_datetime(vendas_df['data_venda'])
-        
-        data_inicio = st.sidebar.date_input("Data Início", vendas_df['data_venda'].min().date())
-        data_fim = st.sidebar.date_input("Data Fim", vendas_df['data_venda'].max().date())
+        data_inicio = st.sidebar.date_input("Data Início", periodo[0])
+        data_fim = st.sidebar.date_input("Data Fim", periodo[1])
         
-        # Filtrar dados por período
-        mask = (vendas_df['data_venda'].dt.date >= data_inicio) & (vendas_df['data_venda'].dt.date <= data_fim)
-        vendas_filtradas = vendas_df.loc[mask]
+        # Filtro e agregações são feitos direto no banco
+        vendas_por_dia = loja.vendas_por_dia(data_inicio, data_fim)
+        resumo = relatorios.metricas(vendas_por_dia)
         
-        if vendas_filtradas.empty:
+        if resumo['vendas'] == 0:
             st.warning("Nenhuma venda encontrada no período selecionado.")
         else:
             # Métricas principais
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Vendas no Período", len(vendas_filtradas))
+                st.metric("Vendas no Período", resumo['vendas'])
             with col2:
-                st.metric("Faturamento", f"R$ {vendas_filtradas['valor_total'].sum():.2f}")
+                st.metric("Faturamento", f"R$ {resumo['faturamento']:.2f}")
             with col3:
-                st.metric("Ticket Médio", f"R$ {vendas_filtradas['valor_total'].mean():.2f}")
+                st.metric("Ticket Médio", f"R$ {resumo['ticket_medio']:.2f}")
             with col4:
-                st.metric("Itens Vendidos", vendas_filtradas['quantidade'].sum())
+                st.metric("Itens Vendidos", resumo['itens'])
             
             st.markdown("---")
             
-            # Gráficos
-            tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Vendas por Dia", "🏆 Top Produtos", "👥 Top Clientes", "💰 Faturamento", "📊 Por Categoria"])
+            # Gráficos: só a aba aberta é montada (as outras ficam vazias até
+            # serem escolhidas) e o JSON de cada figura vem do cache da loja
+            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+                ["📈 Vendas por Dia", "🏆 Top Produtos", "👥 Top Clientes", "💰 Faturamento", "📊 Por Categoria",
+                 "🔮 Previsões"],
+                key="aba_relatorios", on_change="rerun"
+            )
             
-            with tab1:
-                st.subheader("Vendas por Dia")
-                vendas_por_dia = vendas_filtradas.groupby(vendas_filtradas['data_venda'].dt.date).agg({
-                    'valor_total': 'sum',
-                    'quantidade': 'sum'
-                }).reset_index()
-                
-                fig = px.line(vendas_por_dia, x='data_venda', y='valor_total', 
-                            title='Faturamento Diário',
-                            labels={'data_venda': 'Data', 'valor_total': 'Faturamento (R$)'})
-                fig.update_traces(line_color='#1f77b4', line_width=3)
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with tab2:
-                st.subheader("Top 10 Produtos Mais Vendidos")
-                top_produtos = vendas_filtradas.groupby('nome_produto').agg({
-                    'quantidade': 'sum',
-                    'valor_total': 'sum'
-                }).reset_index().sort_values('quantidade', ascending=False).head(10)
-                
-                fig = px.bar(top_produtos, x='quantidade', y='nome_produto', 
-                           title='Produtos Mais Vendidos (Quantidade)',
-                           labels={'quantidade': 'Quantidade Vendida', 'nome_produto': 'Produto'},
-                           orientation='h')
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with tab3:
-                st.subheader("Top 10 Melhores Clientes")
-                top_clientes = vendas_filtradas.groupby('nome_cliente').agg({
-                    'valor_total': 'sum',
-                    'quantidade': 'sum'
-                }).reset_index().sort_values('valor_total', ascending=False).head(10)
-                
-                fig = px.bar(top_clientes, x='valor_total', y='nome_cliente', 
-                           title='Clientes que Mais Gastam (Faturamento)',
-                           labels={'valor_total': 'Total Gasto (R$)', 'nome_cliente': 'Cliente'},
-                           orientation='h')
-                fig.update_traces(marker_color='green')
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Tabela com informações detalhadas dos clientes
-                if not top_clientes.empty:
-                    st.markdown("#### 📋 Detalhes dos Top Clientes")
-                    top_clientes['ticket_medio'] = top_clientes['valor_total'] / top_clientes['quantidade']
-                    st.dataframe(
-                        top_clientes,
-                        column_config={
-                            "nome_cliente": "Cliente",
-                            "quantidade": "Itens Comprados",
-                            "valor_total": st.column_config.NumberColumn("Total Gasto", format="R$ %.2f"),
-                            "ticket_medio": st.column_config.NumberColumn("Ticket Médio", format="R$ %.2f")
-                        },
-                        use_container_width=True
-                    )
+            def mostrar_grafico(aba):
+                st.plotly_chart(json.loads(loja.grafico(aba, data_inicio, data_fim)), use_container_width=True)
             
-            with tab5:
-                st.subheader("Análise de Faturamento")
-                top_faturamento = vendas_filtradas.groupby('nome_produto')['valor_total'].sum().reset_index().sort_values('valor_total', ascending=False).head(10)
-                
-                fig = px.pie(top_faturamento, values='valor_total', names='nome_produto',
-                           title='Distribuição do Faturamento por Produto')
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with tab4:
-                st.subheader("Vendas por Categoria")
-                # Merge com produtos para obter categoria
-                vendas_com_categoria = vendas_filtradas.merge(produtos_df[['id', 'categoria']], 
-                                                            left_on='produto_id', right_on='id', how='left')
-                
-                vendas_categoria = vendas_com_categoria.groupby('categoria').agg({
-                    'valor_total': 'sum',
-                    'quantidade': 'sum'
-                }).reset_index()
-                
-                fig = px.bar(vendas_categoria, x='categoria', y='valor_total',
-                           title='Faturamento por Categoria',
-                           labels={'categoria': 'Categoria', 'valor_total': 'Faturamento (R$)'})
-                st.plotly_chart(fig, use_container_width=True)
+            if tab1.open:
+                with tab1:
+                    st.subheader("Vendas por Dia")
+                    mostrar_grafico("vendas_por_dia")
+            
+            if tab2.open:
+                with tab2:
+                    st.subheader("Top 10 Produtos Mais Vendidos")
+                    mostrar_grafico("top_produtos")
+            
+            if tab3.open:
+                with tab3:
+                    st.subheader("Top 10 Melhores Clientes")
+                    mostrar_grafico("top_clientes")
+                    
+                    # Tabela com informações detalhadas dos clientes
+                    top_clientes = loja.top_clientes(data_inicio, data_fim)
+                    if not top_clientes.empty:
+                        st.markdown("#### 📋 Detalhes dos Top Clientes")
+                        top_clientes['ticket_medio'] = top_clientes['valor_total'] / top_clientes['quantidade']
+                        st.dataframe(
+                            top_clientes,
+                            column_config={
+                                "nome_cliente": "Cliente",
+                                "quantidade": "Itens Comprados",
+                                "valor_total": st.column_config.NumberColumn("Total Gasto", format="R$ %.2f"),
+                                "ticket_medio": st.column_config.NumberColumn("Ticket Médio", format="R$ %.2f")
+                            },
+                            use_container_width=True
+                        )
+            
+            if tab4.open:
+                with tab4:
+                    st.subheader("Análise de Faturamento")
+                    mostrar_grafico("faturamento")
+            
+            if tab5.open:
+                with tab5:
+                    st.subheader("Vendas por Categoria")
+                    mostrar_grafico("por_categoria")
+            
+            if tab6.open:
+                with tab6:
+                    st.subheader("Previsão de Demanda")
+                    mostrar_previsoes()
             
             # Tabela de vendas detalhadas
             st.markdown("---")
             st.subheader("📋 Histórico Detalhado de Vendas")
             
-            vendas_display = vendas_filtradas[['data_venda', 'hora_venda', 'nome_cliente', 'nome_produto', 'quantidade', 'valor_unitario', 'valor_total']].copy()
-            vendas_display['data_venda'] = vendas_display['data_venda'].dt.strftime('%d/%m/%Y')
+            # Na tela só as vendas mais recentes; o período completo sai pela exportação
+            vendas_display = loja.historico(data_inicio, data_fim, mais_recentes=LIMITE_HISTORICO)
+            if resumo['vendas'] > LIMITE_HISTORICO:
+                st.caption(f"Mostrando as {LIMITE_HISTORICO} vendas mais recentes de {resumo['vendas']}. "
+                           "Use a exportação abaixo para baixar o período completo.")
             
             st.dataframe(
                 vendas_display,
                 column_config={
-                    "data_venda": "Data",
+                    "data_venda": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
                     "hora_venda": "Hora",
                     "nome_cliente": "Cliente",
                     "nome_produto": "Produto",
@@ -732,6 +759,171 @@ elif opcao == "📊 Relatórios":
                 },
                 use_container_width=True
             )
+            
+            # Exportação
+            st.markdown("---")
+            st.subheader("📤 Exportar")
+            
+            conjuntos = {
+                "Histórico detalhado": "historico",
+                "Vendas por dia": "vendas_por_dia",
+                "Vendas por produto": "vendas_por_produto",
+                "Top produtos": "top_produtos",
+                "Faturamento por produto": "faturamento_por_produto",
+                "Top clientes": "top_clientes",
+                "Por categoria": "por_categoria",
+            }
+            col1, col2 = st.columns(2)
+            with col1:
+                conjunto = conjuntos[st.selectbox("Dados", list(conjuntos))]
+            with col2:
+                formato = st.selectbox("Formato", list(exportacao.FORMATOS))
+            
+            chave_exportacao = (conjunto, formato, data_inicio, data_fim)
+            if st.button("📤 Gerar arquivo"):
+                # O arquivo é montado em disco, bloco a bloco; a sessão guarda só o caminho
+                apagar_exportacao()
+                arquivo = novo_arquivo_exportacao(formato)
+                try:
+                    with st.spinner("Gerando arquivo..."), arquivo:
+                        linhas = loja.exportar(conjunto, data_inicio, data_fim, formato, arquivo)
+                except ValueError as erro:
+                    os.remove(arquivo.name)
+                    st.error(f"❌ {erro}")
+                else:
+                    st.session_state.exportacao = (chave_exportacao, linhas, arquivo.name)
+            
+            gerado = st.session_state.get('exportacao')
+            if gerado and gerado[0] == chave_exportacao and os.path.exists(gerado[2]):
+                _, linhas, caminho = gerado
+                st.download_button(
+                    f"⬇️ Baixar {linhas} linhas ({os.path.getsize(caminho) / 1024:.0f} KB)",
+                    data=functools.partial(ler_exportacao, caminho),
+                    file_name=f"{conjunto}_{data_inicio:%Y%m%d}_{data_fim:%Y%m%d}.{formato}",
+                    mime=exportacao.FORMATOS[formato],
+                )
+
+# ========================================
+# IMPORTAÇÃO EM MASSA
+# ========================================
+elif opcao == "📥 Importar":
+    st.header("📥 Importar Dados")
+    
+    tipos_importacao = {
+        "Produtos": ("produtos", "nome, categoria, preco, estoque"),
+        "Clientes": ("clientes", "nome, telefone (opcional)"),
+        "Vendas históricas": ("vendas", "data, hora (opcional), produto ou produto_id, "
+                                        "cliente ou cliente_id, quantidade, valor_unitario"),
+    }
+    tipo_rotulo = st.selectbox("O que deseja importar?", list(tipos_importacao))
+    tipo, colunas_esperadas = tipos_importacao[tipo_rotulo]
+    st.caption(f"Colunas esperadas na primeira linha: {colunas_esperadas}. "
+               "Vendas históricas não alteram o estoque atual.")
+    
+    arquivo = st.file_uploader("Arquivo CSV ou Excel (.xlsx)", type=["csv", "xlsx"])
+    
+    if arquivo is not None and st.button("📥 Importar", type="primary"):
+        formato = "xlsx" if arquivo.name.lower().endswith(".xlsx") else "csv"
+        andamento = st.empty()
+        
+        def mostrar_progresso(lidas, importadas, rejeitadas):
+            andamento.info(f"⏳ {lidas} linhas lidas • {importadas} importadas • {rejeitadas} rejeitadas")
+        
+        resultado = loja.importar_arquivo(tipo, arquivo, formato, progresso=mostrar_progresso)
+        andamento.empty()
+        
+        velocidade = resultado['lidas'] / max(resultado['segundos'], 1e-9)
+        st.success(f"✅ {resultado['importadas']} de {resultado['lidas']} linhas importadas "
+                   f"em {resultado['segundos']:.1f}s ({velocidade:.0f} linhas/s)")
+        
+        if resultado['rejeitadas']:
+            st.warning(f"⚠️ {resultado['rejeitadas']} linhas rejeitadas")
+            rejeitadas_df = pd.DataFrame(resultado['erros'], columns=['linha', 'motivo'])
+            st.dataframe(rejeitadas_df, column_config={"linha": "Linha", "motivo": "Motivo"},
+                         use_container_width=True, hide_index=True)
+            st.download_button("⬇️ Baixar linhas rejeitadas", rejeitadas_df.to_csv(index=False).encode("utf-8"),
+                               file_name=f"rejeitadas_{tipo}.csv", mime="text/csv")
+
+instrumentacao.encerrar_etapa(etapa_pagina)
+
+# Estatísticas do pool de conexões
+with st.sidebar.expander("🔌 Conexões com o banco"):
+    stats_pool = loja.pool.estatisticas()
+    st.write(f"Abertas: {stats_pool['abertas']}")
+    st.write(f"Reutilizadas: {stats_pool['reutilizadas']}")
+    st.write(f"Em uso: {stats_pool['em_uso']} | Ociosas: {stats_pool['ociosas']}")
+
+# Estatísticas do cache de consultas
+with st.sidebar.expander("🗄️ Cache de consultas"):
+    stats_cache = loja.cache.estatisticas()
+    st.write(f"Itens em cache: {stats_cache['itens']}")
+    st.write(f"Acertos: {stats_cache['acertos']} | Falhas: {stats_cache['falhas']} "
+             f"({stats_cache['taxa_acerto']:.0%} de acerto)")
+    st.write(f"Invalidações por escrita: {stats_cache['invalidacoes']}")
+    st.write(f"Expirados: {stats_cache['expiracoes']} | Removidos (LRU): {stats_cache['remocoes']}")
+    if st.button("🧹 Limpar cache"):
+        loja.cache.limpar()
+
+# Tarefas de manutenção (loja/agendador.py): última execução de cada uma
+with st.sidebar.expander("🗓️ Tarefas agendadas"):
+    for tarefa in loja.situacao_tarefas():
+        ultima = tarefa['ultima']
+        if tarefa['em_andamento']:
+            estado = "⏳ rodando"
+        elif ultima is None:
+            estado = "nunca rodou"
+        else:
+            estado = (f"{'✅' if ultima['status'] == agendador.CONCLUIDA else '❌'} "
+                      f"{datetime.fromisoformat(ultima['iniciada_em']):%d/%m %H:%M}")
+        st.write(f"**{tarefa['tarefa']}**: {estado}")
+        if ultima and ultima['status'] == agendador.ERRO:
+            st.caption(ultima['detalhe'])
+    tarefa_agora = st.selectbox("Rodar agora:", list(agendador.TAREFAS), key="tarefa_agora")
+    if st.button("▶️ Rodar", key="rodar_tarefa"):
+        if not loja.executar_tarefa(tarefa_agora):
+            st.warning("Essa tarefa já está rodando.")
+
+# Painel de depuração: onde foi o tempo desta execução
+execucao.encerrar()
+st.sidebar.toggle("🐞 Depuração", key="depuracao",
+                  help="Mostra tempo, SQL e memória de cada execução (deixa o app um pouco mais lento)")
+if depuracao:
+    resumo_execucao = execucao.resumo()
+    with st.sidebar.expander("🐞 Medições desta execução", expanded=True):
+        st.write(f"Tempo total: {resumo_execucao['segundos'] * 1000:.0f} ms")
+        st.write(f"Pico de memória (Python): {resumo_execucao['memoria_pico'] / 1024 / 1024:.1f} MB")
+        st.write(f"Comandos SQL: {resumo_execucao['comandos_sql']} | "
+                 f"Linhas escritas: {resumo_execucao['linhas_escritas']}")
+        
+        # O que a página gastou fora das funções da loja é montagem da tela:
+        # pandas, Plotly e os elementos do Streamlit
+        pagina = next((etapa for etapa in resumo_execucao['etapas'] if etapa['nome'] == f"página {opcao}"), None)
+        if pagina is not None:
+            dados_ms = sum(etapa['segundos'] for etapa in resumo_execucao['etapas'] if etapa['nivel'] == 1) * 1000
+            st.write(f"Página: {pagina['segundos'] * 1000:.0f} ms, sendo {dados_ms:.0f} ms em dados "
+                     f"e {pagina['segundos'] * 1000 - dados_ms:.0f} ms montando a tela")
+        
+        st.dataframe(
+            pd.DataFrame([{
+                "etapa": "· " * etapa['nivel'] + etapa['nome'],
+                "ms": etapa['segundos'] * 1000,
+                "sql": etapa['comandos_sql'],
+                "devolvidas": etapa['linhas_devolvidas'],
+                "escritas": etapa['linhas_escritas'],
+            } for etapa in resumo_execucao['etapas']]),
+            column_config={"ms": st.column_config.NumberColumn("ms", format="%.1f")},
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        st.button("⏱️ Rodar de novo com perfil", key="perfilar",
+                  help="Executa a página mais uma vez sob o cProfile e mostra o resultado")
+        st.download_button("⬇️ Métricas do processo (Prometheus)", instrumentacao.texto_prometheus(),
+                           file_name="metricas_loja.prom", mime="text/plain")
+    
+    if execucao.perfil:
+        with st.expander("⏱️ Perfil da execução (cProfile, por tempo acumulado)", expanded=True):
+            st.code(execucao.perfil, language=None)
 
 # Rodapé
 st.markdown("---")
@@ -0,0 +1,195 @@
+# Teste de carga da API dos caixas (loja.api).
+#
+# Cada thread simula um caixa em loop: busca um produto, busca o cliente e
+# registra um pedido de 1 a 3 itens; de vez em quando alguém abre o resumo
+# do dia. Mede a latência de cada rota (p50/p95/p99) e as vendas por segundo.
+#
+# Sem --url, sobe uma instância local sobre um banco sintético gerado com
+# benchmarks.dados (estoque inflado para a carga não esgotar os produtos).
+#
+# Uso:
+#   python -m benchmarks.carga_api --caixas 8 --duracao 20
+#   python -m benchmarks.carga_api --url http://127.0.0.1:8000 --caixas 16 --saida carga.json
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from benchmarks import dados
+from loja.conexao import PoolConexoes
+
+BUSCAS_PRODUTOS = ["cerv", "refr", "agua", "suco", "ener", "vinh", "dest", "serra", "tropical", "imperial"]
+BUSCAS_CLIENTES = ["ana", "joao", "maria", "jose", "carlos", "lucia", "pedro", "silva", "souza", "costa"]
+# Fração das iterações que também consulta o resumo do dia
+FRACAO_RELATORIO = 0.05
+
+
+class Cliente:
+    # Conexão HTTP/1.1 persistente de um caixa
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=30)
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        cabecalhos = {"Content-Type": "application/json"} if corpo is not None else {}
+        inicio = time.perf_counter()
+        self.conexao.request(metodo, caminho, body=json.dumps(corpo) if corpo is not None else None,
+                             headers=cabecalhos)
+        resposta = self.conexao.getresponse()
+        conteudo = resposta.read()
+        return resposta.status, json.loads(conteudo) if conteudo else None, time.perf_counter() - inicio
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _subir_local(pasta, vendas, semente):
+    caminho = os.path.join(pasta, "carga.db")
+    pool = PoolConexoes(caminho)
+    dados.gerar(pool, vendas, semente)
+    with pool.conexao() as conn:
+        conn.execute("UPDATE produtos SET estoque = 1000000")
+    pool.fechar()
+
+    porta = _porta_livre()
+    processo = subprocess.Popen([sys.executable, "-m", "loja.api", "--porta", str(porta), "--db", caminho])
+    url = f"http://127.0.0.1:{porta}"
+    for _ in range(100):
+        try:
+            if Cliente(url).requisitar("GET", "/saude")[0] == 200:
+                return processo, url
+        except OSError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("A API local não respondeu")
+
+
+def _catalogo(url):
+    cliente = Cliente(url)
+    produtos, clientes = set(), set()
+    for texto in BUSCAS_PRODUTOS:
+        _, corpo, _ = cliente.requisitar("GET", f"/produtos?busca={quote(texto)}&limite=50")
+        produtos.update(produto["id"] for produto in corpo["produtos"])
+    for texto in BUSCAS_CLIENTES:
+        _, corpo, _ = cliente.requisitar("GET", f"/clientes?busca={quote(texto)}&limite=50")
+        clientes.update(item["id"] for item in corpo["clientes"])
+    if not produtos or not clientes:
+        raise RuntimeError("Nenhum produto ou cliente encontrado pelas buscas do teste")
+    return sorted(produtos), sorted(clientes)
+
+
+def _caixa(url, produtos, clientes, fim, semente, latencias, contagem):
+    aleatorio = random.Random(semente)
+    cliente = Cliente(url)
+    locais = {}
+
+    def medir(rota, metodo, caminho, corpo=None):
+        status, resposta, segundos = cliente.requisitar(metodo, caminho, corpo)
+        locais.setdefault(rota, []).append(segundos)
+        return status
+
+    vendas = recusadas = erros = 0
+    while time.perf_counter() < fim:
+        medir("GET /produtos", "GET", f"/produtos?busca={quote(aleatorio.choice(BUSCAS_PRODUTOS))}")
+        medir("GET /clientes", "GET", f"/clientes?busca={quote(aleatorio.choice(BUSCAS_CLIENTES))}")
+        itens = [{"produto_id": produto_id, "quantidade": aleatorio.randint(1, 3)}
+                 for produto_id in aleatorio.sample(produtos, aleatorio.randint(1, min(3, len(produtos))))]
+        status = medir("POST /pedidos", "POST", "/pedidos", {"cliente_id": aleatorio.choice(clientes), "itens": itens})
+        if status == 201:
+            vendas += 1
+        elif status == 409:
+            recusadas += 1
+        else:
+            erros += 1
+        if aleatorio.random() < FRACAO_RELATORIO:
+            medir("GET /relatorios/resumo", "GET", "/relatorios/resumo")
+
+    with contagem["lock"]:
+        for rota, tempos in locais.items():
+            latencias.setdefault(rota, []).extend(tempos)
+        contagem["vendas"] += vendas
+        contagem["recusadas"] += recusadas
+        contagem["erros"] += erros
+
+
+def _percentil(valores, p):
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1] if len(valores) > 1 else valores[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API dos caixas")
+    parser.add_argument("--url", help="API já em execução; sem isso sobe uma local")
+    parser.add_argument("--caixas", type=int, default=8, help="caixas simultâneos (threads)")
+    parser.add_argument("--duracao", type=float, default=20, help="segundos de carga")
+    parser.add_argument("--vendas", type=int, default=100_000, help="tamanho do banco local gerado")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        processo = None
+        url = args.url
+        if url is None:
+            print("Gerando banco e subindo a API local...", file=sys.stderr)
+            processo, url = _subir_local(pasta, args.vendas, args.semente)
+        try:
+            produtos, clientes = _catalogo(url)
+            latencias = {}
+            contagem = {"vendas": 0, "recusadas": 0, "erros": 0, "lock": threading.Lock()}
+            inicio = time.perf_counter()
+            fim = inicio + args.duracao
+            threads = [threading.Thread(target=_caixa, args=(url, produtos, clientes, fim, args.semente + i,
+                                                             latencias, contagem))
+                       for i in range(args.caixas)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            decorrido = time.perf_counter() - inicio
+        finally:
+            if processo is not None:
+                processo.terminate()
+                processo.wait()
+
+    resultado = {
+        "caixas": args.caixas,
+        "segundos": round(decorrido, 2),
+        "vendas": contagem["vendas"],
+        "vendas_por_segundo": round(contagem["vendas"] / decorrido, 1),
+        "recusadas_estoque": contagem["recusadas"],
+        "erros": contagem["erros"],
+        "rotas": {},
+    }
+    print(f"{args.caixas} caixas por {decorrido:.1f}s: {contagem['vendas']} vendas "
+          f"({resultado['vendas_por_segundo']} vendas/s), {contagem['recusadas']} recusadas, {contagem['erros']} erros")
+    for rota, tempos in sorted(latencias.items()):
+        medidas = {
+            "requisicoes": len(tempos),
+            "p50_ms": round(_percentil(tempos, 50) * 1000, 2),
+            "p95_ms": round(_percentil(tempos, 95) * 1000, 2),
+            "p99_ms": round(_percentil(tempos, 99) * 1000, 2),
+            "max_ms": round(max(tempos) * 1000, 2),
+        }
+        resultado["rotas"][rota] = medidas
+        print(f"  {rota:25} {medidas['requisicoes']:>7} req  p50 {medidas['p50_ms']:7.2f} ms  "
+              f"p95 {medidas['p95_ms']:7.2f} ms  p99 {medidas['p99_ms']:7.2f} ms  max {medidas['max_ms']:7.2f} ms")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Memória e tempo para carregar a tabela de vendas: SELECT * com os tipos
+# padrão do pandas (como os antigos carregar_*) contra loja.carregamento.
+#
+# Cada variante roda num processo novo, para o pico de memória (RSS) de uma
+# não contaminar o da outra. Mede o tempo de carga, a memória do DataFrame
+# (memory_usage(deep=True)) e o pico de RSS do processo, que inclui o pandas
+# importado (~100 MB) e as páginas do banco lidas pelo mmap (até 256 MB,
+# ver conexao.PRAGMAS).
+#
+# Uso:
+#   python -m benchmarks.carregamento --vendas 5000000
+#   python -m benchmarks.carregamento --db bench.db   # banco já gerado
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.relatorios import popular
+from loja import carregamento
+from loja.conexao import PoolConexoes
+
+COLUNAS_RELATORIO = ["produto_id", "cliente_id", "quantidade", "valor_total", "data_hora"]
+
+
+# Piso: só percorre o cursor (pandas importado, páginas do banco no mmap)
+def _percorrer(pool):
+    linhas = 0
+    with pool.conexao() as conn:
+        for _ in conn.execute("SELECT * FROM vendas"):
+            linhas += 1
+    return pd.DataFrame({"linhas": [linhas]})
+
+
+def _select_todas(pool):
+    with pool.conexao() as conn:
+        df = pd.read_sql_query("SELECT * FROM vendas", conn)
+    # Os relatórios convertiam a data a cada uso
+    pd.to_datetime(df["data_venda"])
+    return df
+
+
+def _blocos(pool):
+    total = 0.0
+    maior = None
+    for bloco in carregamento.carregar_vendas(pool, tamanho_bloco=100_000):
+        total += bloco["valor_total"].sum()
+        maior = bloco
+    return maior
+
+
+VARIANTES = {
+    "piso (só o cursor)": _percorrer,
+    "select * (pandas)": _select_todas,
+    "compacto": lambda pool: carregamento.carregar_vendas(pool),
+    "compacto arrow": lambda pool: carregamento.carregar_vendas(pool, arrow=True),
+    "projeção 5 colunas": lambda pool: carregamento.carregar_vendas(pool, COLUNAS_RELATORIO),
+    "blocos de 100 mil": _blocos,
+}
+
+
+def _pico_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Executa uma variante neste processo e imprime o resultado em JSON
+def medir(banco, variante):
+    pool = PoolConexoes(banco)
+    inicio = time.perf_counter()
+    df = VARIANTES[variante](pool)
+    segundos = time.perf_counter() - inicio
+    print(json.dumps({
+        "segundos": segundos,
+        "linhas": len(df),
+        "memoria_df": int(df.memory_usage(deep=True).sum()),
+        "pico_rss": _pico_rss(),
+        "tipos": {coluna: str(tipo) for coluna, tipo in df.dtypes.items()},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória da carga da tabela de vendas")
+    parser.add_argument("--vendas", type=int, default=5_000_000)
+    parser.add_argument("--db", help="banco já populado (senão gera um temporário)")
+    parser.add_argument("--variante", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variante:
+        medir(args.db, args.variante)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        banco = args.db
+        if banco is None:
+            banco = os.path.join(pasta, "carga.db")
+            print(f"Gerando {args.vendas} vendas...", file=sys.stderr)
+            pool = PoolConexoes(banco)
+            popular(pool, args.vendas)
+            pool.fechar()
+
+        print(f"{'variante':20} {'segundos':>9} {'DataFrame (MB)':>15} {'pico RSS (MB)':>14}")
+        for variante in VARIANTES:
+            saida = subprocess.run([sys.executable, "-m", "benchmarks.carregamento", "--db", banco,
+                                    "--variante", variante], capture_output=True, text=True, check=True)
+            medida = json.loads(saida.stdout)
+            print(f"{variante:20} {medida['segundos']:>9.2f} {medida['memoria_df'] / 2**20:>15.1f} "
+                  f"{medida['pico_rss'] / 2**20:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Gerador de dados sintéticos com semente fixa: preenche produtos, clientes,
+# pedidos e vendas no esquema de loja.migracoes em qualquer escala.
+#
+# As distribuições imitam uma loja de bebidas: cerveja e refrigerante
+# dominam as vendas, poucos produtos concentram a maior parte do volume
+# (Zipf), o movimento cresce no fim da tarde e na sexta/sábado, e cada
+# pedido tem de 1 a 5 itens. A mesma semente gera sempre o mesmo banco.
+#
+# Uso: python -m benchmarks.dados vendas.db --vendas 1000000 --semente 42
+import argparse
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from loja.conexao import PoolConexoes
+from loja import migracoes, resumo
+
+# categoria -> (peso nas vendas, preço mínimo, preço máximo, volumes)
+CATEGORIAS = {
+    "Cervejas": (0.32, 3.5, 14.0, ["269ml", "350ml", "473ml", "600ml", "1L"]),
+    "Refrigerantes": (0.24, 3.0, 11.0, ["350ml", "600ml", "1L", "2L"]),
+    "Águas": (0.14, 1.5, 6.0, ["500ml", "1,5L", "5L"]),
+    "Sucos": (0.08, 4.0, 12.0, ["200ml", "1L"]),
+    "Energéticos": (0.07, 7.0, 16.0, ["250ml", "473ml"]),
+    "Destilados": (0.06, 25.0, 180.0, ["700ml", "1L"]),
+    "Vinhos": (0.05, 30.0, 150.0, ["750ml"]),
+    "Outros": (0.04, 2.0, 20.0, ["un"]),
+}
+MARCAS = ["Serra Azul", "Bom Gosto", "Tropical", "Imperial", "Vale Verde", "Litoral", "Aurora", "Estrela",
+          "Montanha", "Cristal", "Solar", "Pampa", "Boreal", "Ipê", "Jangada", "Araucária"]
+NOMES = ["Ana", "João", "Maria", "José", "Antônio", "Francisca", "Carlos", "Paulo", "Lúcia", "Márcia",
+         "Pedro", "Luiz", "Sebastião", "Fernanda", "Juliana", "Rafael", "Beatriz", "Gustavo", "Letícia", "André"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+              "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Araújo", "Melo", "Barbosa", "Conceição"]
+
+# Peso relativo de cada hora do dia (loja aberta das 8h às 23h)
+PESO_HORAS = [0, 0, 0, 0, 0, 0, 0, 0, 2, 3, 4, 5, 6, 5, 4, 4, 6, 9, 12, 13, 11, 8, 5, 3]
+# Peso de cada dia da semana (segunda = 0)
+PESO_DIAS_SEMANA = [0.8, 0.8, 0.9, 1.0, 1.4, 1.6, 1.1]
+# Itens por pedido
+PESO_ITENS = [0.55, 0.25, 0.11, 0.06, 0.03]
+
+TAMANHO_LOTE = 50_000
+
+
+# Número de produtos e clientes proporcional ao volume de vendas
+def escala_padrao(vendas):
+    return min(max(200, vendas // 2_000), 5_000), min(max(500, vendas // 100), 100_000)
+
+
+def _produtos(aleatorio, total, hoje):
+    nomes = list(CATEGORIAS)
+    linhas = []
+    for i in range(total):
+        categoria = nomes[i % len(nomes)]
+        _, minimo, maximo, volumes = CATEGORIAS[categoria]
+        nome = f"{categoria[:-1]} {aleatorio.choice(MARCAS)} {aleatorio.choice(volumes)} #{i + 1}"
+        linhas.append((nome, categoria, round(aleatorio.uniform(minimo, maximo), 2),
+                       aleatorio.randint(0, 300), hoje))
+    return linhas
+
+
+def _clientes(aleatorio, total, hoje):
+    return [(f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}",
+             f"(11) 9{aleatorio.randint(1000, 9999)}-{aleatorio.randint(0, 9999):04d}", hoje)
+            for _ in range(total)]
+
+
+# Pesos de sorteio dos produtos: peso da categoria dividido entre os produtos
+# dela seguindo uma Zipf (o 1º mais vendido vende ~2x o 2º, ~3x o 3º...)
+def _pesos_produtos(aleatorio, produtos):
+    por_categoria = {}
+    for produto_id, categoria, preco in produtos:
+        por_categoria.setdefault(categoria, []).append((produto_id, preco))
+    ids, precos, pesos = [], [], []
+    for categoria, itens in por_categoria.items():
+        aleatorio.shuffle(itens)
+        zipf = [1 / (posicao + 1) ** 1.1 for posicao in range(len(itens))]
+        soma = sum(zipf)
+        for (produto_id, preco), peso in zip(itens, zipf):
+            ids.append(produto_id)
+            precos.append(preco)
+            pesos.append(CATEGORIAS[categoria][0] * peso / soma)
+    return ids, precos, pesos
+
+
+# Preenche o banco do pool com `vendas` itens vendidos a partir de `inicio`,
+# espalhados por `dias` dias. Retorna um resumo do que foi gerado.
+def gerar(pool, vendas, semente=42, produtos=None, clientes=None, inicio=date(2022, 1, 1), dias=1095,
+          progresso=None):
+    aleatorio = random.Random(semente)
+    produtos_padrao, clientes_padrao = escala_padrao(vendas)
+    produtos = produtos or produtos_padrao
+    clientes = clientes or clientes_padrao
+    hoje = inicio.isoformat()
+    comeco = time.perf_counter()
+
+    with pool.conexao() as conn:
+        migracoes.aplicar_migracoes(conn)
+    with pool.transacao("IMMEDIATE") as conn:
+        conn.executemany("INSERT INTO produtos (nome, categoria, preco, estoque, data_cadastro) VALUES (?, ?, ?, ?, ?)",
+                         _produtos(aleatorio, produtos, hoje))
+        conn.executemany("INSERT INTO clientes (nome, telefone, data_cadastro) VALUES (?, ?, ?)",
+                         _clientes(aleatorio, clientes, hoje))
+        catalogo = conn.execute("SELECT id, categoria, preco FROM produtos").fetchall()
+        nomes_produtos = dict(conn.execute("SELECT id, nome FROM produtos"))
+        ids_clientes = [linha[0] for linha in conn.execute("SELECT id FROM clientes")]
+        nomes_clientes = dict(conn.execute("SELECT id, nome FROM clientes"))
+        proximo_pedido = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pedidos").fetchone()[0]
+
+    ids_produtos, precos, pesos = _pesos_produtos(aleatorio, catalogo)
+    posicoes = range(len(ids_produtos))
+    acumulado_produtos = list(accumulate(pesos))
+    datas = [inicio + timedelta(days=dia) for dia in range(dias)]
+    acumulado_datas = list(accumulate(PESO_DIAS_SEMANA[data.weekday()] for data in datas))
+    horas = range(24)
+    acumulado_horas = list(accumulate(PESO_HORAS))
+    quantidades_itens = range(1, len(PESO_ITENS) + 1)
+    acumulado_itens = list(accumulate(PESO_ITENS))
+
+    # Carga em massa: o gatilho dos resumos diários sai durante a geração e
+    # os resumos são reconstruídos de uma vez no fim (~35% mais rápido). O
+    # finally devolve o gatilho mesmo se a geração parar no meio.
+    with pool.transacao("IMMEDIATE") as conn:
+        resumo.remover_gatilho(conn)
+    geradas = 0
+    try:
+        while geradas < vendas:
+            pedidos, itens = [], []
+            while len(itens) < TAMANHO_LOTE and geradas + len(itens) < vendas:
+                restantes = vendas - geradas - len(itens)
+                n_itens = min(aleatorio.choices(quantidades_itens, cum_weights=acumulado_itens)[0], restantes)
+                dia = aleatorio.choices(datas, cum_weights=acumulado_datas)[0]
+                hora = aleatorio.choices(horas, cum_weights=acumulado_horas)[0]
+                momento = datetime(dia.year, dia.month, dia.day, hora, aleatorio.randrange(60), aleatorio.randrange(60))
+                data_hora = momento.isoformat()
+                data_venda, hora_venda = data_hora.split("T")
+                cliente_id = aleatorio.choice(ids_clientes)
+                nome_cliente = nomes_clientes[cliente_id]
+                pedido_id = proximo_pedido + len(pedidos)
+
+                valor_pedido, total_itens = 0.0, 0
+                for posicao in aleatorio.choices(posicoes, cum_weights=acumulado_produtos, k=n_itens):
+                    produto_id = ids_produtos[posicao]
+                    quantidade = aleatorio.choices(quantidades_itens, cum_weights=acumulado_itens)[0]
+                    valor_total = round(quantidade * precos[posicao], 2)
+                    itens.append((produto_id, cliente_id, nomes_produtos[produto_id], nome_cliente, quantidade,
+                                  precos[posicao], valor_total, data_venda, hora_venda, data_hora, pedido_id))
+                    valor_pedido += valor_total
+                    total_itens += quantidade
+                pedidos.append((pedido_id, cliente_id, nome_cliente, total_itens, round(valor_pedido, 2),
+                                data_venda, hora_venda, data_hora))
+
+            with pool.transacao("IMMEDIATE") as conn:
+                conn.executemany("""
+                    INSERT INTO pedidos (id, cliente_id, nome_cliente, quantidade_itens, valor_total, data_venda, hora_venda, data_hora)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, pedidos)
+                conn.executemany("""
+                    INSERT INTO vendas (produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario, valor_total, data_venda, hora_venda, data_hora, pedido_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, itens)
+            proximo_pedido += len(pedidos)
+            geradas += len(itens)
+            if progresso:
+                progresso(geradas, vendas)
+    finally:
+        with pool.transacao("IMMEDIATE") as conn:
+            resumo.criar_gatilho(conn)
+            resumo.reconstruir(conn)
+    with pool.conexao() as conn:
+        conn.execute("ANALYZE")
+    return {"produtos": produtos, "clientes": clientes, "vendas": geradas,
+            "pedidos": proximo_pedido - 1, "segundos": time.perf_counter() - comeco}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco sintético da loja com semente fixa")
+    parser.add_argument("banco", help="arquivo SQLite de saída (não pode existir)")
+    parser.add_argument("--vendas", type=int, default=10_000)
+    parser.add_argument("--produtos", type=int)
+    parser.add_argument("--clientes", type=int)
+    parser.add_argument("--dias", type=int, default=1095)
+    parser.add_argument("--inicio", type=date.fromisoformat, default=date(2022, 1, 1))
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.banco):
+        parser.error(f"{args.banco} já existe")
+
+    def progresso(geradas, total):
+        print(f"\r{geradas}/{total} vendas", end="", flush=True)
+
+    pool = PoolConexoes(args.banco)
+    resumo = gerar(pool, args.vendas, args.semente, args.produtos, args.clientes, args.inicio, args.dias, progresso)
+    pool.fechar()
+    print(f"\n{resumo['produtos']} produtos, {resumo['clientes']} clientes, {resumo['pedidos']} pedidos e "
+          f"{resumo['vendas']} vendas em {resumo['segundos']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Compara a exportação em blocos (loja.exportacao) com o caminho ingênuo
+# de carregar o histórico inteiro num DataFrame e gravar com o pandas.
+# Mede tempo e pico de memória alocada pelo Python (tracemalloc, que
+# também deixa os tempos mais lentos que numa execução normal).
+#
+# Uso: python -m benchmarks.exportacao --tamanhos 100000 1000000
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from benchmarks.relatorios import popular
+from loja import exportacao, relatorios
+from loja.conexao import PoolConexoes
+
+INICIO, FIM = date(2022, 1, 1), date(2024, 12, 31)
+
+
+def exportar_pandas(pool, formato, destino):
+    df = relatorios.historico(pool, INICIO, FIM)
+    if formato == "csv":
+        df.to_csv(destino, index=False, encoding="utf-8-sig")
+    elif formato == "xlsx":
+        df.to_excel(destino, index=False, engine="openpyxl")
+    else:
+        df.to_parquet(destino, index=False)
+    return len(df)
+
+
+def medir(funcao, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    linhas = funcao(*args)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return linhas, segundos, pico / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da exportação do histórico")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--formatos", nargs="+", default=list(exportacao.FORMATOS))
+    args = parser.parse_args()
+    
+    for total in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            pool = PoolConexoes(os.path.join(pasta, "bench.db"))
+            popular(pool, total)
+            print(f"\n{total} vendas")
+            for formato in args.formatos:
+                saida = os.path.join(pasta, f"saida.{formato}")
+                for nome, funcao in (("pandas", exportar_pandas),
+                                     ("blocos", lambda p, f, d: exportacao.exportar_historico(p, INICIO, FIM, f, d))):
+                    with open(saida, "wb") as destino:
+                        linhas, segundos, pico = medir(funcao, pool, formato, destino)
+                    tamanho = os.path.getsize(saida) / 2**20
+                    print(f"  {formato:8} {nome:7} {linhas:>9} linhas  {segundos:7.2f}s  "
+                          f"pico {pico:8.1f} MB  arquivo {tamanho:7.1f} MB")
+            pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
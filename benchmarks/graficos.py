@@ -0,0 +1,96 @@
+# Tamanho e tempo dos gráficos da página de relatórios.
+#
+# Gera um banco sintético (benchmarks.dados) e mede:
+#   - por gráfico (Loja.grafico): bytes do JSON, tempo para montar com o
+#     cache vazio e tempo quando já está em cache;
+#   - a página "📊 Relatórios" inteira rodando o app.py no AppTest do
+#     Streamlit: tempo de cada execução do script e bytes de gráficos que
+#     ela manda ao navegador, na primeira carga e nos reruns.
+# Com --app dá para medir outra versão do app.py (ex.: a do commit anterior,
+# salva ao lado do original) e comparar.
+#
+# Uso:
+#   python -m benchmarks.graficos --vendas 100000
+#   python -m benchmarks.graficos --vendas 100000 --app app_anterior.py
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks import dados
+from loja import conexao, graficos
+from loja.conexao import PoolConexoes
+from loja.servico import Loja
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ms(inicio):
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir_graficos(loja, data_inicio, data_fim, repeticoes):
+    print(f"{'gráfico':16} {'bytes':>8} {'montar (ms)':>12} {'em cache (ms)':>14}")
+    for aba in graficos.GRAFICOS:
+        montar, cache = [], []
+        for _ in range(repeticoes):
+            loja.cache.limpar()
+            inicio = time.perf_counter()
+            figura = loja.grafico(aba, data_inicio, data_fim)
+            montar.append(_ms(inicio))
+            inicio = time.perf_counter()
+            loja.grafico(aba, data_inicio, data_fim)
+            cache.append(_ms(inicio))
+        print(f"{aba:16} {len(figura):>8} {statistics.median(montar):>12.1f} {statistics.median(cache):>14.2f}")
+
+
+def medir_pagina(app, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    teste = AppTest.from_file(app, default_timeout=120)
+    teste.run()
+    teste.sidebar.selectbox[0].set_value("📊 Relatórios")
+    print(f"{'execução':14} {'script (ms)':>12} {'gráficos':>9} {'bytes de gráficos':>18}")
+    for numero in range(reruns + 1):
+        inicio = time.perf_counter()
+        teste.run()
+        tempo = _ms(inicio)
+        if teste.exception:
+            raise RuntimeError(teste.exception)
+        especificacoes = [elemento.proto.spec for elemento in teste.get("plotly_chart")]
+        rotulo = "carga inicial" if numero == 0 else f"rerun {numero}"
+        print(f"{rotulo:14} {tempo:>12.1f} {len(especificacoes):>9} "
+              f"{sum(len(spec.encode()) for spec in especificacoes):>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho e tempo dos gráficos dos relatórios")
+    parser.add_argument("--vendas", type=int, default=100_000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=3)
+    parser.add_argument("--app", default=os.path.join(RAIZ, "app.py"), help="app.py a medir na página")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        banco = os.path.join(pasta, "graficos.db")
+        pool = PoolConexoes(banco)
+        print(f"Gerando {args.vendas} vendas...", file=sys.stderr)
+        dados.gerar(pool, args.vendas, args.semente)
+        pool.fechar()
+
+        # O app abre o banco de conexao.DB_PATH
+        conexao.DB_PATH = banco
+        loja = Loja(banco)
+        data_inicio, data_fim = loja.intervalo_datas()
+        print(f"Período {data_inicio} a {data_fim}\n")
+        medir_graficos(loja, data_inicio, data_fim, args.repeticoes)
+        loja.fechar()
+        print()
+        medir_pagina(os.path.abspath(args.app), args.reruns)
+
+
+if __name__ == "__main__":
+    main()
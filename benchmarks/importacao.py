@@ -0,0 +1,92 @@
+# Mede a importação em massa (linhas/s) a partir de arquivos sintéticos.
+#
+# Uso: python -m benchmarks.importacao --produtos 20000 --vendas 500000 --xlsx
+import argparse
+import csv
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from loja import importacao
+from loja.conexao import PoolConexoes
+from loja.migracoes import aplicar_migracoes
+
+CATEGORIAS = ["Refrigerantes", "Cervejas", "Águas", "Sucos", "Energéticos", "Vinhos", "Destilados", "Outros"]
+
+
+def gerar_produtos(caminho, total):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        escritor.writerow(["nome", "categoria", "preco", "estoque"])
+        for i in range(total):
+            escritor.writerow([f"Produto {i}", CATEGORIAS[i % len(CATEGORIAS)], f"{3 + i % 50},90", i % 200])
+
+
+def gerar_clientes(caminho, total):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["nome", "telefone"])
+        for i in range(total):
+            escritor.writerow([f"Cliente {i}", f"(11) 9{i:04d}-{i % 10000:04d}"])
+
+
+def gerar_vendas(caminho, total, produtos, clientes):
+    inicio = datetime(2022, 1, 1)
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["data", "hora", "produto_id", "cliente_id", "quantidade", "valor_unitario"])
+        for i in range(total):
+            momento = inicio + timedelta(seconds=i * 60)
+            escritor.writerow([momento.strftime("%Y-%m-%d"), momento.strftime("%H:%M:%S"),
+                               random.randint(1, produtos), random.randint(1, clientes), random.randint(1, 5), "5.90"])
+
+
+def csv_para_xlsx(origem, destino):
+    from openpyxl import Workbook
+    
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet()
+    with open(origem, newline="", encoding="utf-8") as arquivo:
+        for linha in csv.reader(arquivo, delimiter=";"):
+            planilha.append(linha)
+    livro.save(destino)
+
+
+def medir(pool, tipo, caminho, formato):
+    with open(caminho, "rb") as arquivo:
+        resultado = importacao.importar_arquivo(pool, tipo, arquivo, formato)
+    velocidade = resultado["lidas"] / resultado["segundos"]
+    print(f"{tipo:>9} {formato:>4}: {resultado['importadas']:>9} linhas em {resultado['segundos']:6.2f}s "
+          f"= {velocidade:>8.0f} linhas/s ({resultado['rejeitadas']} rejeitadas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da importação em massa")
+    parser.add_argument("--produtos", type=int, default=20_000)
+    parser.add_argument("--clientes", type=int, default=5_000)
+    parser.add_argument("--vendas", type=int, default=200_000)
+    parser.add_argument("--xlsx", action="store_true", help="também mede a leitura de XLSX (produtos)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivos = {tipo: os.path.join(pasta, f"{tipo}.csv") for tipo in ("produtos", "clientes", "vendas")}
+        gerar_produtos(arquivos["produtos"], args.produtos)
+        gerar_clientes(arquivos["clientes"], args.clientes)
+        gerar_vendas(arquivos["vendas"], args.vendas, args.produtos, args.clientes)
+        
+        pool = PoolConexoes(os.path.join(pasta, "bench.db"))
+        with pool.conexao() as conn:
+            aplicar_migracoes(conn)
+        for tipo in ("produtos", "clientes", "vendas"):
+            medir(pool, tipo, arquivos[tipo], "csv")
+        
+        if args.xlsx:
+            xlsx = os.path.join(pasta, "produtos.xlsx")
+            csv_para_xlsx(arquivos["produtos"], xlsx)
+            medir(pool, "produtos", xlsx, "xlsx")
+        pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
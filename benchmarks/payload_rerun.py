@@ -0,0 +1,102 @@
+# Mede quantos bytes o servidor Streamlit manda pelo websocket a cada
+# execução do script (carga inicial e reruns seguintes).
+#
+# Sobe `streamlit run app.py` num banco temporário, conecta em
+# /_stcore/stream como o navegador faria, pede N execuções e soma o
+# tamanho das mensagens (ForwardMsg) de cada uma até o script terminar.
+#
+# Uso: python -m benchmarks.payload_rerun --reruns 5
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _esperar(url, segundos=60):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"{url} não respondeu")
+
+
+# Uma execução do script: bytes e mensagens até script_finished
+async def _executar(ws):
+    pedido = BackMsg()
+    pedido.rerun_script.query_string = ""
+    pedido.rerun_script.page_script_hash = ""
+    await ws.send(pedido.SerializeToString())
+    total = mensagens = elementos = 0
+    while True:
+        dados = await asyncio.wait_for(ws.recv(), timeout=60)
+        total += len(dados)
+        mensagens += 1
+        mensagem = ForwardMsg()
+        mensagem.ParseFromString(dados)
+        tipo = mensagem.WhichOneof("type")
+        if tipo == "delta":
+            elementos += 1
+        if tipo == "script_finished":
+            return {"bytes": total, "mensagens": mensagens, "elementos": elementos}
+
+
+async def medir(url, reruns):
+    async with websockets.connect(url, max_size=None, subprotocols=["streamlit"]) as ws:
+        # A primeira execução é a carga da página; as seguintes, reruns
+        return [await _executar(ws) for _ in range(reruns + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes enviados pelo Streamlit a cada execução do script")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--db", help="banco a usar (é copiado); padrão: o loja_bebidas.db do projeto")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        banco = os.path.join(pasta, "loja.db")
+        shutil.copy(args.db or os.path.join(RAIZ, "loja_bebidas.db"), banco)
+        porta = _porta_livre()
+        processo = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", os.path.join(RAIZ, "app.py"), "--server.headless", "true",
+             "--server.port", str(porta), "--browser.gatherUsageStats", "false"],
+            cwd=RAIZ, env={**os.environ, "LOJA_DB": banco}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _esperar(f"http://127.0.0.1:{porta}/_stcore/health")
+            medidas = asyncio.run(medir(f"ws://127.0.0.1:{porta}/_stcore/stream", args.reruns))
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    for numero, medida in enumerate(medidas):
+        rotulo = "carga inicial" if numero == 0 else f"rerun {numero}"
+        print(f"{rotulo:14} {medida['bytes']:>8} bytes  {medida['mensagens']:>3} mensagens  "
+              f"{medida['elementos']:>3} elementos")
+    reruns = medidas[1:]
+    if reruns:
+        print(f"média por rerun: {sum(medida['bytes'] for medida in reruns) / len(reruns):.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Compara os relatórios calculados no pandas (caminho antigo: SELECT * +
+# filtro em Python) com as consultas agregadas de loja.relatorios.
+#
+# Uso: python -m benchmarks.relatorios --tamanhos 10000 1000000 10000000
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from loja import relatorios
+from loja.conexao import PoolConexoes
+from loja.migracoes import aplicar_migracoes
+
+CATEGORIAS = ["Refrigerantes", "Cervejas", "Águas", "Sucos", "Energéticos", "Vinhos", "Destilados", "Outros"]
+
+
+# Preenche o banco com `total` vendas espalhadas por ~3 anos
+def popular(pool, total, produtos=500, clientes=5000):
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn)
+    with pool.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO produtos (nome, categoria, preco, estoque, data_cadastro) VALUES (?, ?, ?, ?, '2022-01-01')",
+            [(f"Produto {i}", CATEGORIAS[i % len(CATEGORIAS)], 3 + i % 40, 1000) for i in range(1, produtos + 1)],
+        )
+        conn.executemany(
+            "INSERT INTO clientes (nome, telefone, data_cadastro) VALUES (?, '', '2022-01-01')",
+            [(f"Cliente {i}",) for i in range(1, clientes + 1)],
+        )
+        conn.execute('''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO vendas (produto_id, cliente_id, nome_produto, nome_cliente, quantidade,
+                                valor_unitario, valor_total, data_venda, hora_venda, data_hora)
+            SELECT p, c, 'Produto ' || p, 'Cliente ' || c, q, 5.0, q * 5.0,
+                   substr(dh, 1, 10), substr(dh, 12), dh
+            FROM (
+                SELECT 1 + abs(random()) % ? AS p, 1 + abs(random()) % ? AS c, 1 + abs(random()) % 5 AS q,
+                       strftime('%Y-%m-%dT%H:%M:%S', '2022-01-01', '+' || (i * 94608000 / ?) || ' seconds') AS dh
+                FROM n
+            )
+        ''', (total, produtos, clientes, total))
+
+
+# Caminho antigo do app, reproduzido aqui para comparação
+def relatorio_pandas(pool, data_inicio, data_fim):
+    with pool.conexao() as conn:
+        vendas_df = pd.read_sql_query("SELECT * FROM vendas", conn)
+        produtos_df = pd.read_sql_query("SELECT * FROM produtos", conn)
+    vendas_df['data_venda'] = pd.to_datetime(vendas_df['data_venda'])
+    mask = (vendas_df['data_venda'].dt.date >= data_inicio) & (vendas_df['data_venda'].dt.date <= data_fim)
+    filtradas = vendas_df.loc[mask]
+    len(filtradas), filtradas['valor_total'].sum(), filtradas['valor_total'].mean(), filtradas['quantidade'].sum()
+    filtradas.groupby(filtradas['data_venda'].dt.date).agg({'valor_total': 'sum', 'quantidade': 'sum'})
+    filtradas.groupby('nome_produto').agg({'quantidade': 'sum', 'valor_total': 'sum'}).sort_values('quantidade').head(10)
+    filtradas.groupby('nome_cliente').agg({'valor_total': 'sum', 'quantidade': 'sum'}).sort_values('valor_total').head(10)
+    filtradas.groupby('nome_produto')['valor_total'].sum().sort_values().head(10)
+    filtradas.merge(produtos_df[['id', 'categoria']], left_on='produto_id', right_on='id', how='left') \
+        .groupby('categoria').agg({'valor_total': 'sum', 'quantidade': 'sum'})
+
+
+def relatorio_sql(pool, data_inicio, data_fim):
+    relatorios.metricas(relatorios.vendas_por_dia(pool, data_inicio, data_fim))
+    por_produto = relatorios.vendas_por_produto(pool, data_inicio, data_fim)
+    relatorios.top_produtos(por_produto, ordem='quantidade')
+    relatorios.top_produtos(por_produto, ordem='valor_total')
+    relatorios.por_categoria(por_produto)
+    relatorios.top_clientes(pool, data_inicio, data_fim)
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatórios: pandas x SQL")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--dias", type=int, default=30, help="tamanho do período filtrado")
+    args = parser.parse_args()
+    
+    print(f"{'vendas':>10} | {'período':>8} | {'pandas (s)':>10} | {'SQL (s)':>8} | {'ganho':>6}")
+    for total in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            pool = PoolConexoes(os.path.join(pasta, "bench.db"))
+            popular(pool, total)
+            primeira, ultima = relatorios.intervalo_datas(pool)
+            for rotulo, inicio in ((f"{args.dias}d", ultima - timedelta(days=args.dias)), ("tudo", primeira)):
+                t_pandas = cronometrar(relatorio_pandas, pool, inicio, ultima)
+                t_sql = cronometrar(relatorio_sql, pool, inicio, ultima)
+                print(f"{total:>10} | {rotulo:>8} | {t_pandas:>10.3f} | {t_sql:>8.3f} | {t_pandas / t_sql:>5.1f}x")
+            pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
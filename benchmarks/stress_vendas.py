@@ -0,0 +1,87 @@
+# Teste de estresse de vendas concorrentes em um banco temporário.
+#
+# Uso: python -m benchmarks.stress_vendas --vendas 5000 --caixas 8
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from loja import vendas
+from loja.conexao import PoolConexoes
+from loja.migracoes import aplicar_migracoes
+
+
+def preparar_banco(pool, produtos, estoque_inicial):
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn)
+    with pool.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO produtos (nome, categoria, preco, estoque, data_cadastro) VALUES (?, ?, ?, ?, ?)",
+            [(f"Produto {i}", "Outros", 5.0, estoque_inicial, "2024-01-01") for i in range(1, produtos + 1)],
+        )
+        conn.execute("INSERT INTO clientes (nome, telefone, data_cadastro) VALUES ('Cliente Teste', '', '2024-01-01')")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estresse de vendas concorrentes")
+    parser.add_argument("--vendas", type=int, default=5000)
+    parser.add_argument("--caixas", type=int, default=8)
+    parser.add_argument("--produtos", type=int, default=5)
+    parser.add_argument("--estoque", type=int, default=1000,
+                        help="estoque inicial de cada produto (abaixo da demanda força vendas recusadas)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as pasta:
+        pool = PoolConexoes(os.path.join(pasta, "stress.db"), max_ociosas=args.caixas)
+        preparar_banco(pool, args.produtos, args.estoque)
+        
+        contadores = {"ok": 0, "recusadas": 0, "erros": 0}
+        lock = threading.Lock()
+        
+        def caixa(total):
+            for _ in range(total):
+                produto_id = random.randint(1, args.produtos)
+                quantidade = random.randint(1, 3)
+                try:
+                    vendas.registrar_venda(pool, produto_id, 1, f"Produto {produto_id}", "Cliente Teste", quantidade, 5.0)
+                    chave = "ok"
+                except vendas.EstoqueInsuficiente:
+                    chave = "recusadas"
+                except Exception:
+                    chave = "erros"
+                with lock:
+                    contadores[chave] += 1
+        
+        por_caixa = args.vendas // args.caixas
+        threads = [threading.Thread(target=caixa, args=(por_caixa,)) for _ in range(args.caixas)]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+        
+        with pool.conexao() as conn:
+            menor_estoque = conn.execute("SELECT MIN(estoque) FROM produtos").fetchone()[0]
+            total_estoque = conn.execute("SELECT SUM(estoque) FROM produtos").fetchone()[0]
+            total_vendido = conn.execute("SELECT COALESCE(SUM(quantidade), 0) FROM vendas").fetchone()[0]
+            total_resumo = conn.execute("SELECT COALESCE(SUM(quantidade), 0) FROM vendas_dia_produto").fetchone()[0]
+        pool.fechar()
+    
+    tentativas = por_caixa * args.caixas
+    print(f"Tentativas: {tentativas} | registradas: {contadores['ok']} | "
+          f"recusadas por estoque: {contadores['recusadas']} | erros: {contadores['erros']}")
+    print(f"Tempo: {duracao:.2f}s | {contadores['ok'] / duracao:.0f} vendas/s")
+    print(f"Menor estoque final: {menor_estoque}")
+    
+    assert menor_estoque >= 0, "estoque negativo!"
+    assert total_estoque + total_vendido == args.produtos * args.estoque, "estoque inconsistente com as vendas"
+    assert total_resumo == total_vendido, "resumo diário divergente das vendas"
+    assert contadores["erros"] == 0, "vendas falharam com erro"
+    print("✅ Estoque consistente")
+
+
+if __name__ == "__main__":
+    main()
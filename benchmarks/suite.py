@@ -0,0 +1,233 @@
+# Suíte de benchmarks ponta a ponta das funções de dados do app.
+#
+# Para cada escala gera (ou reaproveita) um banco sintético com
+# benchmarks.dados e mede cada função de listagem, busca, relatório,
+# exportação e registro de venda: mediana e mínimo de várias repetições e
+# o pico de memória alocada pelo Python numa execução separada (tracemalloc
+# deixa o código mais lento, então não entra nos tempos). O resultado vai
+# para um JSON que pode ser comparado com o de outro commit.
+#
+# Uso:
+#   python -m benchmarks.suite --escalas 10000 1000000 --saida resultados.json
+#   python -m benchmarks.suite --escalas 10000 --comparar resultados_anteriores.json
+#   python -m benchmarks.suite --escalas 10000000 --pasta ~/bancos_bench   # reaproveita os bancos gerados
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks import dados
+from loja import busca, estoque, exportacao, listagem, relatorios, vendas
+from loja.cache import CacheConsultas
+from loja.conexao import PoolConexoes
+
+# Diferença a partir da qual a comparação aponta regressão ou melhora
+TOLERANCIA = 0.20
+
+
+def _pool(func):
+    return lambda pool: func(pool)
+
+
+def _conn(func):
+    def executar(pool):
+        with pool.conexao() as conn:
+            return func(conn)
+    return executar
+
+
+# Casos medidos: nome -> função(pool). Os relatórios rodam no período todo e
+# nos últimos 30 dias, que é o uso mais comum da tela.
+def casos(pool):
+    inicio, fim = relatorios.intervalo_datas(pool)
+    mes = fim - timedelta(days=29)
+    cache = CacheConsultas()
+    cache.consultar(pool, "categorias", ("produtos",), listagem.categorias)
+
+    def registrar_pedido(pool):
+        with pool.conexao() as conn:
+            produtos = conn.execute("SELECT id, nome, preco FROM produtos ORDER BY estoque DESC LIMIT 3").fetchall()
+            cliente_id, nome_cliente = conn.execute("SELECT id, nome FROM clientes LIMIT 1").fetchone()
+            # Repõe o estoque para as repetições não esgotarem os produtos
+            conn.execute("UPDATE produtos SET estoque = estoque + 1 WHERE id IN (?, ?, ?)",
+                         [produto_id for produto_id, _, _ in produtos])
+        return vendas.registrar_pedido(pool, cliente_id, nome_cliente,
+                                       [(produto_id, nome, 1, preco) for produto_id, nome, preco in produtos])
+
+    def exportar_mes(pool, formato):
+        with open(os.devnull, "wb") as destino:
+            return exportacao.exportar_historico(pool, mes, fim, formato, destino)
+
+    resultado = {
+        "listagem.pagina_produtos": _conn(lambda conn: listagem.pagina_produtos(conn)),
+        "listagem.pagina_produtos_preco_desc": _conn(
+            lambda conn: listagem.pagina_produtos(conn, ordem="preco", crescente=False)),
+        "listagem.pagina_produtos_categoria_busca": _conn(
+            lambda conn: listagem.pagina_produtos(conn, categoria="Cervejas", busca="serra")),
+        "listagem.contar_produtos": _conn(listagem.contar_produtos),
+        "listagem.produtos_disponiveis": _conn(listagem.produtos_disponiveis),
+        "listagem.categorias": _conn(listagem.categorias),
+        "listagem.pagina_clientes": _conn(lambda conn: listagem.pagina_clientes(conn)),
+        "listagem.contar_clientes": _conn(listagem.contar_clientes),
+        "listagem.clientes_para_selecao": _conn(listagem.clientes_para_selecao),
+        "estoque.alertas": _conn(estoque.alertas),
+        "busca.buscar_produtos": _conn(lambda conn: busca.buscar_produtos(conn, "cerv ser")),
+        "busca.buscar_clientes": _conn(lambda conn: busca.buscar_clientes(conn, "mar sil")),
+        "cache.consultar_acerto": lambda pool: cache.consultar(pool, "categorias", ("produtos",), listagem.categorias),
+        "relatorios.intervalo_datas": _pool(relatorios.intervalo_datas),
+    }
+    for periodo, (de, ate) in (("total", (inicio, fim)), ("30d", (mes, fim))):
+        resultado.update({
+            f"relatorios.vendas_por_dia[{periodo}]": lambda pool, de=de, ate=ate: relatorios.metricas(
+                relatorios.vendas_por_dia(pool, de, ate)),
+            f"relatorios.vendas_por_produto[{periodo}]": lambda pool, de=de, ate=ate: relatorios.vendas_por_produto(
+                pool, de, ate),
+            f"relatorios.top_produtos[{periodo}]": lambda pool, de=de, ate=ate: relatorios.top_produtos(
+                relatorios.vendas_por_produto(pool, de, ate)),
+            f"relatorios.por_categoria[{periodo}]": lambda pool, de=de, ate=ate: relatorios.por_categoria(
+                relatorios.vendas_por_produto(pool, de, ate)),
+            f"relatorios.top_clientes[{periodo}]": lambda pool, de=de, ate=ate: relatorios.top_clientes(pool, de, ate),
+            f"relatorios.historico_recentes[{periodo}]": lambda pool, de=de, ate=ate: relatorios.historico(
+                pool, de, ate, mais_recentes=500),
+        })
+    resultado.update({
+        "exportacao.historico_csv[30d]": lambda pool: exportar_mes(pool, "csv"),
+        "exportacao.historico_parquet[30d]": lambda pool: exportar_mes(pool, "parquet"),
+        "vendas.registrar_pedido": registrar_pedido,
+    })
+    return resultado
+
+
+def medir(funcao, pool, repeticoes):
+    funcao(pool)  # aquecimento: cache de páginas do SQLite e imports preguiçosos
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(pool)
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao(pool)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mediana_ms": round(statistics.median(tempos) * 1000, 3),
+        "min_ms": round(min(tempos) * 1000, 3),
+        "max_ms": round(max(tempos) * 1000, 3),
+        "pico_kb": round(pico / 1024, 1),
+    }
+
+
+def _banco(pasta, escala, semente):
+    caminho = os.path.join(pasta, f"vendas_{escala}_s{semente}.db")
+    if os.path.exists(caminho):
+        return caminho, None
+
+    def progresso(geradas, total):
+        print(f"\r  gerando {geradas}/{total} vendas", end="", file=sys.stderr, flush=True)
+
+    pool = PoolConexoes(caminho)
+    resumo = dados.gerar(pool, escala, semente, progresso=progresso)
+    pool.fechar()
+    print(file=sys.stderr)
+    return caminho, resumo
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, anterior):
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('gerado_em')}):")
+    for escala, resultado in atual["escalas"].items():
+        antes = anterior.get("escalas", {}).get(escala)
+        if not antes:
+            continue
+        print(f"  {escala} vendas")
+        for nome, medida in resultado["funcoes"].items():
+            medida_antes = antes["funcoes"].get(nome)
+            if not medida_antes or not medida_antes["mediana_ms"]:
+                continue
+            razao = medida["mediana_ms"] / medida_antes["mediana_ms"]
+            marca = "REGRESSÃO" if razao > 1 + TOLERANCIA else "melhora" if razao < 1 - TOLERANCIA else ""
+            print(f"    {nome:45} {medida_antes['mediana_ms']:10.2f} -> {medida['mediana_ms']:10.2f} ms "
+                  f"({razao:5.2f}x) {marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks das funções de dados do app")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--pasta", help="onde guardar os bancos gerados para reaproveitar entre execuções")
+    parser.add_argument("--filtro", help="mede só as funções cujo nome contém este texto")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    resultado = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "semente": args.semente,
+        "repeticoes": args.repeticoes,
+        "escalas": {},
+    }
+
+    with tempfile.TemporaryDirectory() as temporaria:
+        pasta = os.path.expanduser(args.pasta) if args.pasta else temporaria
+        os.makedirs(pasta, exist_ok=True)
+        for escala in args.escalas:
+            print(f"{escala} vendas", file=sys.stderr)
+            caminho, resumo = _banco(pasta, escala, args.semente)
+            # Cópia de trabalho: o registro de vendas não altera o banco reaproveitado
+            copia = os.path.join(temporaria, "trabalho.db")
+            with sqlite3.connect(caminho) as origem, sqlite3.connect(copia) as destino:
+                origem.backup(destino)
+
+            pool = PoolConexoes(copia)
+            medidas = {}
+            for nome, funcao in casos(pool).items():
+                if args.filtro and args.filtro not in nome:
+                    continue
+                medidas[nome] = medir(funcao, pool, args.repeticoes)
+                print(f"  {nome:45} {medidas[nome]['mediana_ms']:10.2f} ms  {medidas[nome]['pico_kb']:10.1f} KB",
+                      file=sys.stderr)
+            pool.fechar()
+            os.remove(copia)
+
+            resultado["escalas"][str(escala)] = {
+                "geracao_s": round(resumo["segundos"], 1) if resumo else None,
+                "tamanho_banco_mb": round(os.path.getsize(caminho) / 2**20, 1),
+                "rss_max_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "funcoes": medidas,
+            }
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(resultado, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+// Casca do PWA - Loja de Bebidas
+//
+// Componente do Streamlit sem conteúdo visível. Roda dentro de um iframe da
+// mesma origem e instala na página do app, uma única vez por aba:
+//   - estilos (estilo.css), meta tags do PWA e o link do manifest
+//   - a fila de vendas offline (/fila_vendas.js)
+//   - o registro do service worker (/sw.js)
+//   - o botão "Instalar App"
+// Os arquivos do componente vêm do servidor uma vez e ficam no cache do
+// navegador; nos reruns o Streamlit só repete um elemento vazio e o iframe
+// continua montado. Se ele for recriado, a marca em `pagina.__cascaPwa`
+// impede que algo seja instalado de novo.
+(function() {
+  const pagina = window.parent;
+  const documento = pagina.document;
+
+  function enviar(tipo, dados) {
+    pagina.postMessage(Object.assign({ isStreamlitMessage: true, type: tipo }, dados), '*');
+  }
+
+  function adicionarNoHead(tag, atributos) {
+    const elemento = documento.createElement(tag);
+    Object.keys(atributos).forEach(function(nome) { elemento.setAttribute(nome, atributos[nome]); });
+    documento.head.appendChild(elemento);
+    return elemento;
+  }
+
+  function instalarCabecalho() {
+    adicionarNoHead('link', { rel: 'stylesheet', href: new URL('estilo.css', document.baseURI).href });
+    adicionarNoHead('meta', { name: 'apple-mobile-web-app-capable', content: 'yes' });
+    adicionarNoHead('meta', { name: 'apple-mobile-web-app-status-bar-style', content: 'black-translucent' });
+    adicionarNoHead('meta', { name: 'apple-mobile-web-app-title', content: 'Loja Bebidas' });
+    adicionarNoHead('meta', { name: 'mobile-web-app-capable', content: 'yes' });
+    adicionarNoHead('meta', { name: 'theme-color', content: '#667eea' });
+    adicionarNoHead('link', { rel: 'manifest', href: '/manifest.json' });
+    // Script criado pelo DOM executa (o <script> dentro de st.markdown não)
+    adicionarNoHead('script', { src: '/fila_vendas.js' });
+  }
+
+  function registrarServiceWorker() {
+    if (!('serviceWorker' in pagina.navigator)) {
+      return;
+    }
+    pagina.navigator.serviceWorker.register('/sw.js').then(function(registro) {
+      console.log('SW registrado com sucesso:', registro.scope);
+    }, function(erro) {
+      console.log('Falha ao registrar SW:', erro);
+    });
+  }
+
+  // Prompt de instalação PWA
+  function instalarBotao() {
+    let pedidoInstalacao = null;
+    const botao = documento.createElement('button');
+    botao.className = 'botao-instalar-pwa';
+    botao.textContent = '📱 Instalar App';
+    documento.body.appendChild(botao);
+
+    pagina.addEventListener('beforeinstallprompt', function(evento) {
+      evento.preventDefault();
+      pedidoInstalacao = evento;
+      botao.style.display = 'block';
+    });
+
+    botao.addEventListener('click', function() {
+      botao.style.display = 'none';
+      if (!pedidoInstalacao) {
+        return;
+      }
+      pedidoInstalacao.prompt();
+      pedidoInstalacao.userChoice.then(function(resultado) {
+        if (resultado.outcome === 'accepted') {
+          console.log('PWA instalado');
+        }
+        pedidoInstalacao = null;
+      });
+    });
+
+    pagina.addEventListener('appinstalled', function() {
+      console.log('PWA instalado com sucesso');
+      botao.style.display = 'none';
+    });
+  }
+
+  if (!pagina.__cascaPwa) {
+    pagina.__cascaPwa = true;
+    instalarCabecalho();
+    registrarServiceWorker();
+    instalarBotao();
+  }
+
+  // Protocolo mínimo de componentes do Streamlit: pronto e altura zero
+  enviar('streamlit:componentReady', { apiVersion: 1 });
+  enviar('streamlit:setFrameHeight', { height: 0 });
+})();
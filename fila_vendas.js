@@ -0,0 +1,222 @@
+// Fila de vendas offline - Loja de Bebidas
+//
+// Cada venda recebe um id gerado no aparelho e vai primeiro para o
+// IndexedDB; depois a fila é enviada em lotes para /vendas/lote. Sem rede a
+// venda fica guardada e o reenvio acontece quando a conexão volta (Background
+// Sync no service worker, ou o evento 'online' nos navegadores sem ele). O
+// servidor ignora ids repetidos, então reenviar é sempre seguro.
+//
+// Vendas recusadas (estoque acabou, produto inexistente) saem da fila e vão
+// para a lista de conflitos, para o operador resolver.
+//
+// Carregado pela página (<script src="/fila_vendas.js">) e pelo service
+// worker (importScripts), que compartilham as mesmas funções:
+//   FilaVendas.registrar({cliente_id, itens: [{produto_id, quantidade, valor_unitario}]})
+//   FilaVendas.pendentes() / FilaVendas.conflitos() / FilaVendas.sincronizar()
+(function(escopo) {
+  const BANCO = 'loja-bebidas';
+  const VERSAO_BANCO = 1;
+  const PENDENTES = 'vendas-pendentes';
+  const CONFLITOS = 'vendas-conflito';
+  const TAG_SYNC = 'sincronizar-vendas';
+  const URL_LOTE = '/vendas/lote';
+  const TAMANHO_LOTE = 50;
+  const INTERVALO_REENVIO = 30000;
+
+  let bancoAberto = null;
+  let sincronizando = null;
+
+  function abrirBanco() {
+    if (!bancoAberto) {
+      bancoAberto = new Promise(function(resolve, reject) {
+        const pedido = indexedDB.open(BANCO, VERSAO_BANCO);
+        pedido.onupgradeneeded = function() {
+          const banco = pedido.result;
+          if (!banco.objectStoreNames.contains(PENDENTES)) {
+            banco.createObjectStore(PENDENTES, { keyPath: 'id' }).createIndex('criada_em', 'criada_em');
+          }
+          if (!banco.objectStoreNames.contains(CONFLITOS)) {
+            banco.createObjectStore(CONFLITOS, { keyPath: 'id' });
+          }
+        };
+        pedido.onsuccess = function() { resolve(pedido.result); };
+        pedido.onerror = function() {
+          bancoAberto = null;
+          reject(pedido.error);
+        };
+      });
+    }
+    return bancoAberto;
+  }
+
+  // Executa `operacao(stores)` numa transação e resolve quando ela termina
+  function transacao(nomes, modo, operacao) {
+    return abrirBanco().then(function(banco) {
+      return new Promise(function(resolve, reject) {
+        const tx = banco.transaction(nomes, modo);
+        let resultado;
+        tx.oncomplete = function() { resolve(resultado); };
+        tx.onerror = tx.onabort = function() { reject(tx.error); };
+        const stores = nomes.map(function(nome) { return tx.objectStore(nome); });
+        resultado = operacao.apply(null, stores);
+      });
+    });
+  }
+
+  function lerTodos(nome, limite) {
+    let itens = [];
+    return transacao([nome], 'readonly', function(store) {
+      const origem = nome === PENDENTES ? store.index('criada_em') : store;
+      origem.openCursor().onsuccess = function(evento) {
+        const cursor = evento.target.result;
+        if (cursor && (!limite || itens.length < limite)) {
+          itens.push(cursor.value);
+          cursor.continue();
+        }
+      };
+    }).then(function() { return itens; });
+  }
+
+  function novoId() {
+    if (escopo.crypto && escopo.crypto.randomUUID) {
+      return escopo.crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+  }
+
+  function avisar(detalhe) {
+    if (escopo.clients && escopo.clients.matchAll) {
+      // Service worker: avisa todas as páginas abertas
+      escopo.clients.matchAll({ includeUncontrolled: true }).then(function(paginas) {
+        paginas.forEach(function(pagina) { pagina.postMessage({ tipo: 'fila-vendas', detalhe: detalhe }); });
+      });
+    } else if (escopo.dispatchEvent && escopo.CustomEvent) {
+      escopo.dispatchEvent(new CustomEvent('fila-vendas', { detail: detalhe }));
+    }
+  }
+
+  // Pede ao service worker um reenvio assim que houver rede
+  function agendarSincronizacao() {
+    if (escopo.navigator && escopo.navigator.serviceWorker && 'SyncManager' in escopo) {
+      return escopo.navigator.serviceWorker.ready
+        .then(function(registro) { return registro.sync.register(TAG_SYNC); })
+        .catch(function() {});
+    }
+    return Promise.resolve();
+  }
+
+  function enfileirar(venda) {
+    const registro = Object.assign({ id: novoId(), criada_em: new Date().toISOString() }, venda);
+    return transacao([PENDENTES], 'readwrite', function(store) {
+      store.put(registro);
+    }).then(function() {
+      avisar({ evento: 'enfileirada', venda: registro });
+      return registro;
+    });
+  }
+
+  // Envia um lote; falha de rede ou erro 5xx rejeita (a venda continua na fila)
+  function enviarLote(lote) {
+    return fetch(URL_LOTE, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ vendas: lote }),
+    }).then(function(resposta) {
+      if (!resposta.ok) {
+        throw new Error('Falha ao sincronizar vendas: HTTP ' + resposta.status);
+      }
+      return resposta.json();
+    });
+  }
+
+  // Tira da fila as vendas com resposta definitiva; recusadas vão para os conflitos
+  function guardarResultados(lote, resultados) {
+    const porId = {};
+    lote.forEach(function(venda) { porId[venda.id] = venda; });
+    return transacao([PENDENTES, CONFLITOS], 'readwrite', function(pendentes, conflitos) {
+      resultados.forEach(function(resultado) {
+        if (!resultado.id || !porId[resultado.id]) {
+          return;
+        }
+        pendentes.delete(resultado.id);
+        if (resultado.status !== 'registrada') {
+          conflitos.put(Object.assign({}, porId[resultado.id], { resultado: resultado }));
+        }
+      });
+    });
+  }
+
+  // Envia a fila em lotes até esvaziar. Só uma sincronização por vez.
+  function sincronizar() {
+    if (sincronizando) {
+      return sincronizando;
+    }
+    let todos = [];
+    function proximoLote() {
+      return lerTodos(PENDENTES, TAMANHO_LOTE).then(function(lote) {
+        if (!lote.length) {
+          return todos;
+        }
+        return enviarLote(lote).then(function(corpo) {
+          todos = todos.concat(corpo.resultados);
+          return guardarResultados(lote, corpo.resultados);
+        }).then(function() {
+          avisar({ evento: 'sincronizada', resultados: todos });
+          return lote.length === TAMANHO_LOTE ? proximoLote() : todos;
+        });
+      });
+    }
+    sincronizando = proximoLote().finally(function() { sincronizando = null; });
+    return sincronizando;
+  }
+
+  // Guarda a venda e tenta enviar na hora. Resolve com o resultado do
+  // servidor ou com {status: 'pendente'} quando está sem rede.
+  function registrar(venda) {
+    return enfileirar(venda).then(function(registro) {
+      return sincronizar().then(function(resultados) {
+        const resultado = resultados.find(function(item) { return item.id === registro.id; });
+        return resultado || { id: registro.id, status: 'pendente' };
+      }, function() {
+        return agendarSincronizacao().then(function() { return { id: registro.id, status: 'pendente' }; });
+      });
+    });
+  }
+
+  function descartarConflito(id) {
+    return transacao([CONFLITOS], 'readwrite', function(store) { store.delete(id); });
+  }
+
+  escopo.FilaVendas = {
+    TAG_SYNC: TAG_SYNC,
+    registrar: registrar,
+    enfileirar: enfileirar,
+    sincronizar: sincronizar,
+    pendentes: function() { return lerTodos(PENDENTES); },
+    conflitos: function() { return lerTodos(CONFLITOS); },
+    descartarConflito: descartarConflito,
+  };
+
+  // Na página: reenvia quando a rede volta e, sem Background Sync, de tempos
+  // em tempos enquanto houver pendências; repassa os avisos do service worker
+  if (escopo.document) {
+    escopo.addEventListener('online', function() { sincronizar().catch(function() {}); });
+    if (escopo.navigator.serviceWorker) {
+      escopo.navigator.serviceWorker.addEventListener('message', function(evento) {
+        if (evento.data && evento.data.tipo === 'fila-vendas') {
+          escopo.dispatchEvent(new CustomEvent('fila-vendas', { detail: evento.data.detalhe }));
+        }
+      });
+    }
+    if (!('SyncManager' in escopo)) {
+      setInterval(function() {
+        if (escopo.navigator.onLine) {
+          sincronizar().catch(function() {});
+        }
+      }, INTERVALO_REENVIO);
+    }
+    if (escopo.navigator.onLine) {
+      sincronizar().catch(function() {});
+    }
+  }
+})(self);
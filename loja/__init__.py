@@ -0,0 +1 @@
+# Camada de dados da Loja de Bebidas
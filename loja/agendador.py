@@ -0,0 +1,357 @@
+# Tarefas periódicas de manutenção, fora do caminho das requisições.
+#
+# TAREFAS registra cada tarefa com o intervalo entre execuções. Um
+# Agendador é uma thread que, a cada VERIFICACAO, roda em sequência as
+# tarefas vencidas (última execução há mais que o intervalo). Ele sobe junto
+# com o app e a API (desligue com LOJA_AGENDADOR=0) ou avulso, num processo
+# só dele:
+#
+#     python -m loja.agendador loja_bebidas.db              # laço
+#     python -m loja.agendador loja_bebidas.db --agora backup
+#     python -m loja.agendador loja_bebidas.db --listar
+#
+# Antes de rodar, a tarefa pega a sua trava em tarefas_travas (migração 14),
+# com validade de DURACAO_TRAVA: com vários processos no mesmo banco, só um
+# roda cada tarefa, e a trava de um processo que morreu expira sozinha. Cada
+# execução fica em tarefas_execucoes, com status, tempo e detalhe.
+#
+# As tarefas fazem transações curtas (um dia de resumos, um lote do vacuum
+# ou das vendas arquivadas) ou só leem (backup, que no modo WAL não bloqueia
+# quem escreve), então nenhuma segura o banco por muito tempo para os caixas.
+import argparse
+import glob
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from loja import arquivo, previsao, resumo
+
+logger = logging.getLogger("loja.agendador")
+
+VERIFICACAO = timedelta(seconds=30)
+# Espera depois de subir, para não competir com a primeira carga do app
+ESPERA_INICIAL = timedelta(seconds=60)
+DURACAO_TRAVA = timedelta(hours=2)
+# Execuções guardadas por tarefa no histórico
+HISTORICO_POR_TAREFA = 200
+
+# Dias recentes dos resumos diários recalculados a partir de vendas
+DIAS_RESUMOS = 2
+BACKUPS_MANTIDOS = 7
+# Vacuum incremental: só com mais páginas livres que isto, em lotes
+MIN_PAGINAS_LIVRES = 1000
+PAGINAS_POR_LOTE = 2000
+
+EM_ANDAMENTO = "em andamento"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+
+# Com LOJA_AGENDADOR=0 o app e a API não sobem o agendador (use o avulso)
+NO_PROCESSO = os.environ.get("LOJA_AGENDADOR", "1") != "0"
+
+
+# ------------------------------------------------------------------ tarefas
+
+# Refaz os resumos diários dos últimos dias a partir de vendas, corrigindo
+# o que os gatilhos não viram (UPDATE/DELETE em vendas, importações antigas)
+def _resumos(pool):
+    desde = (date.today() - timedelta(days=DIAS_RESUMOS - 1)).isoformat()
+    with pool.conexao() as conn, arquivo.fonte_vendas(conn, desde) as fonte:
+        conn.execute("BEGIN IMMEDIATE")
+        resumo.reconstruir(conn, desde, fonte)
+        conn.commit()
+    return f"resumos desde {desde}"
+
+
+def _previsoes(pool):
+    execucao = previsao.atualizar(pool)
+    return f"{execucao['produtos']} produtos"
+
+
+def pasta_backups(caminho):
+    return os.environ.get("LOJA_BACKUPS") or os.path.join(os.path.dirname(os.path.abspath(caminho)), "backups")
+
+
+# Cópia do banco com a API de backup do SQLite. Sai num passo só (pages=-1):
+# no modo WAL é uma leitura de um instantâneo, e quem escreve não espera;
+# em vários passos, cada escrita no meio faria a cópia recomeçar. O arquivo
+# é gravado com outro nome e renomeado no fim, então um backup interrompido
+# nunca aparece como válido. Ficam os BACKUPS_MANTIDOS mais recentes. Os
+# anos do arquivo de vendas, que só mudam quando são arquivados, vão para
+# <pasta de backups>/arquivo quando mudaram desde a última cópia.
+def _backup(pool):
+    pasta = pasta_backups(pool.caminho)
+    os.makedirs(pasta, exist_ok=True)
+    base = os.path.splitext(os.path.basename(pool.caminho))[0]
+    destino = os.path.join(pasta, f"{base}-{datetime.now():%Y%m%d-%H%M%S}.db")
+    temporario = destino + ".parcial"
+    copia = sqlite3.connect(temporario)
+    try:
+        with pool.conexao() as conn:
+            conn.backup(copia)
+    finally:
+        copia.close()
+    os.replace(temporario, destino)
+    for antigo in sorted(glob.glob(os.path.join(pasta, f"{base}-*.db")))[:-BACKUPS_MANTIDOS]:
+        os.remove(antigo)
+    anos = arquivo.copiar(pool, os.path.join(pasta, "arquivo"))
+    return (f"{destino} ({os.path.getsize(destino) / 2**20:.1f} MB)"
+            + (f"; arquivo de {', '.join(map(str, anos))}" if anos else ""))
+
+
+# Estatísticas do planejador de consultas: ANALYZE amostrado (rápido mesmo
+# com milhões de vendas) e PRAGMA optimize
+def _estatisticas(pool):
+    with pool.conexao() as conn:
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+    return "ANALYZE e optimize"
+
+
+# Move as vendas de antes de arquivo.MESES_QUENTES meses para o arquivo por
+# ano; o vacuum seguinte devolve o espaço que elas ocupavam
+def _arquivo(pool):
+    movidas = arquivo.arquivar(pool)
+    return ", ".join(f"{ano}: {quantidade}" for ano, quantidade in movidas.items()) or "nada a arquivar"
+
+
+# Devolve ao sistema as páginas livres (vendas e previsões apagadas), em
+# lotes de PAGINAS_POR_LOTE, cada um numa transação curta
+def _vacuum(pool):
+    with pool.conexao() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return "auto_vacuum não é incremental; rode --ativar-vacuum-incremental com o app parado"
+        livres = inicio = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if livres < MIN_PAGINAS_LIVRES:
+            return f"{livres} páginas livres"
+        while livres > 0:
+            conn.execute(f"PRAGMA incremental_vacuum({PAGINAS_POR_LOTE})").fetchall()
+            restantes = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if restantes >= livres:
+                break
+            livres = restantes
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    return f"{inicio - livres} páginas liberadas"
+
+
+# Tarefa -> (intervalo, função(pool) que devolve um detalhe em texto)
+TAREFAS = {
+    "resumos": (timedelta(hours=1), _resumos),
+    "previsoes": (timedelta(hours=24), _previsoes),
+    "backup": (timedelta(hours=24), _backup),
+    "arquivo": (timedelta(hours=24), _arquivo),
+    "estatisticas": (timedelta(hours=24), _estatisticas),
+    "vacuum": (timedelta(hours=24), _vacuum),
+}
+
+
+# ----------------------------------------------------------- travas e histórico
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+# Pega a trava da tarefa se estiver livre ou vencida; False se outro a tem
+def travar(conn, tarefa, dono, duracao=DURACAO_TRAVA):
+    agora = datetime.now()
+    cursor = conn.execute('''
+        INSERT INTO tarefas_travas (tarefa, dono, expira_em) VALUES (?, ?, ?)
+        ON CONFLICT (tarefa) DO UPDATE SET dono = excluded.dono, expira_em = excluded.expira_em
+        WHERE tarefas_travas.expira_em < ?
+    ''', (tarefa, dono, (agora + duracao).isoformat(timespec="seconds"), agora.isoformat(timespec="seconds")))
+    return cursor.rowcount == 1
+
+
+def liberar(conn, tarefa, dono):
+    conn.execute("DELETE FROM tarefas_travas WHERE tarefa = ? AND dono = ?", (tarefa, dono))
+
+
+def em_andamento(conn, tarefa):
+    return conn.execute("SELECT 1 FROM tarefas_travas WHERE tarefa = ? AND expira_em >= ?",
+                        (tarefa, _agora())).fetchone() is not None
+
+
+def _dono():
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+# Roda a tarefa com a trava já tomada por `dono`; registra e devolve a execução
+def _rodar(pool, tarefa, dono):
+    _, funcao = TAREFAS[tarefa]
+    inicio = time.perf_counter()
+    with pool.conexao() as conn:
+        execucao_id = conn.execute(
+            "INSERT INTO tarefas_execucoes (tarefa, iniciada_em, status) VALUES (?, ?, ?)",
+            (tarefa, _agora(), EM_ANDAMENTO),
+        ).lastrowid
+    status, detalhe = CONCLUIDA, None
+    try:
+        detalhe = funcao(pool)
+    except Exception as erro:
+        logger.exception("Falha na tarefa %s", tarefa)
+        status, detalhe = ERRO, f"{type(erro).__name__}: {erro}"
+    finally:
+        with pool.conexao() as conn:
+            conn.execute(
+                "UPDATE tarefas_execucoes SET concluida_em = ?, status = ?, segundos = ?, detalhe = ? WHERE id = ?",
+                (_agora(), status, time.perf_counter() - inicio, detalhe, execucao_id),
+            )
+            conn.execute('''
+                DELETE FROM tarefas_execucoes WHERE tarefa = ? AND id <= (
+                    SELECT id FROM tarefas_execucoes WHERE tarefa = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', (tarefa, tarefa, HISTORICO_POR_TAREFA))
+            liberar(conn, tarefa, dono)
+    return {"id": execucao_id, "tarefa": tarefa, "status": status, "segundos": time.perf_counter() - inicio,
+            "detalhe": detalhe}
+
+
+# Roda a tarefa agora, nesta thread; None se ela já está rodando em outro lugar
+def executar(pool, tarefa):
+    if tarefa not in TAREFAS:
+        raise ValueError(f"Tarefa desconhecida: {tarefa}")
+    dono = _dono()
+    with pool.conexao() as conn:
+        if not travar(conn, tarefa, dono):
+            return None
+    return _rodar(pool, tarefa, dono)
+
+
+# Roda a tarefa agora, numa thread própria; False se ela já está rodando
+def executar_em_segundo_plano(pool, tarefa):
+    if tarefa not in TAREFAS:
+        raise ValueError(f"Tarefa desconhecida: {tarefa}")
+    dono = _dono()
+    with pool.conexao() as conn:
+        if not travar(conn, tarefa, dono):
+            return False
+    threading.Thread(target=_rodar, args=(pool, tarefa, dono), name=f"tarefa {tarefa}", daemon=True).start()
+    return True
+
+
+# Tarefas cuja última execução (de qualquer processo) começou há mais que o
+# intervalo, ou que nunca rodaram
+def vencidas(conn, agora=None):
+    agora = agora or datetime.now()
+    ultimas = dict(conn.execute("SELECT tarefa, MAX(iniciada_em) FROM tarefas_execucoes GROUP BY tarefa"))
+    return [tarefa for tarefa, (intervalo, _) in TAREFAS.items()
+            if tarefa not in ultimas or datetime.fromisoformat(ultimas[tarefa]) + intervalo <= agora]
+
+
+# Última execução de cada tarefa, com o intervalo e se está rodando agora
+def situacao(conn):
+    ultimas = {}
+    cursor = conn.execute('''
+        SELECT e.* FROM tarefas_execucoes e
+        JOIN (SELECT tarefa, MAX(id) AS id FROM tarefas_execucoes GROUP BY tarefa) u ON u.id = e.id
+    ''')
+    colunas = [descricao[0] for descricao in cursor.description]
+    for linha in cursor:
+        execucao = dict(zip(colunas, linha))
+        ultimas[execucao["tarefa"]] = execucao
+    return [{"tarefa": tarefa, "intervalo": intervalo, "em_andamento": em_andamento(conn, tarefa),
+             "ultima": ultimas.get(tarefa)} for tarefa, (intervalo, _) in TAREFAS.items()]
+
+
+class Agendador:
+    # Thread que roda as tarefas vencidas, uma de cada vez
+    def __init__(self, pool, espera_inicial=ESPERA_INICIAL):
+        self.pool = pool
+        self.espera_inicial = espera_inicial
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name="agendador", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, espera=None):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(espera)
+
+    def verificar(self):
+        with self.pool.conexao() as conn:
+            pendentes = vencidas(conn)
+        for tarefa in pendentes:
+            if self._parar.is_set():
+                break
+            execucao = executar(self.pool, tarefa)
+            if execucao is not None:
+                logger.info("Tarefa %s: %s em %.1fs (%s)", tarefa, execucao["status"], execucao["segundos"],
+                            execucao["detalhe"])
+
+    def _laco(self):
+        espera = self.espera_inicial
+        while not self._parar.wait(espera.total_seconds()):
+            try:
+                self.verificar()
+            except Exception:
+                logger.exception("Falha no agendador")
+            espera = VERIFICACAO
+
+
+# Converte um banco existente para auto_vacuum incremental. O VACUUM
+# reescreve o arquivo inteiro e bloqueia o banco: rode com o app parado.
+def ativar_vacuum_incremental(caminho):
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def main():
+    from loja.conexao import DB_PATH, PoolConexoes
+    from loja.migracoes import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(description="Tarefas periódicas de manutenção da loja")
+    parser.add_argument("db", nargs="?", default=DB_PATH)
+    parser.add_argument("--agora", choices=list(TAREFAS), help="roda só esta tarefa, uma vez")
+    parser.add_argument("--listar", action="store_true", help="mostra a última execução de cada tarefa")
+    parser.add_argument("--ativar-vacuum-incremental", action="store_true",
+                        help="converte o banco para auto_vacuum incremental (VACUUM completo)")
+    args = parser.parse_args()
+
+    if args.ativar_vacuum_incremental:
+        print("auto_vacuum incremental ativado" if ativar_vacuum_incremental(args.db) else "falha ao ativar")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    pool = PoolConexoes(args.db)
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn)
+
+    if args.listar:
+        with pool.conexao() as conn:
+            for item in situacao(conn):
+                ultima = item["ultima"] or {}
+                print(f"{item['tarefa']:14} a cada {item['intervalo'].total_seconds() / 3600:>4g} h  "
+                      f"{'rodando' if item['em_andamento'] else ultima.get('status', 'nunca rodou'):12} "
+                      f"{ultima.get('iniciada_em') or '':20} {ultima.get('detalhe') or ''}")
+    elif args.agora:
+        execucao = executar(pool, args.agora)
+        print("já está rodando em outro processo" if execucao is None else
+              f"{execucao['status']} em {execucao['segundos']:.1f}s: {execucao['detalhe']}")
+    else:
+        agendador = Agendador(pool, espera_inicial=timedelta(0)).iniciar()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            agendador.parar()
+    pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# API HTTP/JSON para os caixas, ao lado da interface Streamlit.
+#
+# Um caixa só precisa buscar produto, achar o cliente e registrar a venda;
+# fazer isso por uma sessão Streamlit custa um websocket, a execução do
+# script inteiro a cada clique e a serialização de DataFrames. Esta API
+# (ASGI, Starlette) expõe as mesmas operações de loja.servico.Loja, com o
+# mesmo pool de conexões e o mesmo cache, sobre o mesmo banco.
+#
+# O SQLite é síncrono: cada chamada ao serviço roda no pool de threads do
+# Starlette para não travar o loop de eventos.
+#
+#   GET  /saude
+#   GET  /metricas                               (texto do Prometheus: tempo, SQL e linhas por função da Loja)
+#   GET  /produtos?busca=cerv&limite=20          (só com estoque; sem busca, só em catálogos pequenos)
+#   GET  /produtos/{id}
+#   GET  /clientes?busca=ana&limite=20
+#   GET  /clientes/{id}
+#   POST /pedidos  {"cliente_id": 1, "itens": [{"produto_id": 2, "quantidade": 3}]}
+#   POST /vendas/lote  {"vendas": [{"id": "<uuid>", "cliente_id": 1, "criada_em": "...", "itens": [...]}]}
+#   GET  /relatorios/resumo?inicio=2024-01-01&fim=2024-01-31
+#   GET  /relatorios/vendas_por_dia | top_produtos | top_clientes | por_categoria  (mesmos parâmetros)
+#
+# Também serve os arquivos do PWA (service worker, fila offline, manifest e
+# ícones): o service worker só controla páginas da mesma origem.
+#
+# Uso: python -m loja.api --porta 8000 [--db loja_bebidas.db]
+import argparse
+import json
+import math
+from contextlib import asynccontextmanager
+from datetime import date
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from loja import instrumentacao, pwa, relatorios, sincronizacao
+from loja.conexao import DB_PATH
+from loja.servico import LIMITE_BUSCA, Loja
+from loja.vendas import EstoqueInsuficiente
+
+# Maior inteiro que o SQLite aceita; ids acima disso não existem
+MAX_INTEIRO = 2 ** 63 - 1
+
+
+class RespostaJSON(JSONResponse):
+    # Valores numpy vindos dos DataFrames viram tipos nativos; NaN e infinito viram null
+    @staticmethod
+    def _nativo(valor):
+        if hasattr(valor, "item"):
+            valor = valor.item()
+        if isinstance(valor, float) and not math.isfinite(valor):
+            return None
+        if isinstance(valor, date):
+            return valor.isoformat()
+        return valor
+
+    # O json.dumps não chama o `default` para floats (nem numpy.float64, que
+    # herda de float): os não finitos são trocados antes de serializar
+    @classmethod
+    def _finitos(cls, valor):
+        if isinstance(valor, dict):
+            return {chave: cls._finitos(item) for chave, item in valor.items()}
+        if isinstance(valor, (list, tuple)):
+            return [cls._finitos(item) for item in valor]
+        if isinstance(valor, float) and not math.isfinite(valor):
+            return None
+        return valor
+
+    def render(self, conteudo):
+        return json.dumps(self._finitos(conteudo), ensure_ascii=False, separators=(",", ":"), allow_nan=False,
+                          default=self._nativo).encode("utf-8")
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _registros(df):
+    return [{coluna: RespostaJSON._nativo(valor) for coluna, valor in linha.items()}
+            for linha in df.to_dict("records")]
+
+
+def _inteiro(valor, nome, padrao=None, minimo=1, maximo=MAX_INTEIRO):
+    if valor is None or valor == "":
+        if padrao is None:
+            raise ErroRequisicao(f"Parâmetro obrigatório: {nome}")
+        return padrao
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError, OverflowError):
+        raise ErroRequisicao(f"{nome} deve ser um número inteiro")
+    if numero < minimo or numero > maximo:
+        raise ErroRequisicao(f"{nome} fora do intervalo permitido")
+    return numero
+
+
+# Id do caminho da URL; acima do que o SQLite guarda, não pode estar cadastrado
+def _id_caminho(request, nome, mensagem):
+    identificador = _inteiro(request.path_params[nome], nome, maximo=math.inf)
+    if identificador > MAX_INTEIRO:
+        raise ErroRequisicao(mensagem, 404)
+    return identificador
+
+
+# Período dos relatórios; sem parâmetros, todo o intervalo com vendas
+def _periodo(loja, parametros):
+    try:
+        inicio = date.fromisoformat(parametros["inicio"]) if parametros.get("inicio") else None
+        fim = date.fromisoformat(parametros["fim"]) if parametros.get("fim") else None
+    except ValueError:
+        raise ErroRequisicao("Datas devem estar no formato AAAA-MM-DD")
+    if inicio is None or fim is None:
+        intervalo = loja.intervalo_datas()
+        if intervalo is None:
+            return None
+        inicio, fim = inicio or intervalo[0], fim or intervalo[1]
+    if inicio > fim:
+        raise ErroRequisicao("inicio deve ser anterior a fim")
+    return inicio, fim
+
+
+# ------------------------------------------------------------------ rotas
+
+async def saude(request):
+    loja = request.app.state.loja
+    return RespostaJSON({"status": "ok", **await run_in_threadpool(loja.estatisticas)})
+
+
+async def metricas(request):
+    return PlainTextResponse(instrumentacao.texto_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def listar_produtos(request):
+    loja = request.app.state.loja
+    texto = request.query_params.get("busca", "")
+    limite = _inteiro(request.query_params.get("limite"), "limite", padrao=20, maximo=LIMITE_BUSCA)
+    opcoes = await run_in_threadpool(loja.opcoes_produtos, texto)
+    produtos = [{"id": produto_id, **produto} for produto_id, produto in list(opcoes.items())[:limite]]
+    return RespostaJSON({"produtos": produtos})
+
+
+async def obter_produto(request):
+    loja = request.app.state.loja
+    produto_id = _id_caminho(request, "produto_id", "Produto não encontrado")
+    produto = (await run_in_threadpool(loja.produtos_por_id, [produto_id])).get(produto_id)
+    if produto is None:
+        raise ErroRequisicao("Produto não encontrado", 404)
+    return RespostaJSON(produto)
+
+
+async def listar_clientes(request):
+    loja = request.app.state.loja
+    texto = request.query_params.get("busca", "")
+    limite = _inteiro(request.query_params.get("limite"), "limite", padrao=20, maximo=LIMITE_BUSCA)
+    opcoes = await run_in_threadpool(loja.opcoes_clientes, texto)
+    clientes = [{"id": cliente_id, **cliente} for cliente_id, cliente in list(opcoes.items())[:limite]]
+    return RespostaJSON({"clientes": clientes})
+
+
+async def obter_cliente(request):
+    loja = request.app.state.loja
+    cliente_id = _id_caminho(request, "cliente_id", "Cliente não encontrado")
+    cliente = await run_in_threadpool(loja.cliente, cliente_id)
+    if cliente is None:
+        raise ErroRequisicao("Cliente não encontrado", 404)
+    return RespostaJSON(cliente)
+
+
+async def registrar_pedido(request):
+    loja = request.app.state.loja
+    try:
+        corpo = await request.json()
+    except ValueError:
+        raise ErroRequisicao("Corpo da requisição deve ser JSON")
+    if not isinstance(corpo, dict) or not isinstance(corpo.get("itens"), list) or not corpo["itens"]:
+        raise ErroRequisicao("Informe cliente_id e uma lista de itens")
+    cliente_id = _inteiro(corpo.get("cliente_id"), "cliente_id")
+    itens = []
+    for item in corpo["itens"]:
+        if not isinstance(item, dict):
+            raise ErroRequisicao("Cada item precisa de produto_id e quantidade")
+        itens.append((_inteiro(item.get("produto_id"), "produto_id"), _inteiro(item.get("quantidade"), "quantidade")))
+
+    try:
+        pedido = await run_in_threadpool(loja.vender, cliente_id, itens)
+    except EstoqueInsuficiente as erro:
+        return RespostaJSON({"erro": str(erro), "produto_id": erro.produto_id,
+                             "solicitado": erro.solicitado, "disponivel": erro.disponivel}, status_code=409)
+    except ValueError as erro:
+        raise ErroRequisicao(str(erro), 422)
+    return RespostaJSON(pedido, status_code=201)
+
+
+# Vendas feitas com o caixa offline, reenviadas pela fila do service worker.
+# Sempre 200 com um resultado por venda; reenviar o mesmo lote é seguro.
+async def sincronizar_vendas(request):
+    loja = request.app.state.loja
+    try:
+        corpo = await request.json()
+    except ValueError:
+        raise ErroRequisicao("Corpo da requisição deve ser JSON")
+    lote = corpo.get("vendas") if isinstance(corpo, dict) else None
+    if not isinstance(lote, list):
+        raise ErroRequisicao("Informe a lista de vendas")
+    if len(lote) > sincronizacao.MAX_LOTE:
+        raise ErroRequisicao(f"No máximo {sincronizacao.MAX_LOTE} vendas por lote", 413)
+    return RespostaJSON({"resultados": await run_in_threadpool(loja.sincronizar_vendas, lote)})
+
+
+# Relatórios: nome -> função (loja, inicio, fim) -> dict ou lista de registros
+RELATORIOS = {
+    "resumo": lambda loja, inicio, fim: relatorios.metricas(loja.vendas_por_dia(inicio, fim)),
+    "vendas_por_dia": lambda loja, inicio, fim: _registros(loja.vendas_por_dia(inicio, fim)),
+    "top_produtos": lambda loja, inicio, fim: _registros(relatorios.top_produtos(loja.vendas_por_produto(inicio, fim))),
+    "top_clientes": lambda loja, inicio, fim: _registros(loja.top_clientes(inicio, fim)),
+    "por_categoria": lambda loja, inicio, fim: _registros(relatorios.por_categoria(loja.vendas_por_produto(inicio, fim))),
+}
+
+
+async def relatorio(request):
+    loja = request.app.state.loja
+    nome = request.path_params["nome"]
+    if nome not in RELATORIOS:
+        raise ErroRequisicao("Relatório não encontrado", 404)
+
+    def gerar():
+        periodo = _periodo(loja, request.query_params)
+        if periodo is None:
+            return {"inicio": None, "fim": None, "dados": None}
+        inicio, fim = periodo
+        return {"inicio": inicio, "fim": fim, "dados": RELATORIOS[nome](loja, inicio, fim)}
+
+    return RespostaJSON(await run_in_threadpool(gerar))
+
+
+async def tratar_erro(request, erro):
+    return RespostaJSON({"erro": str(erro)}, status_code=erro.status)
+
+
+def _arquivo_pwa(nome):
+    async def servir(request):
+        # no-cache: o navegador sempre revalida (o service worker guarda as
+        # próprias cópias, versionadas pelo hash do conteúdo)
+        cabecalhos = {"Cache-Control": "no-cache"}
+        if nome == "sw.js":
+            return Response(pwa.service_worker(), media_type=pwa.ARQUIVOS[nome], headers=cabecalhos)
+        return FileResponse(pwa.caminho(nome), media_type=pwa.ARQUIVOS[nome], headers=cabecalhos)
+    return servir
+
+
+def criar_app(caminho=DB_PATH):
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        app.state.loja = Loja(caminho)
+        app.state.loja.inicializar()
+        app.state.loja.iniciar_agendador()
+        yield
+        app.state.loja.fechar()
+
+    return Starlette(
+        routes=[
+            Route("/saude", saude),
+            Route("/metricas", metricas),
+            Route("/produtos", listar_produtos),
+            Route("/produtos/{produto_id}", obter_produto),
+            Route("/clientes", listar_clientes),
+            Route("/clientes/{cliente_id}", obter_cliente),
+            Route("/pedidos", registrar_pedido, methods=["POST"]),
+            Route("/vendas/lote", sincronizar_vendas, methods=["POST"]),
+            Route("/relatorios/{nome}", relatorio),
+            *[Route(f"/{nome}", _arquivo_pwa(nome)) for nome in pwa.ARQUIVOS],
+        ],
+        exception_handlers={ErroRequisicao: tratar_erro},
+        lifespan=ciclo_de_vida,
+    )
+
+
+# Para servidores ASGI: uvicorn loja.api:app
+app = criar_app()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP/JSON da loja para os caixas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    uvicorn.run(criar_app(args.db), host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# Arquivo das vendas antigas: a tabela vendas guarda só os meses recentes.
+#
+# arquivar() move as vendas de antes de MESES_QUENTES meses (contados do
+# primeiro dia do mês atual) para um banco SQLite por ano, vendas_<ano>.db
+# na pasta do arquivo (LOJA_ARQUIVO ou <pasta do banco>/arquivo), com as
+# mesmas colunas e o índice de data_hora da tabela quente. Os anos
+# arquivados ficam em arquivos_vendas (migração 15), e o maior `ate` deles é
+# a fronteira: as vendas com data_hora antes dela são lidas do arquivo, as
+# demais da tabela vendas. A fronteira só avança depois que a cópia do ano
+# foi gravada, e a tabela quente só perde as linhas que já estão no arquivo,
+# então cada venda é lida de um lugar só, inclusive no meio de uma mudança
+# ou depois de uma interrompida (que a próxima execução completa).
+#
+# Os resumos diários (loja/resumo.py) não mudam: os gatilhos só somam no
+# INSERT, e apagar as vendas arquivadas não os toca. Métricas, rankings,
+# previsões e alertas seguem sem abrir arquivo nenhum. Quem lê linhas de
+# vendas (histórico, exportação, carga em DataFrame, reconstrução dos
+# resumos) usa fonte_vendas(): com o período todo depois da fronteira ela é
+# a própria tabela vendas, sem custo extra; se o período passa da
+# fronteira, anexa (ATTACH) só os anos necessários e devolve a união deles.
+#
+# Uma venda lançada depois com data anterior à fronteira (importação) entra
+# nos resumos na hora, mas só aparece no histórico quando a próxima execução
+# a arquivar.
+#
+# Roda uma vez por dia pelo agendador (tarefa "arquivo") ou:
+#     python -m loja.arquivo loja_bebidas.db --meses 12
+#     python -m loja.arquivo loja_bebidas.db --listar
+import argparse
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+
+MESES_QUENTES = 12
+# Vendas apagadas da tabela quente por transação: cada lote segura a
+# escrita por pouco tempo, e os caixas gravam entre um e outro
+LOTE_REMOCAO = 5000
+
+
+def pasta_arquivo(caminho):
+    return os.environ.get("LOJA_ARQUIVO") or os.path.join(os.path.dirname(os.path.abspath(caminho)), "arquivo")
+
+
+def _caminho_banco(conn):
+    return next(linha[2] for linha in conn.execute("PRAGMA database_list") if linha[1] == "main")
+
+
+def _colunas(conn, esquema="main"):
+    return [linha[1] for linha in conn.execute(f"PRAGMA {esquema}.table_info(vendas)")]
+
+
+# Primeiro dia do mês, `meses` meses antes do mês de `hoje`
+def corte(meses=MESES_QUENTES, hoje=None):
+    hoje = hoje or date.today()
+    indice = hoje.year * 12 + hoje.month - 1 - meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+# data_hora a partir da qual as vendas estão na tabela quente; None sem arquivo
+def fronteira(conn):
+    return conn.execute("SELECT MAX(ate) FROM arquivos_vendas").fetchone()[0]
+
+
+# Anos arquivados, do mais antigo para o mais recente
+def anos(conn):
+    cursor = conn.execute("SELECT * FROM arquivos_vendas ORDER BY ano")
+    colunas = [descricao[0] for descricao in cursor.description]
+    return [dict(zip(colunas, linha)) for linha in cursor]
+
+
+# Primeira e última data_hora arquivadas, ou (None, None)
+def intervalo(conn):
+    return conn.execute("SELECT MIN(primeira), MAX(ultima) FROM arquivos_vendas").fetchone()
+
+
+def _anexar(conn, ano, arquivo):
+    nome = f"arquivo_{ano}"
+    if nome not in {linha[1] for linha in conn.execute("PRAGMA database_list")}:
+        conn.execute(f"ATTACH DATABASE ? AS {nome}", (os.path.join(pasta_arquivo(_caminho_banco(conn)), arquivo),))
+    return nome
+
+
+def _desanexar(conn, nome):
+    try:
+        conn.execute(f"DETACH DATABASE {nome}")
+    except sqlite3.OperationalError:
+        # Uma leitura ainda aberta (blocos não consumidos até o fim) segura o
+        # banco anexado; ele fica na conexão e o próximo _anexar o reaproveita
+        pass
+
+
+# Expressão para usar no FROM no lugar de vendas, com as vendas de data_hora
+# em [inicio, fim) (textos ISO; None = sem limite), anexando os anos
+# arquivados necessários enquanto o bloco `with` durar. A conexão não pode
+# estar numa transação (ATTACH não roda dentro de uma). Os filtros de data
+# continuam com quem consulta: o SQLite os leva para dentro de cada parte da
+# união, que usa o índice de data_hora da própria tabela.
+@contextmanager
+def fonte_vendas(conn, inicio=None, fim=None):
+    limite = fronteira(conn)
+    if limite is None or (inicio is not None and inicio >= limite):
+        yield "vendas"
+        return
+    necessarios = [ano for ano in anos(conn)
+                   if (inicio is None or inicio < ano["ate"]) and (fim is None or fim > f"{ano['ano']:04d}-01-01")]
+    if not necessarios:
+        yield "vendas"
+        return
+    maximo = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(necessarios) > maximo:
+        raise ValueError(f"O período passa por {len(necessarios)} anos arquivados; "
+                         f"o SQLite anexa no máximo {maximo} de uma vez. Escolha um período menor.")
+    nomes = [_anexar(conn, ano["ano"], ano["arquivo"]) for ano in necessarios]
+    try:
+        colunas = _colunas(conn)
+        partes = []
+        if fim is None or fim > limite:
+            partes.append(f"SELECT {', '.join(colunas)} FROM main.vendas "
+                          f"WHERE (data_hora >= '{limite}' OR data_hora IS NULL)")
+        for nome in nomes:
+            existentes = _colunas(conn, nome)
+            if len(nomes) == 1 and not partes and existentes == colunas:
+                # Período todo num ano arquivado: a própria tabela, para o
+                # ORDER BY ... LIMIT do histórico seguir o índice de data_hora
+                yield f"{nome}.vendas"
+                return
+            # Colunas criadas depois do arquivamento vêm vazias
+            lista = ", ".join(coluna if coluna in existentes else f"NULL AS {coluna}" for coluna in colunas)
+            partes.append(f"SELECT {lista} FROM {nome}.vendas WHERE data_hora < '{limite}'")
+        yield "(" + " UNION ALL ".join(partes) + ")"
+    finally:
+        for nome in nomes:
+            _desanexar(conn, nome)
+
+
+# Tabela vendas do arquivo com as colunas da tabela quente (sem as chaves
+# estrangeiras: produtos e clientes não existem ali)
+def _criar_tabela(conn, nome):
+    conn.execute(f"PRAGMA {nome}.journal_mode=WAL")
+    definicoes = [(linha[1], f"{linha[2]} PRIMARY KEY" if linha[5] else linha[2])
+                  for linha in conn.execute("PRAGMA main.table_info(vendas)")]
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {nome}.vendas "
+                 f"({', '.join(f'{coluna} {tipo}' for coluna, tipo in definicoes)})")
+    existentes = set(_colunas(conn, nome))
+    for coluna, tipo in definicoes:
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE {nome}.vendas ADD COLUMN {coluna} {tipo}")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {nome}.idx_vendas_relatorio "
+                 "ON vendas (data_hora, produto_id, cliente_id, quantidade, valor_total)")
+
+
+# Move as vendas de data_hora em [inicio, fim) para o arquivo do ano
+def _arquivar_ano(conn, ano, inicio, fim):
+    arquivo = f"vendas_{ano}.db"
+    nome = _anexar(conn, ano, arquivo)
+    try:
+        _criar_tabela(conn, nome)
+        colunas = ", ".join(_colunas(conn))
+        # 1. Cópia: escreve só no arquivo, os caixas seguem gravando em vendas.
+        # Uma linha já copiada por uma execução interrompida é ignorada.
+        conn.execute(f'''
+            INSERT OR IGNORE INTO {nome}.vendas ({colunas})
+            SELECT {colunas} FROM main.vendas WHERE data_hora >= ? AND data_hora < ?
+        ''', (inicio, fim))
+        # 2. Fronteira: daqui em diante estas vendas são lidas do arquivo
+        linhas, primeira, ultima = conn.execute(
+            f"SELECT COUNT(*), MIN(data_hora), MAX(data_hora) FROM {nome}.vendas").fetchone()
+        conn.execute('''
+            INSERT INTO arquivos_vendas (ano, arquivo, ate, primeira, ultima, linhas, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (ano) DO UPDATE SET ate = MAX(ate, excluded.ate), primeira = excluded.primeira,
+                ultima = excluded.ultima, linhas = excluded.linhas, atualizado_em = excluded.atualizado_em
+        ''', (ano, arquivo, fim, primeira, ultima, linhas, datetime.now().isoformat(timespec="seconds")))
+        # 3. Remoção da tabela quente, em lotes, só do que está no arquivo
+        movidas = 0
+        while True:
+            cursor = conn.execute(f'''
+                DELETE FROM main.vendas WHERE id IN (
+                    SELECT v.id FROM main.vendas v JOIN {nome}.vendas a ON a.id = v.id
+                    WHERE v.data_hora >= ? AND v.data_hora < ?
+                    LIMIT ?
+                )
+            ''', (inicio, fim, LOTE_REMOCAO))
+            if cursor.rowcount <= 0:
+                break
+            movidas += cursor.rowcount
+    finally:
+        _desanexar(conn, nome)
+    return movidas
+
+
+# Move para o arquivo as vendas de antes de corte(meses, hoje) (ou da
+# fronteira atual, se ela já está depois). Retorna {ano: vendas movidas}.
+def arquivar(pool, meses=MESES_QUENTES, hoje=None):
+    movidas = {}
+    with pool.conexao() as conn:
+        ate = max(corte(meses, hoje).isoformat(), fronteira(conn) or "")
+        primeira = conn.execute("SELECT MIN(data_hora) FROM vendas").fetchone()[0]
+        if primeira is None or primeira >= ate:
+            return movidas
+        os.makedirs(pasta_arquivo(pool.caminho), exist_ok=True)
+        for ano in range(int(primeira[:4]), int(ate[:4]) + 1):
+            inicio, fim = f"{ano:04d}-01-01", min(f"{ano + 1:04d}-01-01", ate)
+            if conn.execute("SELECT 1 FROM vendas WHERE data_hora >= ? AND data_hora < ? LIMIT 1",
+                            (inicio, fim)).fetchone():
+                movidas[ano] = _arquivar_ano(conn, ano, inicio, fim)
+    return movidas
+
+
+# Copia para `destino` os anos arquivados que mudaram desde a última cópia
+# (o arquivo só muda quando arquivar() roda). Retorna os anos copiados.
+def copiar(pool, destino):
+    copiados = []
+    with pool.conexao() as conn:
+        arquivados = anos(conn)
+    pasta = pasta_arquivo(pool.caminho)
+    for ano in arquivados:
+        alvo = os.path.join(destino, ano["arquivo"])
+        if os.path.exists(alvo) and os.path.getmtime(alvo) >= datetime.fromisoformat(ano["atualizado_em"]).timestamp():
+            continue
+        os.makedirs(destino, exist_ok=True)
+        origem = sqlite3.connect(os.path.join(pasta, ano["arquivo"]))
+        copia = sqlite3.connect(alvo + ".parcial")
+        try:
+            origem.backup(copia)
+        finally:
+            copia.close()
+            origem.close()
+        os.replace(alvo + ".parcial", alvo)
+        copiados.append(ano["ano"])
+    return copiados
+
+
+def main():
+    from loja.conexao import DB_PATH, PoolConexoes
+    from loja.migracoes import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(description="Move as vendas antigas para o arquivo por ano")
+    parser.add_argument("db", nargs="?", default=DB_PATH)
+    parser.add_argument("--meses", type=int, default=MESES_QUENTES, help="meses mantidos na tabela vendas")
+    parser.add_argument("--listar", action="store_true", help="mostra os anos arquivados")
+    args = parser.parse_args()
+
+    pool = PoolConexoes(args.db)
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn)
+    if not args.listar:
+        for ano, movidas in arquivar(pool, args.meses).items():
+            print(f"{ano}: {movidas} vendas movidas")
+    with pool.conexao() as conn:
+        for ano in anos(conn):
+            print(f"{ano['arquivo']:16} {ano['linhas']:>10} vendas  "
+                  f"{ano['primeira'] or '':20} {ano['ultima'] or '':20} até {ano['ate']}")
+        print(f"fronteira: {fronteira(conn) or 'nenhuma'}")
+    pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
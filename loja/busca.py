@@ -0,0 +1,52 @@
+# Busca por prefixo nos índices FTS5 de produtos e clientes (migração 10).
+#
+# "agu min" vira a consulta FTS '"agu"* "min"*': cada palavra digitada é um
+# prefixo e todas precisam aparecer. Acentos e maiúsculas são ignorados pelo
+# tokenizador, e os resultados vêm ordenados por relevância (bm25).
+import re
+
+import pandas as pd
+
+
+# Converte o texto digitado em uma consulta FTS5, ou None se não houver
+# nenhuma palavra pesquisável
+def consulta_prefixo(texto):
+    termos = re.findall(r"\w+", texto or "")
+    if not termos:
+        return None
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+# Condição SQL para filtrar `tabela` pelos ids que casam com a busca
+def filtro_ids(tabela, texto):
+    consulta = consulta_prefixo(texto)
+    if consulta is None:
+        return None, []
+    return f"id IN (SELECT rowid FROM {tabela}_busca WHERE {tabela}_busca MATCH ?)", [consulta]
+
+
+def buscar_produtos(conn, texto, limite=20, somente_disponiveis=False):
+    consulta = consulta_prefixo(texto)
+    if consulta is None:
+        return pd.DataFrame(columns=["id", "nome", "categoria", "preco", "estoque"])
+    estoque = "AND p.estoque > 0" if somente_disponiveis else ""
+    return pd.read_sql_query(f'''
+        SELECT p.id, p.nome, p.categoria, p.preco, p.estoque
+        FROM produtos_busca b JOIN produtos p ON p.id = b.rowid
+        WHERE produtos_busca MATCH ? {estoque}
+        ORDER BY b.rank
+        LIMIT ?
+    ''', conn, params=(consulta, limite))
+
+
+def buscar_clientes(conn, texto, limite=20):
+    consulta = consulta_prefixo(texto)
+    if consulta is None:
+        return pd.DataFrame(columns=["id", "nome", "telefone"])
+    return pd.read_sql_query('''
+        SELECT c.id, c.nome, c.telefone
+        FROM clientes_busca b JOIN clientes c ON c.id = b.rowid
+        WHERE clientes_busca MATCH ?
+        ORDER BY b.rank
+        LIMIT ?
+    ''', conn, params=(consulta, limite))
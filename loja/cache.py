@@ -0,0 +1,80 @@
+# Cache de resultados de consultas compartilhado entre as sessões.
+#
+# Cada entrada guarda a geração das tabelas de que depende (tabela geracoes,
+# incrementada por gatilhos a cada INSERT/UPDATE/DELETE — migração 8). Se
+# alguma tabela mudou desde que o resultado foi guardado, ele é descartado,
+# então uma escrita invalida o cache na hora, venha de onde vier.
+import threading
+import time
+from collections import OrderedDict
+
+
+# Geração atual de cada tabela monitorada
+def geracoes(conn, tabelas):
+    marcadores = ", ".join("?" * len(tabelas))
+    versoes = dict(conn.execute(f"SELECT tabela, versao FROM geracoes WHERE tabela IN ({marcadores})", tabelas))
+    return tuple(versoes.get(tabela, 0) for tabela in tabelas)
+
+
+class CacheConsultas:
+    # LRU com validade (ttl, em segundos) e limite de entradas.
+    # Os valores são compartilhados entre sessões: quem lê não deve alterá-los.
+    def __init__(self, max_itens=64, ttl=600):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        self.expiracoes = 0
+        self.remocoes = 0
+
+    # Devolve o resultado em cache de `chave` ou executa `carregar(conn)`.
+    # `tabelas` são as tabelas lidas pela consulta.
+    def consultar(self, pool, chave, tabelas, carregar):
+        tabelas = tuple(tabelas)
+        with pool.conexao() as conn:
+            versoes = geracoes(conn, tabelas)
+            agora = time.monotonic()
+            with self._lock:
+                item = self._itens.get(chave)
+                if item is not None:
+                    versoes_item, expira_em, valor = item
+                    if versoes_item == versoes and expira_em > agora:
+                        self._itens.move_to_end(chave)
+                        self.acertos += 1
+                        return valor
+                    del self._itens[chave]
+                    if versoes_item != versoes:
+                        self.invalidacoes += 1
+                    else:
+                        self.expiracoes += 1
+                self.falhas += 1
+            
+            valor = carregar(conn)
+        
+        with self._lock:
+            self._itens[chave] = (versoes, time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.remocoes += 1
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "invalidacoes": self.invalidacoes,
+                "expiracoes": self.expiracoes,
+                "remocoes": self.remocoes,
+            }
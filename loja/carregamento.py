@@ -0,0 +1,177 @@
+# Carga de vendas, produtos e clientes em DataFrames compactos.
+#
+# Com o SELECT * direto no pandas cada nome de produto e de cliente vira
+# uma string por linha, inteiros vêm como int64 e as datas como texto, que
+# cada relatório converte de novo com pd.to_datetime. Aqui só as colunas
+# pedidas saem do banco e cada uma recebe o tipo certo uma vez, na carga:
+#
+#   categoria  texto muito repetido (nomes nas vendas, categorias)
+#   hora       HH:MM:SS, quase um valor por linha: como categoria ficaria
+#              com um rótulo por venda, então vira string do pyarrow
+#   inteiro    int32 quando todos os valores cabem, senão o que veio
+#   data       texto ISO convertido para datetime64
+#   real       float64 (valores em dinheiro são somados nos relatórios;
+#              float32 perderia centavos)
+#   texto      como veio (com arrow=True, string do pyarrow)
+#
+# Mesmo o DataFrame inteiro é lido em blocos, compactados um a um e depois
+# juntados: assim o pico de memória é o resultado compacto mais um bloco de
+# objetos Python, e não a tabela inteira como tuplas. Com tamanho_bloco o
+# resultado é um iterador de DataFrames, para percorrer tabelas grandes sem
+# tê-las inteiras na memória.
+#
+# Em vendas, a leitura passa pelo arquivo dos anos antigos (loja/arquivo.py)
+# quando o período (ou a falta dele) chega antes da fronteira.
+from contextlib import nullcontext
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from loja import arquivo
+
+# Linhas por bloco na leitura interna
+TAMANHO_BLOCO = 100_000
+
+COLUNAS = {
+    "vendas": {
+        "id": "inteiro", "pedido_id": "inteiro", "produto_id": "inteiro", "cliente_id": "inteiro",
+        "nome_produto": "categoria", "nome_cliente": "categoria", "quantidade": "inteiro",
+        "valor_unitario": "real", "valor_total": "real",
+        "data_venda": "data", "hora_venda": "hora", "data_hora": "data",
+    },
+    "produtos": {
+        "id": "inteiro", "nome": "texto", "categoria": "categoria", "preco": "real", "estoque": "inteiro",
+        "ponto_pedido": "inteiro", "data_cadastro": "data",
+    },
+    "clientes": {
+        "id": "inteiro", "nome": "texto", "telefone": "texto", "data_cadastro": "data",
+    },
+}
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _inteiro(serie, arrow):
+    if serie.dtype.kind != "i" or serie.empty:
+        return serie
+    if serie.min() >= _INT32.min and serie.max() <= _INT32.max:
+        return serie.astype("int32[pyarrow]" if arrow else "int32")
+    return serie
+
+
+# Aplica os tipos de COLUNAS[tabela] às colunas conhecidas de `df`
+def compactar(df, tabela, arrow=False):
+    tipos = COLUNAS[tabela]
+    for coluna in df.columns:
+        tipo = tipos.get(coluna)
+        if tipo == "categoria":
+            df[coluna] = df[coluna].astype("category")
+        elif tipo == "hora" and not arrow:
+            df[coluna] = df[coluna].astype("string[pyarrow]")
+        elif tipo == "inteiro":
+            df[coluna] = _inteiro(df[coluna], arrow)
+        elif tipo == "data":
+            df[coluna] = pd.to_datetime(df[coluna], format="ISO8601")
+    return df
+
+
+def _colunas(tabela, colunas):
+    if tabela not in COLUNAS:
+        raise ValueError(f"Tabela desconhecida: {tabela}")
+    colunas = list(COLUNAS[tabela]) if colunas is None else list(colunas)
+    desconhecidas = [coluna for coluna in colunas if coluna not in COLUNAS[tabela]]
+    if desconhecidas or not colunas:
+        raise ValueError(f"Colunas inválidas para {tabela}: {desconhecidas or colunas}")
+    return colunas
+
+
+# Mesmo intervalo [início, fim + 1 dia) dos relatórios, em data_hora; o
+# lado que vier None fica sem limite
+def _limites(data_inicio, data_fim):
+    return (data_inicio.isoformat() if data_inicio is not None else None,
+            (data_fim + timedelta(days=1)).isoformat() if data_fim is not None else None)
+
+
+def _consulta(fonte, colunas, limites):
+    # Pelo índice de data_hora
+    filtros = [filtro for filtro, limite in zip(("data_hora >= ?", "data_hora < ?"), limites) if limite is not None]
+    sql = f"SELECT {', '.join(colunas)} FROM {fonte}"
+    if filtros:
+        sql += " WHERE " + " AND ".join(filtros)
+    return sql + " ORDER BY id", tuple(limite for limite in limites if limite is not None)
+
+
+# Tabela para o FROM; em vendas, com os anos arquivados que o período pedir
+def _fonte(conn, tabela, limites):
+    return arquivo.fonte_vendas(conn, *limites) if tabela == "vendas" else nullcontext(tabela)
+
+
+def _opcoes(arrow):
+    return {"dtype_backend": "pyarrow"} if arrow else {}
+
+
+def _blocos(pool, tabela, colunas, limites, arrow, tamanho_bloco):
+    with pool.conexao() as conn, _fonte(conn, tabela, limites) as fonte:
+        sql, parametros = _consulta(fonte, colunas, limites)
+        for bloco in pd.read_sql_query(sql, conn, params=parametros, chunksize=tamanho_bloco, **_opcoes(arrow)):
+            yield compactar(bloco, tabela, arrow)
+
+
+def _vazio(pool, tabela, colunas, arrow):
+    with pool.conexao() as conn:
+        sql, parametros = _consulta(tabela, colunas, (None, None))
+        return compactar(pd.read_sql_query(sql + " LIMIT 0", conn, params=parametros, **_opcoes(arrow)), tabela, arrow)
+
+
+# Categorias de um bloco só com NULL vêm como object, e as dos outros como
+# str; o union_categoricals exige o mesmo tipo em todos
+def _mesmo_tipo(partes):
+    tipo = next((parte.cat.categories.dtype for parte in partes if len(parte.cat.categories)), None)
+    if tipo is None:
+        return partes
+    return [parte if parte.cat.categories.dtype == tipo else parte.cat.set_categories(parte.cat.categories.astype(tipo))
+            for parte in partes]
+
+
+# Junta os blocos compactados; categorias diferentes entre blocos viram a
+# união delas (pd.concat transformaria a coluna em texto de novo)
+def _juntar(blocos):
+    if len(blocos) == 1:
+        return blocos[0]
+    colunas = {}
+    for coluna in blocos[0].columns:
+        partes = [bloco[coluna] for bloco in blocos]
+        if all(isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes):
+            colunas[coluna] = union_categoricals(_mesmo_tipo(partes))
+        else:
+            colunas[coluna] = pd.concat(partes, ignore_index=True)
+    return pd.DataFrame(colunas)
+
+
+# Lê `colunas` (todas, se None) de uma tabela. Em vendas, data_inicio e
+# data_fim limitam o período (só um deles deixa o outro lado aberto).
+# arrow=True usa tipos do pyarrow.
+def carregar(pool, tabela, colunas=None, data_inicio=None, data_fim=None, arrow=False, tamanho_bloco=None):
+    if tabela != "vendas" and (data_inicio is not None or data_fim is not None):
+        raise ValueError("Filtro de período só existe para vendas")
+    colunas, limites = _colunas(tabela, colunas), _limites(data_inicio, data_fim)
+    if tamanho_bloco is not None:
+        return _blocos(pool, tabela, colunas, limites, arrow, tamanho_bloco)
+    blocos = list(_blocos(pool, tabela, colunas, limites, arrow, TAMANHO_BLOCO))
+    if not blocos:
+        return _vazio(pool, tabela, colunas, arrow)
+    return _juntar(blocos)
+
+
+def carregar_vendas(pool, colunas=None, data_inicio=None, data_fim=None, arrow=False, tamanho_bloco=None):
+    return carregar(pool, "vendas", colunas, data_inicio, data_fim, arrow, tamanho_bloco)
+
+
+def carregar_produtos(pool, colunas=None, arrow=False):
+    return carregar(pool, "produtos", colunas, arrow=arrow)
+
+
+def carregar_clientes(pool, colunas=None, arrow=False):
+    return carregar(pool, "clientes", colunas, arrow=arrow)
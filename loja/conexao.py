@@ -0,0 +1,106 @@
+# Gerenciamento de conexões SQLite compartilhadas entre as sessões do app
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from loja import instrumentacao
+
+DB_PATH = os.environ.get("LOJA_DB", "loja_bebidas.db")
+
+# PRAGMAs aplicados em toda conexão nova
+PRAGMAS = (
+    # Só vale para um banco novo (antes da primeira tabela); nos já
+    # existentes, ver "python -m loja.agendador --ativar-vacuum-incremental"
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",      # ~20 MB de page cache por conexão
+    "PRAGMA mmap_size=268435456",    # 256 MB mapeados em memória
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PoolConexoes:
+    # Pool de conexões reutilizáveis entre threads (cada sessão do Streamlit
+    # roda em uma thread própria). Uma conexão nunca é usada por duas threads
+    # ao mesmo tempo: ela sai do pool, é usada e volta.
+    def __init__(self, caminho=DB_PATH, max_ociosas=8):
+        self.caminho = caminho
+        self.max_ociosas = max_ociosas
+        self._ociosas = []
+        self._lock = threading.Lock()
+        self.abertas = 0
+        self.reutilizadas = 0
+        self.em_uso = 0
+
+    def _abrir(self):
+        conn = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def obter(self):
+        with self._lock:
+            if self._ociosas:
+                self.reutilizadas += 1
+                self.em_uso += 1
+                return self._ociosas.pop()
+            self.abertas += 1
+            self.em_uso += 1
+        return self._abrir()
+
+    def devolver(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self.em_uso -= 1
+            if len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append(conn)
+                return
+        conn.close()
+
+    # Dentro de uma etapa medida (loja.instrumentacao) conta os comandos SQL
+    # e as linhas escritas com esta conexão
+    @contextmanager
+    def conexao(self):
+        conn = self.obter()
+        medindo = bool(instrumentacao.etapas_abertas())
+        if medindo:
+            conn.set_trace_callback(instrumentacao.comando_sql)
+            escritas = conn.total_changes
+        try:
+            yield conn
+        finally:
+            if medindo:
+                conn.set_trace_callback(None)
+                instrumentacao.somar_linhas_escritas(conn.total_changes - escritas)
+            self.devolver(conn)
+
+    # Transação explícita; use modo="IMMEDIATE" para reservar a escrita já no início
+    @contextmanager
+    def transacao(self, modo="DEFERRED"):
+        with self.conexao() as conn:
+            conn.execute(f"BEGIN {modo}")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "abertas": self.abertas,
+                "reutilizadas": self.reutilizadas,
+                "em_uso": self.em_uso,
+                "ociosas": len(self._ociosas),
+            }
+
+    def fechar(self):
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn in ociosas:
+            conn.close()
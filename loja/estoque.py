@@ -0,0 +1,83 @@
+# Alertas de estoque: produtos no ponto de pedido ou abaixo dele, com o
+# ritmo de venda recente, os dias de cobertura e quanto comprar.
+#
+# Cada produto tem o seu ponto de pedido (migração 12). A lista de alertas
+# sai do índice parcial idx_produtos_estoque_baixo, que só contém os
+# produtos em alerta e é mantido pelo próprio SQLite a cada baixa de estoque
+# da venda e a cada reposição: nenhuma tela percorre o catálogo inteiro.
+#
+# O ritmo de venda vem dos resumos diários (vendas_dia_produto) dos últimos
+# JANELA_LONGA dias, só dos produtos em alerta: uma tabela dia × produto,
+# com zero nos dias sem venda, e as médias móveis de JANELA_CURTA e
+# JANELA_LONGA dias calculadas de uma vez para todos os produtos. Cobertura
+# e sugestão de compra usam a maior das duas médias, para não superestimar
+# a cobertura de um produto que começou a vender mais.
+import math
+from datetime import date, timedelta
+
+import pandas as pd
+
+JANELA_CURTA = 7
+JANELA_LONGA = 28
+# Dias de venda que a sugestão de compra procura cobrir, além do ponto de pedido
+COBERTURA_ALVO = 14
+
+
+# Unidades vendidas por dia (médias curta e longa) dos produtos em alerta,
+# no período que termina em `referencia`
+def velocidades(conn, referencia):
+    inicio = referencia - timedelta(days=JANELA_LONGA - 1)
+    diario = pd.read_sql_query('''
+        SELECT dia, produto_id, SUM(quantidade) AS quantidade
+        FROM vendas_dia_produto
+        WHERE dia >= ? AND dia <= ?
+          AND produto_id IN (SELECT id FROM produtos WHERE estoque <= ponto_pedido)
+        GROUP BY dia, produto_id
+    ''', conn, params=(inicio.isoformat(), referencia.isoformat()))
+    dias = pd.date_range(inicio, referencia).strftime("%Y-%m-%d")
+    tabela = diario.pivot(index="dia", columns="produto_id", values="quantidade").reindex(dias).fillna(0)
+    return pd.DataFrame({
+        "velocidade_curta": tabela.rolling(JANELA_CURTA, min_periods=1).mean().iloc[-1],
+        "velocidade_longa": tabela.rolling(JANELA_LONGA, min_periods=1).mean().iloc[-1],
+    })
+
+
+# Produtos em alerta, do menor estoque para o maior, com velocidade de
+# venda (unidades/dia), dias de cobertura (vazio se não vendeu no período)
+# e sugestão de compra
+def alertas(conn, referencia=None):
+    referencia = referencia or date.today()
+    df = pd.read_sql_query('''
+        SELECT id, nome, categoria, estoque, ponto_pedido
+        FROM produtos
+        WHERE estoque <= ponto_pedido
+        ORDER BY estoque, nome
+    ''', conn)
+    if df.empty:
+        return df.assign(velocidade_curta=[], velocidade_longa=[], dias_cobertura=[], sugestao_compra=[])
+
+    df = df.join(velocidades(conn, referencia), on="id")
+    df[["velocidade_curta", "velocidade_longa"]] = df[["velocidade_curta", "velocidade_longa"]].fillna(0.0)
+    velocidade = df[["velocidade_curta", "velocidade_longa"]].max(axis=1)
+    df["dias_cobertura"] = (df["estoque"] / velocidade.where(velocidade > 0)).round(1)
+    alvo = (velocidade * COBERTURA_ALVO).apply(math.ceil) + df["ponto_pedido"]
+    df["sugestao_compra"] = (alvo - df["estoque"]).clip(lower=0).astype(int)
+    return df
+
+
+# Totais para a página inicial
+def resumo(alertas):
+    cobertura = alertas["dias_cobertura"]
+    return {
+        "em_alerta": len(alertas),
+        "sem_estoque": int((alertas["estoque"] <= 0).sum()),
+        "acabam_na_semana": int((cobertura < JANELA_CURTA).sum()),
+    }
+
+
+# Altera o ponto de pedido de um produto; retorna False se ele não existe
+def definir_ponto_pedido(conn, produto_id, ponto_pedido):
+    if ponto_pedido < 0:
+        raise ValueError("O ponto de pedido não pode ser negativo")
+    cursor = conn.execute("UPDATE produtos SET ponto_pedido = ? WHERE id = ?", (int(ponto_pedido), int(produto_id)))
+    return cursor.rowcount > 0
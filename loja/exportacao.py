@@ -0,0 +1,172 @@
+# Exportação do histórico de vendas e dos relatórios em CSV, XLSX e Parquet.
+#
+# O histórico é lido do SQLite com fetchmany em blocos de tamanho fixo e
+# cada bloco vai direto para o arquivo (csv.writer, openpyxl em modo
+# write_only, ParquetWriter), sem montar um DataFrame com o período inteiro.
+# Os relatórios agregados têm no máximo uma linha por dia/produto/cliente e
+# são gravados a partir dos DataFrames de loja.relatorios.
+#
+# Uso: python -m loja.exportacao historico --inicio 2024-01-01 --fim 2024-12-31 --formato parquet --saida vendas.parquet
+import argparse
+import csv
+import io
+from datetime import date
+
+from loja import relatorios
+
+FORMATOS = {"csv": "text/csv",
+            "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "parquet": "application/vnd.apache.parquet"}
+TAMANHO_BLOCO = 10_000
+# Uma planilha do Excel tem no máximo 1.048.576 linhas, uma delas o cabeçalho
+MAX_LINHAS_XLSX = 1_048_575
+
+# Tipos das colunas do histórico no Parquet
+TIPOS_HISTORICO = {
+    "data_venda": "string",
+    "hora_venda": "string",
+    "nome_cliente": "string",
+    "nome_produto": "string",
+    "quantidade": "int64",
+    "valor_unitario": "float64",
+    "valor_total": "float64",
+}
+
+
+def _blocos(conn, sql, parametros, tamanho=TAMANHO_BLOCO):
+    cursor = conn.execute(sql, parametros)
+    colunas = [descricao[0] for descricao in cursor.description]
+    while True:
+        linhas = cursor.fetchmany(tamanho)
+        if not linhas:
+            break
+        yield colunas, linhas
+
+
+# Cada escritor recebe os blocos e um arquivo binário aberto para escrita,
+# e devolve o número de linhas gravadas
+def escrever_csv(blocos, destino, colunas):
+    # utf-8-sig para o Excel reconhecer os acentos ao abrir o CSV
+    texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+    escritor = csv.writer(texto)
+    escritor.writerow(colunas)
+    total = 0
+    for _, linhas in blocos:
+        escritor.writerows(linhas)
+        total += len(linhas)
+    texto.flush()
+    texto.detach()
+    return total
+
+
+def _checar_xlsx(linhas):
+    if linhas > MAX_LINHAS_XLSX:
+        raise ValueError(f"{linhas} linhas não cabem numa planilha do Excel (máximo {MAX_LINHAS_XLSX}). "
+                         "Escolha um período menor ou exporte em CSV ou Parquet.")
+
+
+def escrever_xlsx(blocos, destino, colunas):
+    from openpyxl import Workbook
+    
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("Vendas")
+    planilha.append(colunas)
+    total = 0
+    for _, linhas in blocos:
+        _checar_xlsx(total + len(linhas))
+        for linha in linhas:
+            planilha.append(linha)
+        total += len(linhas)
+    livro.save(destino)
+    return total
+
+
+def escrever_parquet(blocos, destino, colunas, tipos=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    tipos = tipos or {}
+    esquema = pa.schema([(coluna, pa.type_for_alias(tipos.get(coluna, "string"))) for coluna in colunas])
+    total = 0
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for _, linhas in blocos:
+            colunas_bloco = list(zip(*linhas))
+            escritor.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas_bloco, esquema)],
+                schema=esquema,
+            ))
+            total += len(linhas)
+    return total
+
+
+def _escrever(formato, blocos, destino, colunas, tipos=None):
+    if formato == "csv":
+        return escrever_csv(blocos, destino, colunas)
+    if formato == "xlsx":
+        return escrever_xlsx(blocos, destino, colunas)
+    if formato == "parquet":
+        return escrever_parquet(blocos, destino, colunas, tipos)
+    raise ValueError(f"Formato não suportado: {formato}")
+
+
+# Grava o histórico detalhado do período em `destino` (arquivo binário).
+# Retorna o número de vendas exportadas. Em XLSX, um período que não cabe
+# numa planilha é recusado (ValueError) antes de gravar qualquer coisa.
+def exportar_historico(pool, data_inicio, data_fim, formato, destino):
+    with pool.conexao() as conn, relatorios.fonte_historico(conn, data_inicio, data_fim) as fonte:
+        sql, parametros = relatorios.consulta_historico(data_inicio, data_fim, fonte=fonte)
+        if formato == "xlsx":
+            _checar_xlsx(conn.execute(f"SELECT COUNT(*) FROM ({sql})", parametros).fetchone()[0])
+        return _escrever(formato, _blocos(conn, sql, parametros), destino, list(TIPOS_HISTORICO), TIPOS_HISTORICO)
+
+
+# Relatórios agregados exportáveis: nome -> função (pool, início, fim) -> DataFrame
+RELATORIOS = {
+    "vendas_por_dia": relatorios.vendas_por_dia,
+    "vendas_por_produto": relatorios.vendas_por_produto,
+    "top_produtos": lambda pool, inicio, fim: relatorios.top_produtos(relatorios.vendas_por_produto(pool, inicio, fim)),
+    "faturamento_por_produto": lambda pool, inicio, fim: relatorios.top_produtos(
+        relatorios.vendas_por_produto(pool, inicio, fim), ordem="valor_total"),
+    "top_clientes": relatorios.top_clientes,
+    "por_categoria": lambda pool, inicio, fim: relatorios.por_categoria(relatorios.vendas_por_produto(pool, inicio, fim)),
+}
+
+
+def exportar_relatorio(pool, nome, data_inicio, data_fim, formato, destino):
+    df = RELATORIOS[nome](pool, data_inicio, data_fim)
+    if formato == "csv":
+        df.to_csv(destino, index=False, encoding="utf-8-sig")
+    elif formato == "xlsx":
+        _checar_xlsx(len(df))
+        df.to_excel(destino, index=False, sheet_name=nome[:31], engine="openpyxl")
+    elif formato == "parquet":
+        df.to_parquet(destino, index=False)
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+    return len(df)
+
+
+def main():
+    from loja.conexao import DB_PATH, PoolConexoes
+    
+    parser = argparse.ArgumentParser(description="Exporta o histórico de vendas ou um relatório agregado")
+    parser.add_argument("relatorio", choices=["historico", *RELATORIOS])
+    parser.add_argument("--inicio", type=date.fromisoformat, default=date.min)
+    parser.add_argument("--fim", type=date.fromisoformat, default=date(9998, 12, 31))
+    parser.add_argument("--formato", choices=list(FORMATOS), default="csv")
+    parser.add_argument("--saida", required=True)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+    
+    pool = PoolConexoes(args.db)
+    with open(args.saida, "wb") as destino:
+        if args.relatorio == "historico":
+            total = exportar_historico(pool, args.inicio, args.fim, args.formato, destino)
+        else:
+            total = exportar_relatorio(pool, args.relatorio, args.inicio, args.fim, args.formato, destino)
+    pool.fechar()
+    print(f"{total} linhas exportadas para {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Gráficos da página de relatórios, um por aba, em JSON do Plotly.
+#
+# Montar a figura com plotly.express e serializá-la custa mais que a
+# consulta aos resumos diários, então a Loja guarda o JSON no cache de
+# consultas com a chave (aba, período) e as gerações das tabelas lidas:
+# trocar de aba ou voltar a um período já visto não refaz nada, e uma venda
+# nova invalida só os gráficos que dependem de vendas.
+#
+# A série de faturamento é reduzida a no máximo relatorios.MAX_PONTOS_SERIE
+# pontos (semanal, mensal...) para períodos longos não mandarem milhares de
+# pontos ao navegador.
+import plotly.express as px
+import plotly.io as pio
+
+from loja import relatorios
+
+
+def _vendas_por_dia(pool, data_inicio, data_fim):
+    serie, granularidade = relatorios.serie_faturamento(relatorios.vendas_por_dia(pool, data_inicio, data_fim))
+    fig = px.line(serie, x='data_venda', y='valor_total',
+                  title=f'Faturamento {granularidade}',
+                  labels={'data_venda': 'Data', 'valor_total': 'Faturamento (R$)'})
+    fig.update_traces(line_color='#1f77b4', line_width=3)
+    return fig
+
+
+def _top_produtos(pool, data_inicio, data_fim):
+    top_produtos = relatorios.top_produtos(relatorios.vendas_por_produto(pool, data_inicio, data_fim),
+                                           ordem='quantidade')
+    return px.bar(top_produtos, x='quantidade', y='nome_produto',
+                  title='Produtos Mais Vendidos (Quantidade)',
+                  labels={'quantidade': 'Quantidade Vendida', 'nome_produto': 'Produto'},
+                  orientation='h')
+
+
+def _top_clientes(pool, data_inicio, data_fim):
+    fig = px.bar(relatorios.top_clientes(pool, data_inicio, data_fim), x='valor_total', y='nome_cliente',
+                 title='Clientes que Mais Gastam (Faturamento)',
+                 labels={'valor_total': 'Total Gasto (R$)', 'nome_cliente': 'Cliente'},
+                 orientation='h')
+    fig.update_traces(marker_color='green')
+    return fig
+
+
+def _faturamento(pool, data_inicio, data_fim):
+    top_faturamento = relatorios.top_produtos(relatorios.vendas_por_produto(pool, data_inicio, data_fim),
+                                              ordem='valor_total')
+    return px.pie(top_faturamento, values='valor_total', names='nome_produto',
+                  title='Distribuição do Faturamento por Produto')
+
+
+def _por_categoria(pool, data_inicio, data_fim):
+    vendas_categoria = relatorios.por_categoria(relatorios.vendas_por_produto(pool, data_inicio, data_fim))
+    return px.bar(vendas_categoria, x='categoria', y='valor_total',
+                  title='Faturamento por Categoria',
+                  labels={'categoria': 'Categoria', 'valor_total': 'Faturamento (R$)'})
+
+
+# Aba -> (tabelas lidas, função que monta a figura)
+GRAFICOS = {
+    "vendas_por_dia": (("vendas",), _vendas_por_dia),
+    "top_produtos": (("vendas", "produtos"), _top_produtos),
+    "top_clientes": (("vendas", "clientes"), _top_clientes),
+    "faturamento": (("vendas", "produtos"), _faturamento),
+    "por_categoria": (("vendas", "produtos"), _por_categoria),
+}
+
+
+# JSON da figura de uma aba no período
+def figura_json(pool, aba, data_inicio, data_fim):
+    if aba not in GRAFICOS:
+        raise ValueError(f"Gráfico desconhecido: {aba}")
+    _, montar = GRAFICOS[aba]
+    return pio.to_json(montar(pool, data_inicio, data_fim), validate=False)
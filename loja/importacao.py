@@ -0,0 +1,293 @@
+# Importação em massa de produtos, clientes e vendas históricas (CSV/XLSX).
+#
+# O arquivo é lido linha a linha (csv.DictReader / openpyxl em modo
+# read_only), validado e gravado em lotes com executemany, um lote por
+# transação. Assim a memória não cresce com o tamanho do arquivo e os caixas
+# conseguem registrar vendas entre um lote e outro.
+#
+# Uso: python -m loja.importacao produtos catalogo.xlsx [--db loja_bebidas.db] [--lote 5000]
+import argparse
+import csv
+import io
+import itertools
+import math
+import time
+import unicodedata
+from datetime import datetime, time as time_
+
+from loja.vendas import executar_com_retentativa
+
+TIPOS = ("produtos", "clientes", "vendas")
+MAX_REJEITADAS = 1000  # linhas rejeitadas guardadas com o motivo (a contagem é sempre total)
+MAX_INTEIRO = 2 ** 63 - 1  # maior inteiro que o SQLite aceita
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+# "Preço Unitário" -> "preco_unitario"
+def _normalizar_cabecalho(nome):
+    nome = unicodedata.normalize("NFKD", str(nome or "")).encode("ascii", "ignore").decode()
+    return "_".join(nome.strip().lower().split())
+
+
+def _linhas_csv(arquivo):
+    if isinstance(arquivo, (bytes, bytearray)):
+        arquivo = io.BytesIO(arquivo)
+    if not isinstance(arquivo, io.TextIOBase):
+        arquivo = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    # Planilhas exportadas em português costumam usar ";" como separador
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(arquivo, dialeto)
+    cabecalho = [_normalizar_cabecalho(coluna) for coluna in next(leitor, [])]
+    for valores in leitor:
+        if any(valor.strip() for valor in valores):
+            yield dict(zip(cabecalho, valores))
+
+
+def _linhas_xlsx(arquivo):
+    from openpyxl import load_workbook
+
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = livro.active.iter_rows(values_only=True)
+        cabecalho = [_normalizar_cabecalho(coluna) for coluna in next(linhas, ())]
+        for valores in linhas:
+            if any(valor not in (None, "") for valor in valores):
+                yield dict(zip(cabecalho, valores))
+    finally:
+        livro.close()
+
+
+def ler_linhas(arquivo, formato):
+    if formato == "csv":
+        return _linhas_csv(arquivo)
+    if formato == "xlsx":
+        return _linhas_xlsx(arquivo)
+    raise ValueError(f"Formato não suportado: {formato}")
+
+
+def _texto(linha, campo, obrigatorio=True):
+    valor = linha.get(campo)
+    valor = "" if valor is None else str(valor).strip()
+    if obrigatorio and not valor:
+        raise LinhaInvalida(f"'{campo}' é obrigatório")
+    return valor
+
+
+# Aceita 5.90, "5,90" e "1.234,56"; recusa "nan" e "inf", que o float() aceita
+def _numero(linha, campo):
+    valor = linha.get(campo)
+    if isinstance(valor, (int, float)):
+        numero = float(valor)
+    else:
+        texto = _texto(linha, campo).replace("R$", "").strip()
+        if "," in texto:
+            texto = texto.replace(".", "").replace(",", ".")
+        try:
+            numero = float(texto)
+        except ValueError:
+            raise LinhaInvalida(f"'{campo}' não é um número: {valor!r}") from None
+    if not math.isfinite(numero):
+        raise LinhaInvalida(f"'{campo}' não é um número: {valor!r}")
+    return numero
+
+
+def _inteiro(linha, campo):
+    numero = _numero(linha, campo)
+    if numero != int(numero):
+        raise LinhaInvalida(f"'{campo}' deve ser inteiro: {numero}")
+    if abs(numero) > MAX_INTEIRO:
+        raise LinhaInvalida(f"'{campo}' fora do intervalo: {numero}")
+    return int(numero)
+
+
+# Aceita AAAA-MM-DD e DD/MM/AAAA, com hora opcional na mesma coluna ou na
+# coluna "hora". fromisoformat é bem mais rápido que tentar vários strptime.
+def _data_hora(linha):
+    valor = linha.get("data") or linha.get("data_venda")
+    if isinstance(valor, datetime):
+        data = valor
+    else:
+        texto = _texto({"data": valor}, "data")
+        try:
+            if "/" in texto:
+                dia, _, resto = texto.partition(" ")
+                d, m, a = dia.split("/")
+                texto = f"{int(a):04d}-{int(m):02d}-{int(d):02d}" + (f"T{resto}" if resto else "")
+            data = datetime.fromisoformat(texto)
+        except ValueError:
+            raise LinhaInvalida(f"data inválida: {texto!r}") from None
+    hora = linha.get("hora") or linha.get("hora_venda")
+    if hora:
+        # O openpyxl entrega células de hora como datetime.time, ou datetime
+        # quando a célula tem data e hora
+        if isinstance(hora, datetime):
+            hora = hora.time()
+        elif isinstance(hora, str):
+            try:
+                hora = time_.fromisoformat(hora.strip())
+            except ValueError:
+                raise LinhaInvalida(f"hora inválida: {hora!r}") from None
+        elif not isinstance(hora, time_):
+            raise LinhaInvalida(f"hora inválida: {hora!r}")
+        data = datetime.combine(data.date(), hora)
+    return data.isoformat(timespec="seconds")
+
+
+def _validar_produto(linha, hoje, _referencias):
+    preco = _numero(linha, "preco")
+    estoque = _inteiro(linha, "estoque")
+    if preco <= 0:
+        raise LinhaInvalida("'preco' deve ser maior que zero")
+    if estoque < 0:
+        raise LinhaInvalida("'estoque' não pode ser negativo")
+    return (_texto(linha, "nome"), _texto(linha, "categoria"), preco, estoque, hoje)
+
+
+def _validar_cliente(linha, hoje, _referencias):
+    return (_texto(linha, "nome"), _texto(linha, "telefone", obrigatorio=False), hoje)
+
+
+# Produto e cliente podem vir pelo id ou pelo nome cadastrado
+def _resolver(linha, campo, ids, por_nome):
+    valor = linha.get(f"{campo}_id")
+    if valor not in (None, ""):
+        try:
+            identificador = int(float(valor))
+        except (ValueError, OverflowError):
+            # OverflowError: int() de "inf"
+            raise LinhaInvalida(f"'{campo}_id' inválido: {valor!r}") from None
+        if identificador not in ids:
+            raise LinhaInvalida(f"{campo} {identificador} não cadastrado")
+        return identificador, ids[identificador]
+    nome = _texto(linha, campo)
+    if nome.casefold() not in por_nome:
+        raise LinhaInvalida(f"{campo} '{nome}' não cadastrado")
+    return por_nome[nome.casefold()]
+
+
+def _validar_venda(linha, _hoje, referencias):
+    produto_id, nome_produto = _resolver(linha, "produto", *referencias["produtos"])
+    cliente_id, nome_cliente = _resolver(linha, "cliente", *referencias["clientes"])
+    quantidade = _inteiro(linha, "quantidade")
+    if quantidade <= 0:
+        raise LinhaInvalida("'quantidade' deve ser maior que zero")
+    valor_unitario = _numero(linha, "valor_unitario")
+    valor_total = quantidade * valor_unitario
+    if not math.isfinite(valor_total):
+        raise LinhaInvalida(f"'valor_unitario' grande demais: {valor_unitario}")
+    data_hora = _data_hora(linha)
+    data_venda, hora_venda = data_hora.split("T")
+    return (produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario,
+            valor_total, data_venda, hora_venda, data_hora)
+
+
+# id -> nome e nome (sem diferenciar maiúsculas) -> (id, nome); em nomes repetidos vale o primeiro id
+def _carregar_referencias(pool):
+    referencias = {}
+    with pool.conexao() as conn:
+        for tabela in ("produtos", "clientes"):
+            ids, por_nome = {}, {}
+            for identificador, nome in conn.execute(f"SELECT id, nome FROM {tabela} ORDER BY id"):
+                ids[identificador] = nome
+                por_nome.setdefault(nome.casefold(), (identificador, nome))
+            referencias[tabela] = (ids, por_nome)
+    return referencias
+
+
+IMPORTADORES = {
+    "produtos": (_validar_produto, '''
+        INSERT INTO produtos (nome, categoria, preco, estoque, data_cadastro) VALUES (?, ?, ?, ?, ?)
+    '''),
+    "clientes": (_validar_cliente, '''
+        INSERT INTO clientes (nome, telefone, data_cadastro) VALUES (?, ?, ?)
+    '''),
+    # Vendas históricas não baixam estoque: o estoque atual já reflete o passado
+    "vendas": (_validar_venda, '''
+        INSERT INTO vendas (produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario,
+                            valor_total, data_venda, hora_venda, data_hora)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''),
+}
+
+
+# Importa `linhas` (dicts com cabeçalhos normalizados) do `tipo` indicado.
+# `progresso(lidas, importadas, rejeitadas)` é chamado a cada lote gravado.
+# Retorna um dict com as contagens e as primeiras linhas rejeitadas
+# [(número da linha no arquivo, motivo)].
+def importar_linhas(pool, tipo, linhas, tamanho_lote=5000, progresso=None):
+    validar, sql = IMPORTADORES[tipo]
+    referencias = _carregar_referencias(pool) if tipo == "vendas" else None
+    hoje = datetime.now().strftime("%Y-%m-%d")
+    resultado = {"lidas": 0, "importadas": 0, "rejeitadas": 0, "erros": [], "segundos": 0.0}
+    inicio = time.perf_counter()
+
+    # Linha 1 é o cabeçalho
+    numeradas = enumerate(linhas, start=2)
+    while True:
+        bloco = list(itertools.islice(numeradas, tamanho_lote))
+        if not bloco:
+            break
+        lote = []
+        for numero, linha in bloco:
+            try:
+                lote.append(validar(linha, hoje, referencias))
+            except LinhaInvalida as erro:
+                resultado["rejeitadas"] += 1
+                if len(resultado["erros"]) < MAX_REJEITADAS:
+                    resultado["erros"].append((numero, str(erro)))
+        resultado["lidas"] += len(bloco)
+        if lote:
+            executar_com_retentativa(pool, lambda conn: conn.executemany(sql, lote))
+            resultado["importadas"] += len(lote)
+        if progresso:
+            progresso(resultado["lidas"], resultado["importadas"], resultado["rejeitadas"])
+
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def importar_arquivo(pool, tipo, arquivo, formato, tamanho_lote=5000, progresso=None):
+    return importar_linhas(pool, tipo, ler_linhas(arquivo, formato), tamanho_lote, progresso)
+
+
+def main():
+    from loja.conexao import DB_PATH, PoolConexoes
+    from loja.migracoes import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(description="Importa produtos, clientes ou vendas de um CSV/XLSX")
+    parser.add_argument("tipo", choices=TIPOS)
+    parser.add_argument("arquivo")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args()
+
+    formato = "xlsx" if args.arquivo.lower().endswith(".xlsx") else "csv"
+    pool = PoolConexoes(args.db)
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn)
+
+    def progresso(lidas, importadas, rejeitadas):
+        print(f"\r{lidas} linhas lidas | {importadas} importadas | {rejeitadas} rejeitadas", end="", flush=True)
+
+    with open(args.arquivo, "rb") as arquivo:
+        resultado = importar_arquivo(pool, args.tipo, arquivo, formato, args.lote, progresso)
+    pool.fechar()
+
+    print(f"\nConcluído em {resultado['segundos']:.1f}s "
+          f"({resultado['lidas'] / max(resultado['segundos'], 1e-9):.0f} linhas/s)")
+    for numero, motivo in resultado["erros"][:20]:
+        print(f"  linha {numero}: {motivo}")
+    if resultado["rejeitadas"] > 20:
+        print(f"  ... e mais {resultado['rejeitadas'] - 20} linhas rejeitadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# Medições das funções da loja e das páginas do app: tempo, comandos SQL,
+# linhas escritas e devolvidas e, sob demanda, pico de memória e perfil.
+#
+# Cada função medida (métodos públicos da Loja, páginas do app) é uma
+# etapa. As etapas abertas ficam numa pilha por contexto (thread do
+# Streamlit ou requisição da API); enquanto há alguma aberta, o pool de
+# conexões conta os comandos SQL (set_trace_callback) e as linhas escritas
+# (total_changes, inclusive por gatilhos) e soma em todas elas. Fora de uma
+# etapa nada disso é ligado, então o custo sem medição é um perf_counter.
+#
+# Os totais por etapa ficam num registro do processo, exposto no formato
+# texto do Prometheus (GET /metricas na API, painel de depuração no app).
+# Uma execução (um rerun do app) junta as etapas daquela execução; com
+# LOJA_LOG_METRICAS=<arquivo> (ou "-" para stderr) cada execução encerrada
+# vira uma linha JSON nesse log.
+#
+# O SQLite não informa quantas linhas uma consulta leu; "linhas devolvidas"
+# é o tamanho do resultado da função (linhas do DataFrame, itens da lista).
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from functools import wraps
+
+logger = logging.getLogger("loja.instrumentacao")
+
+_pilha = ContextVar("loja_etapas", default=())
+_execucao = ContextVar("loja_execucao", default=None)
+
+# Linhas do perfil (cProfile) mostradas, por tempo acumulado
+LINHAS_PERFIL = 40
+
+
+class Etapa:
+    def __init__(self, nome, nivel):
+        self.nome = nome
+        self.nivel = nivel
+        self.inicio = time.perf_counter()
+        self.segundos = 0.0
+        self.comandos_sql = 0
+        self.linhas_escritas = 0
+        self.linhas_devolvidas = None
+        self.erro = False
+
+    def como_dict(self):
+        return {
+            "nome": self.nome,
+            "nivel": self.nivel,
+            "segundos": self.segundos,
+            "comandos_sql": self.comandos_sql,
+            "linhas_escritas": self.linhas_escritas,
+            "linhas_devolvidas": self.linhas_devolvidas,
+            "erro": self.erro,
+        }
+
+
+class Registro:
+    # Totais do processo por etapa e por página, para o texto do Prometheus
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.etapas = {}
+        self.paginas = {}
+
+    def somar_etapa(self, etapa):
+        with self._lock:
+            totais = self.etapas.setdefault(etapa.nome, {
+                "chamadas": 0, "erros": 0, "segundos": 0.0, "comandos_sql": 0,
+                "linhas_escritas": 0, "linhas_devolvidas": 0,
+            })
+            totais["chamadas"] += 1
+            totais["erros"] += etapa.erro
+            totais["segundos"] += etapa.segundos
+            totais["comandos_sql"] += etapa.comandos_sql
+            totais["linhas_escritas"] += etapa.linhas_escritas
+            totais["linhas_devolvidas"] += etapa.linhas_devolvidas or 0
+
+    def somar_execucao(self, execucao):
+        with self._lock:
+            totais = self.paginas.setdefault(execucao.pagina, {"execucoes": 0, "segundos": 0.0, "memoria_pico": None})
+            totais["execucoes"] += 1
+            totais["segundos"] += execucao.segundos
+            if execucao.memoria_pico is not None:
+                totais["memoria_pico"] = execucao.memoria_pico
+
+    def limpar(self):
+        with self._lock:
+            self.etapas.clear()
+            self.paginas.clear()
+
+    def copia(self):
+        with self._lock:
+            return ({nome: dict(totais) for nome, totais in self.etapas.items()},
+                    {nome: dict(totais) for nome, totais in self.paginas.items()})
+
+
+registro = Registro()
+
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Métricas do processo no formato texto do Prometheus (versão 0.0.4)
+def texto_prometheus():
+    etapas, paginas = registro.copia()
+    linhas = []
+
+    def metrica(nome, tipo, ajuda, rotulo, valores, campo):
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for chave, totais in sorted(valores.items()):
+            if totais[campo] is not None:
+                linhas.append(f'{nome}{{{rotulo}="{_rotulo(chave)}"}} {totais[campo]}')
+
+    metrica("loja_etapa_chamadas_total", "counter", "Chamadas da etapa.", "etapa", etapas, "chamadas")
+    metrica("loja_etapa_erros_total", "counter", "Chamadas que terminaram em exceção.", "etapa", etapas, "erros")
+    metrica("loja_etapa_segundos_total", "counter", "Tempo total na etapa.", "etapa", etapas, "segundos")
+    metrica("loja_etapa_comandos_sql_total", "counter", "Comandos SQL executados na etapa.", "etapa", etapas,
+            "comandos_sql")
+    metrica("loja_etapa_linhas_escritas_total", "counter", "Linhas inseridas, alteradas ou apagadas.", "etapa",
+            etapas, "linhas_escritas")
+    metrica("loja_etapa_linhas_devolvidas_total", "counter", "Linhas nos resultados da etapa.", "etapa", etapas,
+            "linhas_devolvidas")
+    metrica("loja_execucoes_total", "counter", "Execuções do script do app.", "pagina", paginas, "execucoes")
+    metrica("loja_execucao_segundos_total", "counter", "Tempo total das execuções do script.", "pagina", paginas,
+            "segundos")
+    metrica("loja_execucao_memoria_pico_bytes", "gauge", "Pico de memória da última execução medida.", "pagina",
+            paginas, "memoria_pico")
+    return "\n".join(linhas) + "\n"
+
+
+# ------------------------------------------------------------------ etapas
+
+def etapas_abertas():
+    return _pilha.get()
+
+
+def iniciar_etapa(nome):
+    pilha = _pilha.get()
+    etapa = Etapa(nome, len(pilha))
+    return etapa, _pilha.set(pilha + (etapa,))
+
+
+def encerrar_etapa(aberta, erro=False, linhas_devolvidas=None):
+    etapa, token = aberta
+    etapa.segundos = time.perf_counter() - etapa.inicio
+    etapa.erro = erro
+    etapa.linhas_devolvidas = linhas_devolvidas
+    try:
+        _pilha.reset(token)
+    except ValueError:
+        # Aberta em outro contexto (ex.: um rerun interrompido); só descarta
+        _pilha.set(tuple(item for item in _pilha.get() if item is not etapa))
+    registro.somar_etapa(etapa)
+    execucao = _execucao.get()
+    if execucao is not None:
+        execucao.etapas.append(etapa)
+    return etapa
+
+
+# Chamado pelo pool (trace callback do sqlite3) a cada comando executado
+def comando_sql(sql):
+    # Os comandos dos gatilhos chegam como "-- TRIGGER ..."
+    if sql.startswith("--"):
+        return
+    for etapa in _pilha.get():
+        etapa.comandos_sql += 1
+
+
+def somar_linhas_escritas(linhas):
+    for etapa in _pilha.get():
+        etapa.linhas_escritas += linhas
+
+
+def _linhas(resultado):
+    if isinstance(resultado, tuple) and resultado and hasattr(resultado[0], "shape"):
+        resultado = resultado[0]
+    if hasattr(resultado, "shape"):
+        return resultado.shape[0]
+    if isinstance(resultado, list):
+        return len(resultado)
+    # Índices id -> registro (opções dos seletores)
+    if isinstance(resultado, dict) and resultado and all(isinstance(valor, dict) for valor in resultado.values()):
+        return len(resultado)
+    return None
+
+
+# Decorador: mede a função como uma etapa com o nome dado
+def medir(nome):
+    def decorador(funcao):
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            aberta = iniciar_etapa(nome)
+            try:
+                resultado = funcao(*args, **kwargs)
+            except BaseException:
+                encerrar_etapa(aberta, erro=True)
+                raise
+            encerrar_etapa(aberta, linhas_devolvidas=_linhas(resultado))
+            return resultado
+        return medida
+    return decorador
+
+
+# Decorador de classe: mede todos os métodos públicos como "Classe.metodo"
+def instrumentar(classe):
+    for nome, valor in list(vars(classe).items()):
+        if not nome.startswith("_") and callable(valor):
+            setattr(classe, nome, medir(f"{classe.__name__}.{nome}")(valor))
+    return classe
+
+
+# --------------------------------------------------------------- execuções
+
+class Execucao:
+    # Uma execução do script do app. Com `memoria`, mede o pico de memória
+    # alocada pelo Python (tracemalloc deixa tudo mais lento e é do processo
+    # inteiro: outras sessões ao mesmo tempo entram na conta); com `perfil`,
+    # roda sob o cProfile.
+    def __init__(self, pagina="", memoria=False, perfil=False):
+        self.pagina = pagina
+        self.etapas = []
+        self.segundos = None
+        self.memoria_pico = None
+        self.perfil = None
+        self._memoria = memoria
+        self._iniciou_tracemalloc = False
+        self._perfilador = cProfile.Profile() if perfil else None
+        if memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._iniciou_tracemalloc = True
+            tracemalloc.reset_peak()
+        if self._perfilador is not None:
+            self._perfilador.enable()
+        self.inicio = time.perf_counter()
+
+    def encerrar(self):
+        self.segundos = time.perf_counter() - self.inicio
+        if self._perfilador is not None:
+            self._perfilador.disable()
+            saida = io.StringIO()
+            pstats.Stats(self._perfilador, stream=saida).sort_stats("cumulative").print_stats(LINHAS_PERFIL)
+            self.perfil = saida.getvalue()
+        if self._memoria:
+            self.memoria_pico = tracemalloc.get_traced_memory()[1]
+            if self._iniciou_tracemalloc:
+                tracemalloc.stop()
+        if _execucao.get() is self:
+            _execucao.set(None)
+        registro.somar_execucao(self)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(self.resumo(), ensure_ascii=False))
+        return self
+
+    # Totais da execução (SQL e linhas somados só nas etapas de primeiro
+    # nível) e as etapas na ordem em que começaram
+    def resumo(self):
+        primeiras = [etapa for etapa in self.etapas if etapa.nivel == 0]
+        return {
+            "pagina": self.pagina,
+            "segundos": self.segundos,
+            "memoria_pico": self.memoria_pico,
+            "comandos_sql": sum(etapa.comandos_sql for etapa in primeiras),
+            "linhas_escritas": sum(etapa.linhas_escritas for etapa in primeiras),
+            "etapas": [etapa.como_dict() for etapa in sorted(self.etapas, key=lambda etapa: etapa.inicio)],
+        }
+
+
+# Começa a medir uma execução neste contexto; descarta o que tiver ficado
+# aberto de uma execução interrompida (st.rerun, st.stop)
+def iniciar_execucao(pagina="", memoria=False, perfil=False):
+    anterior = _execucao.get()
+    if anterior is not None and anterior._iniciou_tracemalloc:
+        tracemalloc.stop()
+    if anterior is not None and anterior._perfilador is not None:
+        anterior._perfilador.disable()
+    _pilha.set(())
+    execucao = Execucao(pagina, memoria, perfil)
+    _execucao.set(execucao)
+    return execucao
+
+
+def _configurar_log():
+    destino = os.environ.get("LOJA_LOG_METRICAS")
+    if not destino:
+        return
+    manipulador = logging.StreamHandler(sys.stderr) if destino == "-" else logging.FileHandler(destino, encoding="utf-8")
+    manipulador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(manipulador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+_configurar_log()
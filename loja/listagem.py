@@ -0,0 +1,106 @@
+# Listagens paginadas de produtos e clientes.
+#
+# A paginação é por chave (keyset): a página seguinte começa depois do
+# último (coluna de ordenação, id) visto, então buscar a página 500 custa o
+# mesmo que a página 1 e só as linhas visíveis saem do banco.
+import pandas as pd
+
+from loja import busca as busca_texto
+
+# Ordenações disponíveis: rótulo -> coluna. "recentes" usa o id, que cresce
+# com a data de cadastro.
+ORDENS_PRODUTOS = {"nome": "nome", "categoria": "categoria", "preco": "preco", "estoque": "estoque", "recentes": "id"}
+ORDENS_CLIENTES = {"nome": "nome", "recentes": "id"}
+
+
+def _filtros_produtos(categoria=None, busca=None, disponiveis=False):
+    condicoes, parametros = [], []
+    if disponiveis:
+        condicoes.append("estoque > 0")
+    if categoria:
+        condicoes.append("categoria = ?")
+        parametros.append(categoria)
+    condicao_busca, parametros_busca = busca_texto.filtro_ids("produtos", busca)
+    if condicao_busca:
+        condicoes.append(condicao_busca)
+        parametros.extend(parametros_busca)
+    return condicoes, parametros
+
+
+def _filtros_clientes(busca=None):
+    condicao_busca, parametros_busca = busca_texto.filtro_ids("clientes", busca)
+    if not condicao_busca:
+        return [], []
+    return [condicao_busca], parametros_busca
+
+
+# Busca uma página. `apos` é o cursor devolvido pela página anterior (None
+# para a primeira). Retorna (DataFrame, cursor da próxima página ou None).
+def _pagina(conn, tabela, colunas, condicoes, parametros, coluna_ordem, crescente, tamanho, apos):
+    condicoes = list(condicoes)
+    parametros = list(parametros)
+    comparacao = ">" if crescente else "<"
+    direcao = "ASC" if crescente else "DESC"
+    if apos is not None:
+        if coluna_ordem == "id":
+            condicoes.append(f"id {comparacao} ?")
+            parametros.append(apos[1])
+        else:
+            condicoes.append(f"({coluna_ordem}, id) {comparacao} (?, ?)")
+            parametros.extend(apos)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    ordem = f"id {direcao}" if coluna_ordem == "id" else f"{coluna_ordem} {direcao}, id {direcao}"
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(colunas)} FROM {tabela} {where} ORDER BY {ordem} LIMIT ?",
+        conn, params=parametros + [tamanho + 1],
+    )
+    proximo = None
+    if len(df) > tamanho:
+        df = df.iloc[:tamanho]
+        proximo = (df[coluna_ordem].tolist()[-1], df["id"].tolist()[-1])
+    return df, proximo
+
+
+def _contar(conn, tabela, condicoes, parametros):
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return conn.execute(f"SELECT COUNT(*) FROM {tabela} {where}", parametros).fetchone()[0]
+
+
+def pagina_produtos(conn, categoria=None, busca=None, ordem="nome", crescente=True, tamanho=50, apos=None):
+    condicoes, parametros = _filtros_produtos(categoria, busca)
+    colunas = ["id", "nome", "categoria", "preco", "estoque", "data_cadastro"]
+    return _pagina(conn, "produtos", colunas, condicoes, parametros, ORDENS_PRODUTOS[ordem], crescente, tamanho, apos)
+
+
+def contar_produtos(conn, categoria=None, busca=None, disponiveis=False):
+    return _contar(conn, "produtos", *_filtros_produtos(categoria, busca, disponiveis))
+
+
+# Produtos com estoque para os seletores da venda, em ordem alfabética
+def produtos_disponiveis(conn, limite=200):
+    return pd.read_sql_query(
+        "SELECT id, nome, categoria, preco, estoque FROM produtos WHERE estoque > 0 ORDER BY nome LIMIT ?",
+        conn, params=(limite,),
+    )
+
+
+def categorias(conn):
+    return [linha[0] for linha in conn.execute("SELECT DISTINCT categoria FROM produtos ORDER BY categoria")]
+
+
+def pagina_clientes(conn, busca=None, ordem="nome", crescente=True, tamanho=50, apos=None):
+    condicoes, parametros = _filtros_clientes(busca)
+    colunas = ["id", "nome", "telefone", "data_cadastro"]
+    return _pagina(conn, "clientes", colunas, condicoes, parametros, ORDENS_CLIENTES[ordem], crescente, tamanho, apos)
+
+
+def contar_clientes(conn, busca=None):
+    return _contar(conn, "clientes", *_filtros_clientes(busca))
+
+
+# Clientes para os seletores da venda, em ordem alfabética
+def clientes_para_selecao(conn, limite=200):
+    return pd.read_sql_query(
+        "SELECT id, nome, telefone FROM clientes ORDER BY nome LIMIT ?",
+        conn, params=(limite,),
+    )
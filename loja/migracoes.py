@@ -0,0 +1,424 @@
+# Migrações versionadas do banco da loja.
+#
+# Cada migração roda uma única vez, em ordem, dentro da própria transação, e
+# a versão aplicada fica registrada em schema_version. Os comandos também são
+# idempotentes (IF NOT EXISTS / checagem de colunas) para que bancos criados
+# por versões antigas do app, sem schema_version, sejam migrados sem erro.
+#
+# Uso offline (antes de subir uma nova versão em um banco grande):
+#     python -m loja.migracoes loja_bebidas.db
+import sqlite3
+import sys
+from datetime import datetime
+
+from loja import resumo
+
+
+def _colunas(conn, tabela):
+    return {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+def _adicionar_coluna(conn, tabela, coluna, definicao):
+    if coluna not in _colunas(conn, tabela):
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+
+# 1: tabelas originais do app
+def _tabelas_iniciais(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            preco REAL NOT NULL,
+            estoque INTEGER NOT NULL,
+            data_cadastro TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            telefone TEXT,
+            data_cadastro TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER,
+            cliente_id INTEGER,
+            nome_produto TEXT,
+            nome_cliente TEXT,
+            quantidade INTEGER,
+            valor_unitario REAL,
+            valor_total REAL,
+            data_venda TEXT,
+            hora_venda TEXT,
+            FOREIGN KEY (produto_id) REFERENCES produtos (id),
+            FOREIGN KEY (cliente_id) REFERENCES clientes (id)
+        )
+    ''')
+
+
+# 2: cabeçalho de pedidos para o carrinho com vários itens
+def _pedidos(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER,
+            nome_cliente TEXT,
+            quantidade_itens INTEGER,
+            valor_total REAL,
+            data_venda TEXT,
+            hora_venda TEXT,
+            FOREIGN KEY (cliente_id) REFERENCES clientes (id)
+        )
+    ''')
+    _adicionar_coluna(conn, "vendas", "pedido_id", "INTEGER REFERENCES pedidos (id)")
+
+
+# 3: data_hora ISO (YYYY-MM-DDTHH:MM:SS) no lugar do par data_venda/hora_venda.
+# O par antigo continua sendo gravado para quem ainda lê essas colunas; o
+# gatilho preenche data_hora quando um INSERT antigo não a informa.
+def _data_hora(conn):
+    for tabela in ("vendas", "pedidos"):
+        _adicionar_coluna(conn, tabela, "data_hora", "TEXT")
+        conn.execute(f'''
+            UPDATE {tabela} SET data_hora = data_venda || 'T' || COALESCE(hora_venda, '00:00:00')
+            WHERE data_hora IS NULL AND data_venda IS NOT NULL
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabela}_data_hora AFTER INSERT ON {tabela}
+            WHEN NEW.data_hora IS NULL AND NEW.data_venda IS NOT NULL
+            BEGIN
+                UPDATE {tabela} SET data_hora = NEW.data_venda || 'T' || COALESCE(NEW.hora_venda, '00:00:00')
+                WHERE id = NEW.id;
+            END
+        ''')
+
+
+# 4: índices para relatórios, buscas e filtros. O de data_hora é de
+# cobertura para os relatórios por período: com as colunas agregadas no
+# índice, eles não precisam ler a tabela, o que evita uma busca por linha
+# quando o período cobre boa parte do histórico. Os nomes de produto e
+# cliente saem das tabelas de cadastro depois da agregação.
+def _indices(conn):
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_vendas_relatorio
+        ON vendas (data_hora, produto_id, cliente_id, quantidade, valor_total)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas (produto_id, data_hora)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas (cliente_id, data_hora)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_nome_produto ON vendas (nome_produto)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_pedido ON vendas (pedido_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pedidos_data_hora ON pedidos (data_hora)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos (categoria, nome)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome)")
+    # analysis_limit mantém o ANALYZE rápido mesmo com milhões de vendas
+    conn.execute("PRAGMA analysis_limit=1000")
+    conn.execute("ANALYZE")
+
+
+# 5: bancos em que a migração 4 criou um índice simples de data_hora, antes
+# do de cobertura: troca um pelo outro. Nos demais não faz nada.
+def _indice_relatorios(conn):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_vendas_data_hora'").fetchone():
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_vendas_relatorio
+            ON vendas (data_hora, produto_id, cliente_id, quantidade, valor_total)
+        ''')
+        conn.execute("DROP INDEX idx_vendas_data_hora")
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("ANALYZE vendas")
+
+
+# 6: versões antigas do app gravavam produto_id/cliente_id vindos do pandas
+# (numpy.int64), que o sqlite3 guarda como BLOB de 8 bytes little-endian
+def _corrigir_ids_blob(conn):
+    for coluna in ("produto_id", "cliente_id"):
+        linhas = conn.execute(f"SELECT id, {coluna} FROM vendas WHERE typeof({coluna}) = 'blob'").fetchall()
+        conn.executemany(
+            f"UPDATE vendas SET {coluna} = ? WHERE id = ?",
+            [(int.from_bytes(valor, "little", signed=True), venda_id) for venda_id, valor in linhas if len(valor) == 8],
+        )
+
+
+# 7: resumos diários por produto e por cliente, atualizados por gatilho na
+# mesma transação da venda (ver loja/resumo.py)
+def _resumos_diarios(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas_dia_produto (
+            dia TEXT NOT NULL,
+            produto_id INTEGER NOT NULL,
+            vendas INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            valor_total REAL NOT NULL,
+            PRIMARY KEY (dia, produto_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas_dia_cliente (
+            dia TEXT NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            vendas INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            valor_total REAL NOT NULL,
+            PRIMARY KEY (dia, cliente_id)
+        ) WITHOUT ROWID
+    ''')
+    resumo.criar_gatilho(conn)
+    resumo.reconstruir(conn)
+
+
+# 8: contador de gerações por tabela, usado pelo cache de consultas
+# (loja/cache.py) para descartar resultados assim que uma tabela muda
+def _geracoes(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS geracoes (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        )
+    ''')
+    for tabela in ("produtos", "clientes", "vendas"):
+        conn.execute("INSERT OR IGNORE INTO geracoes (tabela, versao) VALUES (?, 0)", (tabela,))
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tabela}_geracao_{evento.lower()} AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE geracoes SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            ''')
+
+
+# 9: índices para ordenar a listagem paginada de produtos por preço e estoque
+def _indices_listagem(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_preco ON produtos (preco)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_estoque ON produtos (estoque)")
+
+
+# 10: índices de texto completo (FTS5) para a busca por nome, categoria e
+# telefone, sem diferenciar acentos ("agua" encontra "Água"). São tabelas de
+# conteúdo externo: os gatilhos só reindexam quando as colunas buscadas
+# mudam, e não a cada baixa de estoque.
+def _busca_texto(conn):
+    for tabela, colunas in (("produtos", ("nome", "categoria")), ("clientes", ("nome", "telefone"))):
+        indice = f"{tabela}_busca"
+        lista = ", ".join(colunas)
+        novos = ", ".join(f"NEW.{coluna}" for coluna in colunas)
+        antigos = ", ".join(f"OLD.{coluna}" for coluna in colunas)
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5(
+                {lista}, content='{tabela}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {indice}_insert AFTER INSERT ON {tabela} BEGIN
+                INSERT INTO {indice} (rowid, {lista}) VALUES (NEW.id, {novos});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {indice}_delete AFTER DELETE ON {tabela} BEGIN
+                INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', OLD.id, {antigos});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {indice}_update AFTER UPDATE OF {lista} ON {tabela} BEGIN
+                INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', OLD.id, {antigos});
+                INSERT INTO {indice} (rowid, {lista}) VALUES (NEW.id, {novos});
+            END
+        ''')
+        conn.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+
+
+# 11: vendas recebidas da fila offline dos caixas (loja/sincronizacao.py).
+# O id é gerado no aparelho; guardar o resultado de cada um torna o reenvio
+# do mesmo lote inofensivo.
+def _vendas_offline(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas_offline (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            pedido_id INTEGER REFERENCES pedidos (id),
+            detalhe TEXT,
+            criada_em TEXT,
+            recebida_em TEXT NOT NULL
+        )
+    ''')
+
+
+# 12: ponto de pedido por produto (antes o limite era 5 para todos) e um
+# índice parcial só com os produtos no ponto de pedido ou abaixo dele. O
+# SQLite mantém o índice a cada baixa de estoque da venda, então a lista de
+# alertas lê só os produtos em alerta, qualquer que seja o tamanho do
+# catálogo (ver loja/estoque.py).
+def _alertas_estoque(conn):
+    _adicionar_coluna(conn, "produtos", "ponto_pedido", "INTEGER NOT NULL DEFAULT 5")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_produtos_estoque_baixo
+        ON produtos (estoque, nome) WHERE estoque <= ponto_pedido
+    ''')
+    conn.execute("PRAGMA analysis_limit=1000")
+    conn.execute("ANALYZE produtos")
+
+
+# 13: previsões de demanda por produto, calculadas fora do app (ver
+# loja/previsao.py). Cada atualização troca o conteúdo das duas tabelas numa
+# transação e registra a execução; os gatilhos da execução avançam a geração
+# "previsoes" do cache de consultas.
+def _previsoes(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS previsoes (
+            produto_id INTEGER NOT NULL,
+            dia TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            quantidade REAL NOT NULL,
+            PRIMARY KEY (produto_id, dia)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS previsoes_modelos (
+            produto_id INTEGER PRIMARY KEY,
+            categoria TEXT NOT NULL,
+            modelo TEXT NOT NULL,
+            media_diaria REAL NOT NULL,
+            erro_medio REAL,
+            dias_historico INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS previsoes_execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            iniciada_em TEXT NOT NULL,
+            concluida_em TEXT,
+            status TEXT NOT NULL,
+            produtos INTEGER,
+            segundos REAL,
+            detalhe TEXT
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO geracoes (tabela, versao) VALUES ('previsoes', 0)")
+    for evento in ("INSERT", "UPDATE"):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS previsoes_geracao_{evento.lower()} AFTER {evento} ON previsoes_execucoes
+            BEGIN
+                UPDATE geracoes SET versao = versao + 1 WHERE tabela = 'previsoes';
+            END
+        ''')
+
+
+# 14: tarefas agendadas (loja/agendador.py): uma trava por tarefa, com
+# validade, para que app, API e agendador avulso não rodem a mesma tarefa ao
+# mesmo tempo, e o histórico das execuções
+def _tarefas_agendadas(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_travas (
+            tarefa TEXT PRIMARY KEY,
+            dono TEXT NOT NULL,
+            expira_em TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarefa TEXT NOT NULL,
+            iniciada_em TEXT NOT NULL,
+            concluida_em TEXT,
+            status TEXT NOT NULL,
+            segundos REAL,
+            detalhe TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_execucoes ON tarefas_execucoes (tarefa, id)")
+
+
+# 15: anos de vendas movidos para o arquivo (loja/arquivo.py). `ate` é o
+# fim (exclusivo) do que já foi movido de cada ano; o maior deles é a
+# fronteira entre o arquivo e a tabela vendas
+def _arquivo_vendas(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS arquivos_vendas (
+            ano INTEGER PRIMARY KEY,
+            arquivo TEXT NOT NULL,
+            ate TEXT NOT NULL,
+            primeira TEXT,
+            ultima TEXT,
+            linhas INTEGER NOT NULL,
+            atualizado_em TEXT NOT NULL
+        )
+    ''')
+
+
+# Ordem de aplicação; novas migrações entram sempre no fim
+MIGRACOES = [
+    (1, "tabelas iniciais", _tabelas_iniciais),
+    (2, "pedidos", _pedidos),
+    (3, "coluna data_hora", _data_hora),
+    (4, "índices", _indices),
+    (5, "índice de cobertura dos relatórios", _indice_relatorios),
+    (6, "ids de vendas gravados como BLOB", _corrigir_ids_blob),
+    (7, "resumos diários de vendas", _resumos_diarios),
+    (8, "gerações das tabelas", _geracoes),
+    (9, "índices da listagem de produtos", _indices_listagem),
+    (10, "busca de texto completo", _busca_texto),
+    (11, "vendas da fila offline", _vendas_offline),
+    (12, "alertas de estoque", _alertas_estoque),
+    (13, "previsões de demanda", _previsoes),
+    (14, "tarefas agendadas", _tarefas_agendadas),
+    (15, "arquivo de vendas antigas", _arquivo_vendas),
+]
+
+
+def versao_atual(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT,
+            aplicada_em TEXT
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+
+# Aplica as migrações pendentes. `conn` deve estar em modo autocommit
+# (isolation_level=None), como as conexões do PoolConexoes.
+# Retorna a lista de versões aplicadas nesta chamada.
+def aplicar_migracoes(conn):
+    aplicadas = []
+    if versao_atual(conn) >= MIGRACOES[-1][0]:
+        return aplicadas
+    
+    for versao, descricao, migracao in MIGRACOES:
+        # BEGIN IMMEDIATE serializa instâncias do app subindo ao mesmo tempo;
+        # a versão é conferida de novo já com o lock de escrita
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao_atual(conn) >= versao:
+                conn.rollback()
+                continue
+            migracao(conn)
+            conn.execute(
+                "INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                (versao, descricao, datetime.now().isoformat(timespec="seconds")),
+            )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        aplicadas.append(versao)
+    return aplicadas
+
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "loja_bebidas.db"
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout=5000")
+    inicio = datetime.now()
+    aplicadas = aplicar_migracoes(conn)
+    conn.close()
+    if aplicadas:
+        print(f"Migrações aplicadas: {aplicadas} em {(datetime.now() - inicio).total_seconds():.1f}s")
+    else:
+        print("Banco já está na versão mais recente")
@@ -0,0 +1,240 @@
+# Previsão de demanda por produto e por categoria para as compras.
+#
+# Ajustar um modelo por produto sobre todo o histórico leva de segundos a
+# minutos, então nada disso roda no rerun do Streamlit: atualizar() lê a
+# série diária de cada produto dos resumos (vendas_dia_produto), ajusta os
+# modelos num pool de processos (um produto por tarefa) e grava o resultado
+# nas tabelas previsoes e previsoes_modelos (migração 13), que a aba de
+# previsões só lê. Quem a dispara é o agendador (loja/agendador.py), uma
+# vez por dia ou pelo botão da aba, ou a linha de comando.
+#
+# Modelo: a série de cada produto (do primeiro dia com venda até a data de
+# referência, zero nos dias sem venda) é dividida pelo índice do dia da
+# semana (média daquele dia / média geral). Na série sem o efeito do dia da
+# semana, concorrem a média móvel de JANELA_MEDIA dias e a suavização
+# exponencial com cada alfa de ALFAS; fica o de menor erro absoluto médio
+# da previsão um dia à frente nos últimos DIAS_VALIDACAO dias. A previsão é
+# o último nível do modelo escolhido vezes o índice de cada dia da semana
+# dos próximos HORIZONTE dias. A da categoria é a soma dos seus produtos.
+#
+# Os processos são criados com "spawn": o app tem várias threads (sessões,
+# conexões abertas) e um fork copiaria locks possivelmente travados.
+#
+# Uso:
+#     python -m loja.previsao loja_bebidas.db --trabalhadores 4
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+HORIZONTE = 28
+DIAS_VALIDACAO = 28
+JANELA_MEDIA = 28
+ALFAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+# Com menos dias de histórico a previsão é só a média diária
+MIN_HISTORICO = 2 * DIAS_VALIDACAO
+# Cada processo novo leva ~1 s para subir (spawn + imports); um produto leva
+# ~2 ms. Abaixo disso por processo, o pool é mais lento que ajustar aqui.
+PRODUTOS_POR_PROCESSO = 500
+
+EM_ANDAMENTO = "em andamento"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+
+
+def trabalhadores_padrao():
+    # Deixa um núcleo para o app e a API
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def _indice_semana(quantidades, dias_semana):
+    media = quantidades.mean()
+    somas = np.bincount(dias_semana, weights=quantidades, minlength=7)
+    contagens = np.bincount(dias_semana, minlength=7)
+    return np.divide(somas, contagens * media, out=np.ones(7), where=contagens > 0)
+
+
+# Ajusta o modelo de um produto. `tarefa` é (produto_id, primeiro dia em
+# ordinal, deslocamentos dos dias com venda, quantidades, número de dias).
+# Retorna (produto_id, modelo, previsão dos próximos HORIZONTE dias, erro,
+# dias de histórico).
+# Roda nos processos do pool: só recebe e devolve tipos simples e arrays.
+def ajustar(tarefa):
+    produto_id, primeiro_dia, deslocamentos, quantidades_vendidas, total_dias = tarefa
+    quantidades = np.zeros(total_dias)
+    quantidades[deslocamentos] = quantidades_vendidas
+    # date.weekday(): segunda = 0
+    dias_semana = (np.arange(total_dias) + date.fromordinal(primeiro_dia).weekday()) % 7
+    futuro_semana = (np.arange(total_dias, total_dias + HORIZONTE) + date.fromordinal(primeiro_dia).weekday()) % 7
+
+    if total_dias < MIN_HISTORICO or quantidades.sum() == 0:
+        return produto_id, "média diária", np.full(HORIZONTE, quantidades.mean()), None, total_dias
+
+    indice = _indice_semana(quantidades, dias_semana)
+    fator = indice[dias_semana]
+    dessazonalizada = pd.Series(np.divide(quantidades, fator, out=np.zeros(total_dias), where=fator > 0))
+
+    candidatos = {f"média móvel {JANELA_MEDIA}d": dessazonalizada.rolling(JANELA_MEDIA, min_periods=1).mean()}
+    for alfa in ALFAS:
+        candidatos[f"suavização exponencial α={alfa}"] = dessazonalizada.ewm(alpha=alfa, adjust=False).mean()
+
+    melhor = None
+    reais = quantidades[-DIAS_VALIDACAO:]
+    for modelo, nivel in candidatos.items():
+        # Nível até ontem vezes o índice de hoje = previsão um dia à frente
+        previstos = nivel.shift(1).to_numpy()[-DIAS_VALIDACAO:] * fator[-DIAS_VALIDACAO:]
+        erro = float(np.abs(previstos - reais).mean())
+        if melhor is None or erro < melhor[2]:
+            melhor = (modelo, float(nivel.iloc[-1]), erro)
+    modelo, nivel_final, erro = melhor
+    return produto_id, modelo, nivel_final * indice[futuro_semana], erro, total_dias
+
+
+# Séries diárias dos produtos até `referencia`, prontas para ajustar()
+def _tarefas(conn, referencia):
+    diario = pd.read_sql_query('''
+        SELECT produto_id, dia, SUM(quantidade) AS quantidade
+        FROM vendas_dia_produto
+        WHERE dia <= ? AND produto_id IN (SELECT id FROM produtos)
+        GROUP BY produto_id, dia
+        ORDER BY produto_id, dia
+    ''', conn, params=(referencia.isoformat(),))
+    # Dias desde 1970 + ordinal de 1970-01-01 = date.toordinal(), sem um objeto date por linha
+    diario["ordinal"] = (pd.to_datetime(diario["dia"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+                         + date(1970, 1, 1).toordinal())
+    ultimo = referencia.toordinal()
+    tarefas = []
+    for produto_id, grupo in diario.groupby("produto_id", sort=False):
+        ordinais = grupo["ordinal"].to_numpy()
+        tarefas.append((int(produto_id), int(ordinais[0]), ordinais - ordinais[0],
+                        grupo["quantidade"].to_numpy(dtype=float), int(ultimo - ordinais[0] + 1)))
+    return tarefas
+
+
+def _ajustar_todos(tarefas, trabalhadores):
+    trabalhadores = min(trabalhadores, len(tarefas) // PRODUTOS_POR_PROCESSO)
+    if trabalhadores <= 1:
+        return [ajustar(tarefa) for tarefa in tarefas]
+    contexto = multiprocessing.get_context("spawn")
+    # Tarefas em lotes para o custo de enviar cada uma não dominar
+    lote = max(1, len(tarefas) // (trabalhadores * 4))
+    with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=contexto) as executor:
+        return list(executor.map(ajustar, tarefas, chunksize=lote))
+
+
+def _gravar(conn, resultados, referencia, categorias):
+    dias = [(referencia + timedelta(days=deslocamento)).isoformat() for deslocamento in range(1, HORIZONTE + 1)]
+    conn.execute("DELETE FROM previsoes")
+    conn.execute("DELETE FROM previsoes_modelos")
+    conn.executemany(
+        "INSERT INTO previsoes (produto_id, dia, categoria, quantidade) VALUES (?, ?, ?, ?)",
+        ((produto_id, dia, categorias[produto_id], float(quantidade))
+         for produto_id, _, previsao, _, _ in resultados for dia, quantidade in zip(dias, previsao)),
+    )
+    conn.executemany(
+        '''INSERT INTO previsoes_modelos (produto_id, categoria, modelo, media_diaria, erro_medio, dias_historico)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        ((produto_id, categorias[produto_id], modelo, float(previsao.mean()), erro, dias_historico)
+         for produto_id, modelo, previsao, erro, dias_historico in resultados),
+    )
+
+
+# Recalcula as previsões de todos os produtos com vendas até `referencia`
+# (padrão: ontem, o último dia completo). Retorna o registro da execução.
+def atualizar(pool, trabalhadores=None, referencia=None):
+    referencia = referencia or date.today() - timedelta(days=1)
+    trabalhadores = trabalhadores or trabalhadores_padrao()
+    inicio = time.perf_counter()
+    with pool.conexao() as conn:
+        execucao_id = conn.execute(
+            "INSERT INTO previsoes_execucoes (iniciada_em, status) VALUES (?, ?)",
+            (datetime.now().isoformat(timespec="seconds"), EM_ANDAMENTO),
+        ).lastrowid
+    try:
+        with pool.conexao() as conn:
+            tarefas = _tarefas(conn, referencia)
+            categorias = dict(conn.execute("SELECT id, categoria FROM produtos"))
+        resultados = _ajustar_todos(tarefas, trabalhadores)
+        with pool.transacao("IMMEDIATE") as conn:
+            _gravar(conn, resultados, referencia, categorias)
+            conn.execute(
+                "UPDATE previsoes_execucoes SET concluida_em = ?, status = ?, produtos = ?, segundos = ? WHERE id = ?",
+                (datetime.now().isoformat(timespec="seconds"), CONCLUIDA, len(resultados),
+                 time.perf_counter() - inicio, execucao_id),
+            )
+    except Exception as erro:
+        with pool.conexao() as conn:
+            conn.execute(
+                "UPDATE previsoes_execucoes SET concluida_em = ?, status = ?, segundos = ?, detalhe = ? WHERE id = ?",
+                (datetime.now().isoformat(timespec="seconds"), ERRO, time.perf_counter() - inicio, str(erro),
+                 execucao_id),
+            )
+        raise
+    with pool.conexao() as conn:
+        return _execucao(conn, "WHERE id = ?", (execucao_id,))
+
+
+def _execucao(conn, condicao, parametros=()):
+    cursor = conn.execute(f"SELECT * FROM previsoes_execucoes {condicao} ORDER BY id DESC LIMIT 1", parametros)
+    linha = cursor.fetchone()
+    return dict(zip([descricao[0] for descricao in cursor.description], linha)) if linha else None
+
+
+def ultima_execucao(conn):
+    return _execucao(conn, "")
+
+
+# Última execução concluída (a que gerou as previsões gravadas)
+def ultima_concluida(conn):
+    return _execucao(conn, "WHERE status = ?", (CONCLUIDA,))
+
+
+# Demanda prevista por categoria e dia
+def por_categoria(conn):
+    return pd.read_sql_query('''
+        SELECT categoria, dia, SUM(quantidade) AS quantidade
+        FROM previsoes
+        GROUP BY categoria, dia
+        ORDER BY categoria, dia
+    ''', conn)
+
+
+# Produtos com maior demanda prevista, com o modelo escolhido e o estoque
+# atual (dias de estoque = estoque / média diária prevista)
+def produtos(conn, limite=50):
+    df = pd.read_sql_query('''
+        SELECT p.nome, m.categoria, m.media_diaria, m.media_diaria * ? AS total_horizonte, p.estoque,
+               m.modelo, m.erro_medio, m.dias_historico
+        FROM previsoes_modelos m JOIN produtos p ON p.id = m.produto_id
+        ORDER BY m.media_diaria DESC
+        LIMIT ?
+    ''', conn, params=(HORIZONTE, limite))
+    df["dias_estoque"] = (df["estoque"] / df["media_diaria"].where(df["media_diaria"] > 0)).round(1)
+    return df
+
+
+def main():
+    from loja.conexao import DB_PATH, PoolConexoes
+    from loja.migracoes import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(description="Recalcula as previsões de demanda por produto")
+    parser.add_argument("db", nargs="?", default=DB_PATH)
+    parser.add_argument("--trabalhadores", type=int, default=trabalhadores_padrao())
+    parser.add_argument("--referencia", type=date.fromisoformat, help="último dia do histórico (padrão: ontem)")
+    args = parser.parse_args()
+
+    pool = PoolConexoes(args.db)
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn)
+    execucao = atualizar(pool, args.trabalhadores, args.referencia)
+    pool.fechar()
+    print(f"{execucao['produtos']} produtos em {execucao['segundos']:.1f}s com {args.trabalhadores} processos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Arquivos do PWA (service worker, fila offline, manifest e ícones) e a
+# lista de pré-cache do service worker.
+#
+# O sw.js traz entre os marcadores /*PRECACHE*/ ... /*FIM_PRECACHE*/ a
+# lista de arquivos pré-cacheados com o hash do conteúdo de cada um. O nome
+# do cache vem desses hashes, então mudar um ícone ou a fila muda os bytes
+# do sw.js, o navegador instala a nova versão e o cache antigo é apagado.
+# A API (loja/api.py) serve o sw.js com a lista calculada na hora; o
+# comando abaixo grava a lista no arquivo para quem serve o sw.js estático.
+#
+# Uso: python -m loja.pwa   (atualiza a lista de pré-cache dentro do sw.js)
+import hashlib
+import json
+import os
+import re
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Arquivos servidos na raiz do site -> tipo de conteúdo
+ARQUIVOS = {
+    "sw.js": "application/javascript",
+    "fila_vendas.js": "application/javascript",
+    "manifest.json": "application/manifest+json",
+    "icon-192.png": "image/png",
+    "icon-512.png": "image/png",
+}
+PRECACHE = ("manifest.json", "icon-192.png", "icon-512.png", "fila_vendas.js")
+
+_MARCADORES = re.compile(r"/\*PRECACHE\*/.*?/\*FIM_PRECACHE\*/", re.DOTALL)
+
+
+def caminho(nome):
+    return os.path.join(RAIZ, nome)
+
+
+def hash_arquivo(nome):
+    with open(caminho(nome), "rb") as arquivo:
+        return hashlib.sha256(arquivo.read()).hexdigest()[:12]
+
+
+def lista_precache():
+    return [{"url": f"/{nome}", "hash": hash_arquivo(nome)} for nome in PRECACHE]
+
+
+# Conteúdo do sw.js com a lista de pré-cache atual
+def service_worker():
+    with open(caminho("sw.js"), encoding="utf-8", newline="") as arquivo:
+        texto = arquivo.read()
+    lista = json.dumps(lista_precache(), separators=(", ", ": "))
+    return _MARCADORES.sub(lambda _: f"/*PRECACHE*/{lista}/*FIM_PRECACHE*/", texto, count=1)
+
+
+def main():
+    texto = service_worker()
+    with open(caminho("sw.js"), "w", encoding="utf-8", newline="") as arquivo:
+        arquivo.write(texto)
+    for item in lista_precache():
+        print(f"{item['hash']}  {item['url']}")
+
+
+if __name__ == "__main__":
+    main()
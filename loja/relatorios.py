@@ -0,0 +1,154 @@
+# Consultas dos relatórios: filtro de período e agregações feitos no SQLite.
+#
+# As agregações leem os resumos diários (loja/resumo.py), que têm uma linha
+# por dia e produto/cliente, em vez das linhas de vendas. Métricas, rankings
+# e totais por categoria saem desses resumos; só o histórico detalhado lê as
+# linhas de vendas, da tabela quente e, se o período pedir, do arquivo dos
+# anos antigos (loja/arquivo.py).
+from datetime import date, timedelta
+
+import pandas as pd
+
+from loja import arquivo, carregamento
+
+# Acima disso a série de faturamento passa de diária para semanal, mensal...
+MAX_PONTOS_SERIE = 400
+# (frequência do pandas, rótulo), da mais fina para a mais grossa
+GRANULARIDADES = [("D", "Diário"), ("W-MON", "Semanal"), ("MS", "Mensal"), ("YS", "Anual")]
+
+
+# Intervalo [início, fim] em datas vira [início, fim + 1 dia) em data_hora,
+# o que aproveita o índice idx_vendas_relatorio
+def _limites(data_inicio, data_fim):
+    return data_inicio.isoformat(), (data_fim + timedelta(days=1)).isoformat()
+
+
+# Nos resumos o dia já é a chave: [início, fim] direto
+def _dias(data_inicio, data_fim):
+    return data_inicio.isoformat(), data_fim.isoformat()
+
+
+# Primeira e última data com vendas (arquivadas ou não), ou None se não
+# houver vendas. MIN e MAX em subconsultas separadas para cada um ler só a
+# ponta do índice (juntos na mesma SELECT o SQLite varre a tabela inteira)
+def intervalo_datas(pool):
+    with pool.conexao() as conn:
+        primeira, ultima = conn.execute(
+            "SELECT (SELECT MIN(data_hora) FROM vendas), (SELECT MAX(data_hora) FROM vendas)"
+        ).fetchone()
+        arquivada_primeira, arquivada_ultima = arquivo.intervalo(conn)
+    primeira = min(filter(None, (primeira, arquivada_primeira)), default=None)
+    ultima = max(filter(None, (ultima, arquivada_ultima)), default=None)
+    if primeira is None:
+        return None
+    return date.fromisoformat(primeira[:10]), date.fromisoformat(ultima[:10])
+
+
+def vendas_por_dia(pool, data_inicio, data_fim):
+    with pool.conexao() as conn:
+        df = pd.read_sql_query('''
+            SELECT dia AS data_venda, SUM(vendas) AS vendas,
+                   SUM(valor_total) AS valor_total, SUM(quantidade) AS quantidade
+            FROM vendas_dia_produto WHERE dia BETWEEN ? AND ?
+            GROUP BY dia
+            ORDER BY dia
+        ''', conn, params=_dias(data_inicio, data_fim))
+    df['data_venda'] = pd.to_datetime(df['data_venda']).dt.date
+    return df
+
+
+# Métricas do período a partir do resumo diário, sem nova consulta
+def metricas(por_dia):
+    vendas = int(por_dia['vendas'].sum())
+    faturamento = float(por_dia['valor_total'].sum())
+    return {
+        "vendas": vendas,
+        "faturamento": faturamento,
+        "ticket_medio": faturamento / vendas if vendas else 0.0,
+        "itens": int(por_dia['quantidade'].sum()),
+    }
+
+
+# Série de faturamento com no máximo `max_pontos` pontos: diária quando
+# cabe, senão somada por semana (início na segunda), mês ou ano.
+# Retorna (data_venda, valor_total) e o rótulo da granularidade.
+def serie_faturamento(por_dia, max_pontos=MAX_PONTOS_SERIE):
+    serie = por_dia[['data_venda', 'valor_total']]
+    for frequencia, rotulo in GRANULARIDADES:
+        if frequencia != "D":
+            serie = (por_dia.assign(data_venda=pd.to_datetime(por_dia['data_venda']))
+                     .resample(frequencia, on='data_venda', label='left', closed='left')['valor_total'].sum()
+                     .reset_index())
+            serie['data_venda'] = serie['data_venda'].dt.date
+        if len(serie) <= max_pontos:
+            break
+    return serie, rotulo
+
+
+# Totais por produto no período, com a categoria atual do produto
+def vendas_por_produto(pool, data_inicio, data_fim):
+    with pool.conexao() as conn:
+        return pd.read_sql_query('''
+            SELECT v.produto_id, COALESCE(p.nome, 'Produto ' || v.produto_id) AS nome_produto,
+                   NULLIF(p.categoria, '') AS categoria, v.quantidade, v.valor_total
+            FROM (
+                SELECT produto_id, SUM(quantidade) AS quantidade, SUM(valor_total) AS valor_total
+                FROM vendas_dia_produto WHERE dia BETWEEN ? AND ?
+                GROUP BY produto_id
+            ) v
+            LEFT JOIN produtos p ON p.id = v.produto_id
+        ''', conn, params=_dias(data_inicio, data_fim))
+
+
+# ordem: 'quantidade' (mais vendidos) ou 'valor_total' (maior faturamento)
+def top_produtos(por_produto, ordem='quantidade', limite=10):
+    if ordem not in ('quantidade', 'valor_total'):
+        raise ValueError(f"Ordem inválida: {ordem}")
+    return por_produto.nlargest(limite, ordem)[['nome_produto', 'quantidade', 'valor_total']].reset_index(drop=True)
+
+
+def por_categoria(por_produto):
+    return por_produto.dropna(subset=['categoria']).groupby('categoria', as_index=False)[['valor_total', 'quantidade']].sum()
+
+
+def top_clientes(pool, data_inicio, data_fim, limite=10):
+    with pool.conexao() as conn:
+        return pd.read_sql_query('''
+            SELECT COALESCE(c.nome, 'Cliente ' || v.cliente_id) AS nome_cliente, v.valor_total, v.quantidade
+            FROM (
+                SELECT cliente_id, SUM(valor_total) AS valor_total, SUM(quantidade) AS quantidade
+                FROM vendas_dia_cliente WHERE dia BETWEEN ? AND ?
+                GROUP BY cliente_id
+                ORDER BY valor_total DESC
+                LIMIT ?
+            ) v
+            LEFT JOIN clientes c ON c.id = v.cliente_id
+            ORDER BY v.valor_total DESC
+        ''', conn, params=(*_dias(data_inicio, data_fim), limite))
+
+
+# Vendas do período para o FROM do histórico, com os anos arquivados que
+# ele pedir anexados enquanto o `with` durar
+def fonte_historico(conn, data_inicio, data_fim):
+    return arquivo.fonte_vendas(conn, *_limites(data_inicio, data_fim))
+
+
+# Consulta do histórico detalhado; também usada pela exportação em blocos.
+# `fonte` vem de fonte_historico() para o mesmo período.
+def consulta_historico(data_inicio, data_fim, mais_recentes=None, fonte="vendas"):
+    sql = f'''
+        SELECT data_venda, hora_venda, nome_cliente, nome_produto, quantidade, valor_unitario, valor_total
+        FROM {fonte} WHERE data_hora >= ? AND data_hora < ?
+    '''
+    parametros = _limites(data_inicio, data_fim)
+    if mais_recentes is None:
+        return sql + "ORDER BY data_hora", parametros
+    return sql + "ORDER BY data_hora DESC LIMIT ?", (*parametros, mais_recentes)
+
+
+# Histórico detalhado do período; com `mais_recentes`, só as últimas N vendas.
+# Colunas com os tipos compactos de loja.carregamento (data_venda já é data).
+def historico(pool, data_inicio, data_fim, mais_recentes=None):
+    with pool.conexao() as conn, fonte_historico(conn, data_inicio, data_fim) as fonte:
+        sql, parametros = consulta_historico(data_inicio, data_fim, mais_recentes, fonte)
+        return carregamento.compactar(pd.read_sql_query(sql, conn, params=parametros), "vendas")
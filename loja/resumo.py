@@ -0,0 +1,92 @@
+# Resumos diários de vendas usados pelos relatórios.
+#
+# vendas_dia_produto (dia, produto_id) e vendas_dia_cliente (dia,
+# cliente_id) são mantidas por gatilhos na mesma transação de cada INSERT em
+# vendas (migração 7), então o custo de um relatório depende do número de
+# dias × produtos/clientes, não do número de vendas. A categoria não entra
+# no resumo: os relatórios usam a categoria atual do produto, como antes.
+#
+# Cargas em massa podem tirar o gatilho com remover_gatilho() e, no fim,
+# recriá-lo com criar_gatilho() e reconstruir() (ver benchmarks/dados.py).
+#
+# Para recalcular a partir de vendas (backfill ou correção):
+#     python -m loja.resumo loja_bebidas.db
+import sqlite3
+import sys
+import time
+
+GATILHO = "vendas_resumos_diarios"
+
+
+# Gatilho que soma cada venda nova aos dois resumos. data_hora pode chegar
+# vazia de um INSERT antigo; nesse caso o dia vem de data_venda
+def criar_gatilho(conn):
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {GATILHO} AFTER INSERT ON vendas
+        BEGIN
+            INSERT INTO vendas_dia_produto (dia, produto_id, vendas, quantidade, valor_total)
+            VALUES (substr(COALESCE(NEW.data_hora, NEW.data_venda), 1, 10), COALESCE(NEW.produto_id, 0),
+                    1, NEW.quantidade, NEW.valor_total)
+            ON CONFLICT (dia, produto_id) DO UPDATE SET
+                vendas = vendas + 1,
+                quantidade = quantidade + excluded.quantidade,
+                valor_total = valor_total + excluded.valor_total;
+            INSERT INTO vendas_dia_cliente (dia, cliente_id, vendas, quantidade, valor_total)
+            VALUES (substr(COALESCE(NEW.data_hora, NEW.data_venda), 1, 10), COALESCE(NEW.cliente_id, 0),
+                    1, NEW.quantidade, NEW.valor_total)
+            ON CONFLICT (dia, cliente_id) DO UPDATE SET
+                vendas = vendas + 1,
+                quantidade = quantidade + excluded.quantidade,
+                valor_total = valor_total + excluded.valor_total;
+        END
+    ''')
+
+
+# Enquanto o gatilho estiver fora, os resumos ficam defasados até o próximo
+# criar_gatilho() + reconstruir()
+def remover_gatilho(conn):
+    conn.execute(f"DROP TRIGGER IF EXISTS {GATILHO}")
+
+
+# Recalcula os dois resumos do zero ou, com `desde` (dia ISO), só os dias a
+# partir dele (lidos pelo índice de data_hora). `conn` deve estar dentro de
+# uma transação ou em modo autocommit com BEGIN explícito. Dias anteriores à
+# fronteira do arquivo (loja/arquivo.py) só saem certos com a `fonte` de
+# arquivo.fonte_vendas(), obtida antes do BEGIN.
+def reconstruir(conn, desde=None, fonte="vendas"):
+    filtro, parametros = ("AND v.data_hora >= ?", (desde,)) if desde else ("", ())
+    conn.execute("DELETE FROM vendas_dia_produto WHERE dia >= ?", (desde or "",))
+    conn.execute(f'''
+        INSERT INTO vendas_dia_produto (dia, produto_id, vendas, quantidade, valor_total)
+        SELECT substr(v.data_hora, 1, 10), COALESCE(v.produto_id, 0), COUNT(*), SUM(v.quantidade),
+               SUM(v.valor_total)
+        FROM {fonte} v
+        WHERE v.data_hora IS NOT NULL {filtro}
+        GROUP BY 1, 2
+    ''', parametros)
+    conn.execute("DELETE FROM vendas_dia_cliente WHERE dia >= ?", (desde or "",))
+    conn.execute(f'''
+        INSERT INTO vendas_dia_cliente (dia, cliente_id, vendas, quantidade, valor_total)
+        SELECT substr(v.data_hora, 1, 10), COALESCE(v.cliente_id, 0), COUNT(*), SUM(v.quantidade),
+               SUM(v.valor_total)
+        FROM {fonte} v
+        WHERE v.data_hora IS NOT NULL {filtro}
+        GROUP BY 1, 2
+    ''', parametros)
+
+
+if __name__ == "__main__":
+    from loja import arquivo
+    from loja.migracoes import aplicar_migracoes
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "loja_bebidas.db"
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout=5000")
+    aplicar_migracoes(conn)
+    inicio = time.perf_counter()
+    with arquivo.fonte_vendas(conn) as fonte:
+        conn.execute("BEGIN IMMEDIATE")
+        reconstruir(conn, fonte=fonte)
+        conn.commit()
+    conn.close()
+    print(f"Resumos diários reconstruídos em {time.perf_counter() - inicio:.1f}s")
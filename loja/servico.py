@@ -0,0 +1,324 @@
+# Camada de serviço da loja: produtos, clientes, vendas e relatórios.
+#
+# Reúne o pool de conexões, o cache de consultas e os módulos de dados
+# (listagem, busca, vendas, relatorios, exportacao, importacao) atrás de
+# uma única classe sem dependência do Streamlit. O app.py só monta a tela
+# em cima dela; scripts, benchmarks e workers podem usar a mesma classe:
+#
+#     from loja.servico import Loja
+#     loja = Loja("loja_bebidas.db")
+#     loja.inicializar()
+#     loja.vendas_por_dia(date(2024, 1, 1), date(2024, 1, 31))
+#
+# Leituras do catálogo e os gráficos dos relatórios passam pelo cache
+# (invalidado pelas gerações das tabelas); as demais consultas dos
+# relatórios e as escritas vão direto ao banco.
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
+from typing import BinaryIO, TypeVar
+
+import pandas as pd
+
+from loja import (agendador, busca, carregamento, estoque, exportacao, graficos, importacao, instrumentacao, listagem, previsao,
+                  relatorios, sincronizacao, vendas)
+from loja.cache import CacheConsultas
+from loja.conexao import DB_PATH, PoolConexoes
+from loja.migracoes import aplicar_migracoes
+
+T = TypeVar("T")
+
+# (produto_id, nome_produto, quantidade, valor_unitario)
+ItemPedido = tuple[int, str, int, float]
+# Cursor da paginação por keyset: (valor da coluna de ordenação, id)
+Cursor = tuple
+Pagina = tuple[pd.DataFrame, "Cursor | None"]
+
+# Catálogos até este tamanho aparecem inteiros nos seletores da venda;
+# acima disso o seletor mostra só os resultados da busca
+LIMITE_SELETOR = 200
+LIMITE_BUSCA = 50
+
+
+# Métodos públicos medidos (tempo, SQL, linhas): ver loja/instrumentacao.py
+@instrumentacao.instrumentar
+class Loja:
+    def __init__(self, caminho: str = DB_PATH, cache: CacheConsultas | None = None):
+        self.pool = PoolConexoes(caminho)
+        self.cache = cache if cache is not None else CacheConsultas()
+        self.agendador: agendador.Agendador | None = None
+
+    # Aplica as migrações pendentes; retorna as versões aplicadas
+    def inicializar(self) -> list[int]:
+        with self.pool.conexao() as conn:
+            return aplicar_migracoes(conn)
+
+    def fechar(self) -> None:
+        if self.agendador is not None:
+            self.agendador.parar()
+        self.cache.limpar()
+        self.pool.fechar()
+
+    def _consultar(self, chave, tabelas: tuple[str, ...], carregar: Callable[..., T]) -> T:
+        return self.cache.consultar(self.pool, chave, tabelas, carregar)
+
+    # ---------------------------------------------------------------- resumo
+
+    # Totais da página inicial: produtos, clientes e faturamento de todas as vendas
+    def resumo_negocio(self) -> dict[str, float]:
+        def carregar(conn):
+            produtos, clientes, faturamento = conn.execute('''
+                SELECT (SELECT COUNT(*) FROM produtos), (SELECT COUNT(*) FROM clientes),
+                       (SELECT COALESCE(SUM(valor_total), 0) FROM vendas_dia_produto)
+            ''').fetchone()
+            return {"produtos": produtos, "clientes": clientes, "faturamento": faturamento}
+        return self._consultar("resumo_negocio", ("produtos", "clientes", "vendas"), carregar)
+
+    # -------------------------------------------------------------- produtos
+
+    # Cadastra um produto; retorna o id
+    def cadastrar_produto(self, nome: str, categoria: str, preco: float, estoque: int,
+                          ponto_pedido: int = 5) -> int:
+        with self.pool.conexao() as conn:
+            cursor = conn.execute('''
+                INSERT INTO produtos (nome, categoria, preco, estoque, ponto_pedido, data_cadastro)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (nome, categoria, float(preco), int(estoque), int(ponto_pedido),
+                  datetime.now().strftime("%Y-%m-%d")))
+            return cursor.lastrowid
+
+    def contar_produtos(self, categoria: str | None = None, busca: str | None = None,
+                        disponiveis: bool = False) -> int:
+        return self._consultar(("produtos_total", categoria, busca, disponiveis), ("produtos",),
+                               lambda conn: listagem.contar_produtos(conn, categoria, busca, disponiveis))
+
+    def pagina_produtos(self, categoria: str | None = None, busca: str | None = None, ordem: str = "nome",
+                        crescente: bool = True, tamanho: int = 50, apos: Cursor | None = None) -> Pagina:
+        return self._consultar(
+            ("produtos_pagina", categoria, busca, ordem, crescente, tamanho, apos), ("produtos",),
+            lambda conn: listagem.pagina_produtos(conn, categoria, busca, ordem, crescente, tamanho, apos),
+        )
+
+    def categorias(self) -> list[str]:
+        return self._consultar("produtos_categorias", ("produtos",), listagem.categorias)
+
+    # Produtos no ponto de pedido ou abaixo dele, com velocidade de venda,
+    # dias de cobertura e sugestão de compra (ver loja/estoque.py)
+    def alertas_estoque(self, referencia: date | None = None) -> pd.DataFrame:
+        referencia = referencia or date.today()
+        return self._consultar(("alertas_estoque", referencia), ("produtos", "vendas"),
+                               lambda conn: estoque.alertas(conn, referencia))
+
+    def resumo_alertas(self) -> dict[str, int]:
+        return estoque.resumo(self.alertas_estoque())
+
+    # Retorna False se o produto não existe; levanta ValueError se negativo
+    def definir_ponto_pedido(self, produto_id: int, ponto_pedido: int) -> bool:
+        with self.pool.conexao() as conn:
+            return estoque.definir_ponto_pedido(conn, produto_id, ponto_pedido)
+
+    # Produtos por id, como índice id -> registro; ids inexistentes ficam de fora
+    def produtos_por_id(self, ids: Iterable[int]) -> dict[int, dict]:
+        ids = sorted({int(produto_id) for produto_id in ids})
+        if not ids:
+            return {}
+        marcadores = ", ".join("?" * len(ids))
+        with self.pool.conexao() as conn:
+            cursor = conn.execute(
+                f"SELECT id, nome, categoria, preco, estoque FROM produtos WHERE id IN ({marcadores})", ids)
+            colunas = [descricao[0] for descricao in cursor.description]
+            return {linha[0]: dict(zip(colunas, linha)) for linha in cursor}
+
+    # Opções do seletor de produtos da venda (só com estoque), como índice
+    # id -> registro. Sem busca, o catálogo inteiro só aparece se for pequeno.
+    def opcoes_produtos(self, texto_busca: str = "") -> dict[int, dict]:
+        if texto_busca.strip():
+            df = self._consultar(
+                ("busca_produtos", texto_busca), ("produtos",),
+                lambda conn: busca.buscar_produtos(conn, texto_busca, limite=LIMITE_BUSCA, somente_disponiveis=True),
+            )
+        elif self.contar_produtos(disponiveis=True) <= LIMITE_SELETOR:
+            df = self._consultar("produtos_disponiveis", ("produtos",),
+                                 lambda conn: listagem.produtos_disponiveis(conn, LIMITE_SELETOR))
+        else:
+            return {}
+        return df.set_index('id').to_dict('index')
+
+    # -------------------------------------------------------------- clientes
+
+    # Cadastra um cliente; retorna o id
+    def cadastrar_cliente(self, nome: str, telefone: str = "") -> int:
+        with self.pool.conexao() as conn:
+            cursor = conn.execute('''
+                INSERT INTO clientes (nome, telefone, data_cadastro)
+                VALUES (?, ?, ?)
+            ''', (nome, telefone, datetime.now().strftime("%Y-%m-%d")))
+            return cursor.lastrowid
+
+    def contar_clientes(self, busca: str | None = None) -> int:
+        return self._consultar(("clientes_total", busca), ("clientes",),
+                               lambda conn: listagem.contar_clientes(conn, busca))
+
+    def pagina_clientes(self, busca: str | None = None, ordem: str = "nome", crescente: bool = True,
+                        tamanho: int = 50, apos: Cursor | None = None) -> Pagina:
+        return self._consultar(
+            ("clientes_pagina", busca, ordem, crescente, tamanho, apos), ("clientes",),
+            lambda conn: listagem.pagina_clientes(conn, busca, ordem, crescente, tamanho, apos),
+        )
+
+    def cliente(self, cliente_id: int) -> dict | None:
+        with self.pool.conexao() as conn:
+            cursor = conn.execute("SELECT id, nome, telefone FROM clientes WHERE id = ?", (int(cliente_id),))
+            linha = cursor.fetchone()
+            return dict(zip([descricao[0] for descricao in cursor.description], linha)) if linha else None
+
+    # Opções do seletor de clientes da venda, como índice id -> registro
+    def opcoes_clientes(self, texto_busca: str = "") -> dict[int, dict]:
+        if texto_busca.strip():
+            df = self._consultar(("busca_clientes", texto_busca), ("clientes",),
+                                 lambda conn: busca.buscar_clientes(conn, texto_busca, limite=LIMITE_BUSCA))
+        elif self.contar_clientes() <= LIMITE_SELETOR:
+            df = self._consultar("clientes_selecao", ("clientes",),
+                                 lambda conn: listagem.clientes_para_selecao(conn, LIMITE_SELETOR))
+        else:
+            return {}
+        return df.set_index('id').to_dict('index')
+
+    # ---------------------------------------------------------------- vendas
+
+    # Registra um pedido com vários itens; retorna o id do pedido ou levanta
+    # vendas.EstoqueInsuficiente
+    def registrar_pedido(self, cliente_id: int, nome_cliente: str, itens: Iterable[ItemPedido]) -> int:
+        return vendas.registrar_pedido(self.pool, cliente_id, nome_cliente, list(itens))
+
+    def registrar_venda(self, produto_id: int, cliente_id: int, nome_produto: str, nome_cliente: str,
+                        quantidade: int, valor_unitario: float) -> int:
+        return vendas.registrar_venda(self.pool, produto_id, cliente_id, nome_produto, nome_cliente,
+                                      quantidade, valor_unitario)
+
+    # Venda a partir só dos ids e quantidades (caixas e API): nomes e preços
+    # vêm do cadastro. `itens` é uma lista de (produto_id, quantidade).
+    # Retorna {"pedido_id", "valor_total", "itens"}; levanta ValueError para
+    # cliente ou produto inexistente e vendas.EstoqueInsuficiente.
+    def vender(self, cliente_id: int, itens: Iterable[tuple[int, int]]) -> dict:
+        itens = [(int(produto_id), int(quantidade)) for produto_id, quantidade in itens]
+        cliente = self.cliente(cliente_id)
+        if cliente is None:
+            raise ValueError(f"Cliente {cliente_id} não encontrado")
+        produtos = self.produtos_por_id(produto_id for produto_id, _ in itens)
+        faltando = [produto_id for produto_id, _ in itens if produto_id not in produtos]
+        if faltando:
+            raise ValueError(f"Produtos não encontrados: {faltando}")
+        
+        pedido = [(produto_id, produtos[produto_id]['nome'], quantidade, produtos[produto_id]['preco'])
+                  for produto_id, quantidade in itens]
+        pedido_id = self.registrar_pedido(cliente['id'], cliente['nome'], pedido)
+        return {
+            "pedido_id": pedido_id,
+            "valor_total": round(sum(quantidade * preco for _, _, quantidade, preco in pedido), 2),
+            "itens": sum(quantidade for _, quantidade in itens),
+        }
+
+    # Lote de vendas da fila offline dos caixas; um resultado por venda
+    # (registrada, conflito de estoque ou inválida), idempotente pelo id
+    def sincronizar_vendas(self, lote: list[dict]) -> list[dict]:
+        return sincronizacao.aplicar_lote(self.pool, lote)
+
+    # ------------------------------------------------------------ relatórios
+
+    def intervalo_datas(self) -> tuple[date, date] | None:
+        return relatorios.intervalo_datas(self.pool)
+
+    def vendas_por_dia(self, data_inicio: date, data_fim: date) -> pd.DataFrame:
+        return relatorios.vendas_por_dia(self.pool, data_inicio, data_fim)
+
+    def vendas_por_produto(self, data_inicio: date, data_fim: date) -> pd.DataFrame:
+        return relatorios.vendas_por_produto(self.pool, data_inicio, data_fim)
+
+    def top_clientes(self, data_inicio: date, data_fim: date, limite: int = 10) -> pd.DataFrame:
+        return relatorios.top_clientes(self.pool, data_inicio, data_fim, limite)
+
+    def historico(self, data_inicio: date, data_fim: date, mais_recentes: int | None = None) -> pd.DataFrame:
+        return relatorios.historico(self.pool, data_inicio, data_fim, mais_recentes)
+
+    # Tabela inteira (ou as vendas do período) num DataFrame compacto, só
+    # com `colunas`; com tamanho_bloco, um iterador de DataFrames
+    def carregar(self, tabela: str, colunas: Iterable[str] | None = None, data_inicio: date | None = None,
+                 data_fim: date | None = None, arrow: bool = False,
+                 tamanho_bloco: int | None = None) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        return carregamento.carregar(self.pool, tabela, colunas, data_inicio, data_fim, arrow, tamanho_bloco)
+
+    # JSON do Plotly do gráfico de uma aba (graficos.GRAFICOS), em cache até
+    # as tabelas que ele lê mudarem
+    def grafico(self, aba: str, data_inicio: date, data_fim: date) -> str:
+        if aba not in graficos.GRAFICOS:
+            raise ValueError(f"Gráfico desconhecido: {aba}")
+        tabelas, _ = graficos.GRAFICOS[aba]
+        return self._consultar(("grafico", aba, data_inicio, data_fim), tabelas,
+                               lambda conn: graficos.figura_json(self.pool, aba, data_inicio, data_fim))
+
+    # ------------------------------------------------------------- previsões
+
+    # Recalcula as previsões de demanda (loja/previsao.py) nesta thread;
+    # retorna o registro da execução
+    def atualizar_previsoes(self, trabalhadores: int | None = None, referencia: date | None = None) -> dict:
+        return previsao.atualizar(self.pool, trabalhadores, referencia)
+
+    # A tarefa "previsoes" do agendador numa thread própria; False se ela já
+    # está rodando (neste ou em outro processo)
+    def atualizar_previsoes_em_segundo_plano(self) -> bool:
+        return self.executar_tarefa("previsoes")
+
+    # Última execução, última concluída e se há uma rodando
+    def situacao_previsoes(self) -> dict:
+        with self.pool.conexao() as conn:
+            return {
+                "em_andamento": agendador.em_andamento(conn, "previsoes"),
+                "ultima": previsao.ultima_execucao(conn),
+                "concluida": previsao.ultima_concluida(conn),
+            }
+
+    def previsao_categorias(self) -> pd.DataFrame:
+        return self._consultar("previsao_categorias", ("previsoes",), previsao.por_categoria)
+
+    def previsao_produtos(self, limite: int = 50) -> pd.DataFrame:
+        return self._consultar(("previsao_produtos", limite), ("previsoes", "produtos"),
+                               lambda conn: previsao.produtos(conn, limite))
+
+    # ------------------------------------------------- exportação e importação
+
+    # Grava o histórico ("historico") ou um relatório de exportacao.RELATORIOS
+    # em `destino`; retorna o número de linhas
+    def exportar(self, conjunto: str, data_inicio: date, data_fim: date, formato: str, destino: BinaryIO) -> int:
+        if conjunto == "historico":
+            return exportacao.exportar_historico(self.pool, data_inicio, data_fim, formato, destino)
+        return exportacao.exportar_relatorio(self.pool, conjunto, data_inicio, data_fim, formato, destino)
+
+    def importar_arquivo(self, tipo: str, arquivo: BinaryIO, formato: str,
+                         progresso: Callable[[int, int, int], None] | None = None) -> dict:
+        return importacao.importar_arquivo(self.pool, tipo, arquivo, formato, progresso=progresso)
+
+    # ------------------------------------------------------ tarefas agendadas
+
+    # Sobe o agendador de manutenção (loja/agendador.py) numa thread deste
+    # processo, a menos que LOJA_AGENDADOR=0; retorna se subiu
+    def iniciar_agendador(self) -> bool:
+        if not agendador.NO_PROCESSO:
+            return False
+        if self.agendador is None:
+            self.agendador = agendador.Agendador(self.pool).iniciar()
+        return True
+
+    def situacao_tarefas(self) -> list[dict]:
+        with self.pool.conexao() as conn:
+            return agendador.situacao(conn)
+
+    # Roda uma tarefa agora, numa thread própria; False se já está rodando
+    def executar_tarefa(self, tarefa: str) -> bool:
+        return agendador.executar_em_segundo_plano(self.pool, tarefa)
+
+    # ------------------------------------------------------------ diagnóstico
+
+    def estatisticas(self) -> dict[str, dict]:
+        return {"pool": self.pool.estatisticas(), "cache": self.cache.estatisticas()}
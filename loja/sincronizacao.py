@@ -0,0 +1,147 @@
+# Recebe as vendas feitas com o caixa offline.
+#
+# Sem rede, o caixa guarda cada venda numa fila em IndexedDB (fila_vendas.js)
+# com um id gerado no aparelho, e o service worker reenvia a fila em lotes
+# quando a conexão volta. Um lote pode chegar mais de uma vez (a resposta se
+# perdeu, o usuário recarregou a página...), então o resultado de cada id
+# fica gravado em vendas_offline (migração 11) e um reenvio só devolve o
+# resultado já gravado.
+#
+# Cada venda passa pela mesma baixa condicional de estoque de
+# vendas.gravar_pedido, dentro de um SAVEPOINT: se o estoque acabou enquanto
+# o caixa estava offline, só aquela venda volta atrás e é marcada como
+# conflito, e o restante do lote segue. O lote inteiro é uma transação.
+import json
+import math
+from datetime import datetime, timedelta
+
+from loja import vendas
+
+REGISTRADA = "registrada"
+CONFLITO = "conflito"
+INVALIDA = "invalida"
+
+MAX_LOTE = 200
+# Maior inteiro que o SQLite aceita; ids e quantidades acima disso são inválidos
+MAX_INTEIRO = 2 ** 63 - 1
+# Preço unitário acima disso é erro de digitação (e 1e308 × 2 viraria inf)
+MAX_VALOR_UNITARIO = 1_000_000.0
+# Relógio do aparelho adiantado além disso: usa a hora do servidor
+TOLERANCIA_RELOGIO = timedelta(minutes=5)
+
+
+class VendaInvalida(ValueError):
+    pass
+
+
+# Hora da venda no aparelho (ISO, com ou sem fuso) convertida para a hora
+# local do servidor, que é como as demais vendas são gravadas
+def _data_hora(texto, agora):
+    if not texto:
+        return agora
+    try:
+        momento = datetime.fromisoformat(str(texto).replace("Z", "+00:00"))
+        if momento.tzinfo is not None:
+            # OverflowError: data nos limites de datetime que sai do intervalo no fuso local
+            momento = momento.astimezone().replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        raise VendaInvalida(f"Data inválida: {texto}")
+    return min(momento, agora) if momento <= agora + TOLERANCIA_RELOGIO else agora
+
+
+# Valida uma venda do lote: {"id", "cliente_id", "criada_em",
+# "itens": [{"produto_id", "quantidade", "valor_unitario" (opcional)}]}
+def _validar(venda, agora):
+    try:
+        cliente_id = int(venda["cliente_id"])
+        itens = [(int(item["produto_id"]), int(item["quantidade"]),
+                  float(item["valor_unitario"]) if item.get("valor_unitario") is not None else None)
+                 for item in venda["itens"]]
+    except (KeyError, TypeError, ValueError, OverflowError):
+        # OverflowError: int() de um Infinity, que o json do Python aceita
+        raise VendaInvalida("Venda precisa de cliente_id e itens com produto_id e quantidade")
+    if not itens:
+        raise VendaInvalida("A venda não tem itens")
+    numeros = [cliente_id, *(numero for produto_id, quantidade, _ in itens for numero in (produto_id, quantidade))]
+    if any(abs(numero) > MAX_INTEIRO for numero in numeros):
+        raise VendaInvalida("Id ou quantidade fora do intervalo")
+    if any(quantidade <= 0 for _, quantidade, _ in itens):
+        raise VendaInvalida("A quantidade deve ser maior que zero")
+    if any(valor is not None and not math.isfinite(valor) for _, _, valor in itens):
+        raise VendaInvalida("Valor unitário inválido")
+    if any(valor is not None and valor < 0 for _, _, valor in itens):
+        raise VendaInvalida("Valor unitário negativo")
+    if any(valor is not None and valor > MAX_VALOR_UNITARIO for _, _, valor in itens):
+        raise VendaInvalida("Valor unitário acima do limite")
+    return cliente_id, itens, _data_hora(venda.get("criada_em"), agora)
+
+
+# Nomes vêm do cadastro; o preço é o cobrado no caixa, se veio, ou o atual
+def _montar_itens(conn, cliente_id, itens):
+    cliente = conn.execute("SELECT nome FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+    if cliente is None:
+        raise VendaInvalida(f"Cliente {cliente_id} não encontrado")
+    ids = sorted({produto_id for produto_id, _, _ in itens})
+    marcadores = ", ".join("?" * len(ids))
+    produtos = {produto_id: (nome, preco) for produto_id, nome, preco in conn.execute(
+        f"SELECT id, nome, preco FROM produtos WHERE id IN ({marcadores})", ids)}
+    faltando = [produto_id for produto_id in ids if produto_id not in produtos]
+    if faltando:
+        raise VendaInvalida(f"Produtos não encontrados: {faltando}")
+    return cliente[0], [(produto_id, produtos[produto_id][0], quantidade,
+                         produtos[produto_id][1] if valor is None else valor)
+                        for produto_id, quantidade, valor in itens]
+
+
+def _resultado(id_venda, status, pedido_id=None, detalhe=None, duplicada=False):
+    return {"id": id_venda, "status": status, "pedido_id": pedido_id, "detalhe": detalhe, "duplicada": duplicada}
+
+
+def _aplicar(conn, venda, agora):
+    id_venda = venda.get("id") if isinstance(venda, dict) else None
+    if not isinstance(id_venda, str) or not id_venda.strip() or len(id_venda) > 64:
+        return _resultado(None, INVALIDA, detalhe="Venda sem id")
+
+    existente = conn.execute("SELECT status, pedido_id, detalhe FROM vendas_offline WHERE id = ?",
+                             (id_venda,)).fetchone()
+    if existente is not None:
+        status, pedido_id, detalhe = existente
+        return _resultado(id_venda, status, pedido_id, json.loads(detalhe) if detalhe else None, duplicada=True)
+
+    pedido_id = None
+    conn.execute("SAVEPOINT venda_offline")
+    try:
+        cliente_id, itens, data_hora = _validar(venda, agora)
+        nome_cliente, itens = _montar_itens(conn, cliente_id, itens)
+        pedido_id = vendas.gravar_pedido(conn, cliente_id, nome_cliente, itens,
+                                         data_hora.isoformat(timespec="seconds"))
+        status, detalhe = REGISTRADA, None
+    except vendas.EstoqueInsuficiente as erro:
+        conn.execute("ROLLBACK TO venda_offline")
+        status = CONFLITO
+        detalhe = {"mensagem": str(erro), "produto_id": erro.produto_id,
+                   "solicitado": erro.solicitado, "disponivel": erro.disponivel}
+    except VendaInvalida as erro:
+        conn.execute("ROLLBACK TO venda_offline")
+        status, detalhe = INVALIDA, str(erro)
+    conn.execute("RELEASE venda_offline")
+
+    conn.execute('''
+        INSERT INTO vendas_offline (id, status, pedido_id, detalhe, criada_em, recebida_em)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (id_venda, status, pedido_id, json.dumps(detalhe, ensure_ascii=False) if detalhe is not None else None,
+          str(venda.get("criada_em") or "")[:40], agora.isoformat(timespec="seconds")))
+    return _resultado(id_venda, status, pedido_id, detalhe)
+
+
+# Aplica um lote de vendas offline; devolve um resultado por venda, na
+# mesma ordem: {"id", "status", "pedido_id", "detalhe", "duplicada"}
+def aplicar_lote(pool, lote):
+    if len(lote) > MAX_LOTE:
+        raise ValueError(f"Lote com mais de {MAX_LOTE} vendas")
+
+    def operacao(conn):
+        agora = datetime.now().replace(microsecond=0)
+        return [_aplicar(conn, venda, agora) for venda in lote]
+
+    return vendas.executar_com_retentativa(pool, operacao)
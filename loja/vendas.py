@@ -0,0 +1,113 @@
+# Registro de vendas com controle de estoque concorrente
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+
+class EstoqueInsuficiente(Exception):
+    def __init__(self, produto_id, solicitado, disponivel):
+        self.produto_id = produto_id
+        self.solicitado = solicitado
+        self.disponivel = disponivel
+        super().__init__(
+            f"Estoque insuficiente para o produto {produto_id}: "
+            f"solicitado {solicitado}, disponível {disponivel}"
+        )
+
+
+# SQLITE_BUSY / SQLITE_LOCKED: outro caixa está com o lock de escrita
+def _banco_ocupado(erro):
+    codigo = getattr(erro, "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(erro) or "busy" in str(erro)
+
+
+# Executa `operacao(conn)` dentro de BEGIN IMMEDIATE, repetindo com backoff
+# exponencial quando o banco está ocupado
+def executar_com_retentativa(pool, operacao, tentativas=6, espera_inicial=0.01):
+    for tentativa in range(tentativas):
+        try:
+            with pool.transacao("IMMEDIATE") as conn:
+                return operacao(conn)
+        except sqlite3.OperationalError as erro:
+            if not _banco_ocupado(erro) or tentativa == tentativas - 1:
+                raise
+            time.sleep(espera_inicial * (2 ** tentativa) * random.uniform(0.5, 1.5))
+
+
+# Confere o estoque de todos os produtos do pedido de uma vez
+def _verificar_estoque(conn, quantidades):
+    marcadores = ", ".join("?" * len(quantidades))
+    disponiveis = dict(conn.execute(
+        f"SELECT id, estoque FROM produtos WHERE id IN ({marcadores})", list(quantidades)
+    ).fetchall())
+    for produto_id, quantidade in quantidades.items():
+        disponivel = disponiveis.get(produto_id, 0)
+        if disponivel < quantidade:
+            raise EstoqueInsuficiente(produto_id, quantidade, disponivel)
+
+
+# Grava um pedido com vários itens na transação já aberta em `conn`: confere
+# o estoque, baixa todos os produtos em uma passada e grava o cabeçalho e os
+# itens com executemany. `itens` é uma lista de
+# (produto_id, nome_produto, quantidade, valor_unitario); `data_hora` (ISO)
+# permite gravar uma venda feita antes, como as da fila offline.
+# Retorna o id do pedido ou levanta EstoqueInsuficiente.
+def gravar_pedido(conn, cliente_id, nome_cliente, itens, data_hora=None):
+    cliente_id = int(cliente_id)
+    itens = [(int(produto_id), nome_produto, int(quantidade), float(valor_unitario))
+             for produto_id, nome_produto, quantidade, valor_unitario in itens]
+    if not itens:
+        raise ValueError("O pedido precisa de pelo menos um item")
+    if any(quantidade <= 0 for _, _, quantidade, _ in itens):
+        raise ValueError("A quantidade deve ser maior que zero")
+    
+    # O mesmo produto pode aparecer em mais de uma linha do carrinho
+    quantidades = {}
+    for produto_id, _, quantidade, _ in itens:
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+    
+    data_hora = data_hora or datetime.now().isoformat(timespec="seconds")
+    data_venda, hora_venda = data_hora.split("T")
+    valor_pedido = sum(quantidade * valor_unitario for _, _, quantidade, valor_unitario in itens)
+    
+    _verificar_estoque(conn, quantidades)
+    cursor = conn.executemany(
+        "UPDATE produtos SET estoque = estoque - ? WHERE id = ? AND estoque >= ?",
+        [(quantidade, produto_id, quantidade) for produto_id, quantidade in quantidades.items()],
+    )
+    if cursor.rowcount != len(quantidades):
+        raise sqlite3.IntegrityError("Baixa de estoque incompleta")
+    
+    cursor = conn.execute("""
+        INSERT INTO pedidos (cliente_id, nome_cliente, quantidade_itens, valor_total, data_venda, hora_venda, data_hora)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (cliente_id, nome_cliente, sum(quantidades.values()), valor_pedido, data_venda, hora_venda, data_hora))
+    pedido_id = cursor.lastrowid
+    
+    conn.executemany("""
+        INSERT INTO vendas (produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario, valor_total, data_venda, hora_venda, data_hora, pedido_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario,
+           quantidade * valor_unitario, data_venda, hora_venda, data_hora, pedido_id)
+          for produto_id, nome_produto, quantidade, valor_unitario in itens])
+    return pedido_id
+
+
+# Registra um pedido com vários itens em uma única transação (BEGIN
+# IMMEDIATE, repetida se o banco estiver ocupado).
+# Retorna o id do pedido ou levanta EstoqueInsuficiente.
+def registrar_pedido(pool, cliente_id, nome_cliente, itens):
+    itens = list(itens)
+    return executar_com_retentativa(
+        pool, lambda conn: gravar_pedido(conn, cliente_id, nome_cliente, itens)
+    )
+
+
+# Registra a venda de um único produto (um pedido com um item).
+# Retorna o id do pedido ou levanta EstoqueInsuficiente.
+def registrar_venda(pool, produto_id, cliente_id, nome_produto, nome_cliente, quantidade, valor_unitario):
+    return registrar_pedido(pool, cliente_id, nome_cliente,
+                            [(produto_id, nome_produto, quantidade, valor_unitario)])
@@ -1,48 +1,181 @@
 // Service Worker para PWA - Loja de Bebidas
-const CACHE_NAME = 'loja-bebidas-v1';
-const urlsToCache = [
-  '/',
-  '/manifest.json',
-  'https://cdnjs.cloudflare.com/ajax/libs/streamlit/1.28.0/static/css/bootstrap.min.css'
+//
+// Estratégias de cache:
+// - Pré-cache: manifest, ícones e a fila offline, instalados junto com o
+//   service worker. A lista abaixo traz o hash do conteúdo de cada arquivo
+//   (gerada por `python -m loja.pwa` ou pela API ao servir este arquivo);
+//   o nome do cache vem dos hashes, então qualquer mudança instala um cache
+//   novo e o anterior é apagado na ativação.
+// - Arquivos estáticos (bundles do Streamlit em /static, /app/static) e a
+//   página inicial: stale-while-revalidate, ou seja, responde na hora com a
+//   cópia guardada e atualiza em segundo plano. É o que deixa a abertura do
+//   app rápida nos tablets.
+// - Websocket e rotas internas do Streamlit (/_stcore, /media, /component),
+//   a API dos caixas e tudo que não é GET: direto para a rede, sem cache.
+//
+// O cache de execução é limitado por número de itens e por tamanho; os mais
+// antigos saem primeiro.
+
+// Fila de vendas offline (IndexedDB), compartilhada com a página
+importScripts('/fila_vendas.js');
+
+const PRECACHE = /*PRECACHE*/[{"url": "/manifest.json", "hash": "e8f96744bdaf"}, {"url": "/icon-192.png", "hash": "a612693b4d67"}, {"url": "/icon-512.png", "hash": "ec09adee455b"}, {"url": "/fila_vendas.js", "hash": "3620ce82b8d2"}]/*FIM_PRECACHE*/;
+const PREFIXO_CACHE = 'loja-bebidas-';
+const VERSAO = PRECACHE.map(function(item) { return item.hash; }).join('').slice(0, 64) || 'dev';
+const CACHE_PRECACHE = PREFIXO_CACHE + 'precache-' + hashTexto(VERSAO);
+const CACHE_EXECUCAO = PREFIXO_CACHE + 'execucao';
+const LIMITE_ITENS = 80;
+const LIMITE_BYTES = 20 * 1024 * 1024;
+
+// Só rede: Streamlit (websocket e API interna) e a API dos caixas
+const SOMENTE_REDE = [
+  /^\/_stcore\//,
+  /^\/media\//,
+  /^\/component\//,
+  /^\/(pedidos|vendas|produtos|clientes|relatorios|saude|metricas)(\/|$)/,
+];
+const ESTATICOS = [
+  /^\/static\//,
+  /^\/app\/static\//,
+  /\.(js|css|png|svg|ico|woff2?|ttf|json)$/,
 ];
 
-// Instalar o Service Worker
+// Hash curto (FNV-1a) só para encurtar o nome do cache
+function hashTexto(texto) {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < texto.length; i++) {
+    hash ^= texto.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return (hash >>> 0).toString(16);
+}
+
+function casa(padroes, caminho) {
+  return padroes.some(function(padrao) { return padrao.test(caminho); });
+}
+
+// Instalar: pré-cache dos arquivos da lista, sem depender de CDN externa
 self.addEventListener('install', function(event) {
   event.waitUntil(
-    caches.open(CACHE_NAME)
+    caches.open(CACHE_PRECACHE)
       .then(function(cache) {
-        console.log('Cache aberto');
-        return cache.addAll(urlsToCache);
+        return Promise.all(PRECACHE.map(function(item) {
+          // 'reload' ignora o cache HTTP: o conteúdo tem que bater com o hash
+          return fetch(new Request(item.url, { cache: 'reload' })).then(function(resposta) {
+            if (!resposta.ok) {
+              throw new Error('Falha no pré-cache de ' + item.url);
+            }
+            return cache.put(item.url, resposta);
+          });
+        }));
       })
+      .then(function() { return self.skipWaiting(); })
   );
 });
 
-// Buscar arquivos do cache
-self.addEventListener('fetch', function(event) {
-  event.respondWith(
-    caches.match(event.request)
-      .then(function(response) {
-        // Retorna o cache se encontrado
-        if (response) {
-          return response;
-        }
-        return fetch(event.request);
-      }
-    )
-  );
-});
-
-// Atualizar o Service Worker
+// Ativar: apaga os caches de versões anteriores
 self.addEventListener('activate', function(event) {
   event.waitUntil(
     caches.keys().then(function(cacheNames) {
       return Promise.all(
         cacheNames.map(function(cacheName) {
-          if (cacheName !== CACHE_NAME) {
+          if (cacheName !== CACHE_PRECACHE && cacheName !== CACHE_EXECUCAO) {
             return caches.delete(cacheName);
           }
         })
       );
-    })
+    }).then(function() { return self.clients.claim(); })
   );
-});
\ No newline at end of file
+});
+
+// Mantém o cache de execução dentro dos limites, apagando os mais antigos
+// (as chaves voltam na ordem de inserção)
+function limitarCache() {
+  return caches.open(CACHE_EXECUCAO).then(function(cache) {
+    return cache.keys().then(function(pedidos) {
+      return Promise.all(pedidos.map(function(pedido) {
+        return cache.match(pedido).then(function(resposta) {
+          const tamanho = resposta ? Number(resposta.headers.get('Content-Length')) || 0 : 0;
+          return { pedido: pedido, tamanho: tamanho };
+        });
+      })).then(function(itens) {
+        let total = itens.reduce(function(soma, item) { return soma + item.tamanho; }, 0);
+        let restantes = itens.length;
+        const remocoes = [];
+        for (const item of itens) {
+          if (restantes <= LIMITE_ITENS && total <= LIMITE_BYTES) {
+            break;
+          }
+          remocoes.push(cache.delete(item.pedido));
+          total -= item.tamanho;
+          restantes--;
+        }
+        return Promise.all(remocoes);
+      });
+    });
+  });
+}
+
+// Responde com a cópia em cache (se houver) e atualiza o cache pela rede
+function staleWhileRevalidate(event, chave) {
+  return caches.open(CACHE_EXECUCAO).then(function(cache) {
+    return cache.match(chave).then(function(guardada) {
+      const daRede = fetch(event.request).then(function(resposta) {
+        if (resposta.ok && resposta.type === 'basic') {
+          const copia = resposta.clone();
+          // Apagar antes de gravar leva o item para o fim da ordem de remoção
+          event.waitUntil(
+            cache.delete(chave)
+              .then(function() { return cache.put(chave, copia); })
+              .then(limitarCache)
+          );
+        }
+        return resposta;
+      });
+      if (guardada) {
+        event.waitUntil(daRede.catch(function() {}));
+        return guardada;
+      }
+      return daRede;
+    });
+  });
+}
+
+self.addEventListener('fetch', function(event) {
+  const pedido = event.request;
+  const url = new URL(pedido.url);
+
+  // Sem respondWith: o navegador segue direto para a rede
+  if (pedido.method !== 'GET' || url.origin !== self.location.origin || casa(SOMENTE_REDE, url.pathname)) {
+    return;
+  }
+
+  // Arquivos pré-cacheados
+  const precache = PRECACHE.find(function(item) { return item.url === url.pathname; });
+  if (precache) {
+    event.respondWith(
+      caches.match(url.pathname, { cacheName: CACHE_PRECACHE }).then(function(resposta) {
+        return resposta || fetch(pedido);
+      })
+    );
+    return;
+  }
+
+  // Página inicial: uma única entrada, qualquer que seja a query string
+  if (pedido.mode === 'navigate') {
+    event.respondWith(staleWhileRevalidate(event, '/'));
+    return;
+  }
+
+  if (casa(ESTATICOS, url.pathname)) {
+    event.respondWith(staleWhileRevalidate(event, pedido));
+  }
+});
+
+// Reenviar as vendas feitas sem rede quando a conexão voltar
+self.addEventListener('sync', function(event) {
+  if (event.tag === FilaVendas.TAG_SYNC) {
+    // Se falhar, o navegador agenda outra tentativa
+    event.waitUntil(FilaVendas.sincronizar());
+  }
+});